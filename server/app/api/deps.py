@@ -1,18 +1,37 @@
+import math
+import time
 from typing import (
     Generator,
+    Optional,
 )
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
-from app import models, schemas, crud
+from app import schemas, crud
 from app.core import security
 from app.core.config import settings
-from app.db.session import get_db
+from app.db.session import (
+    AsyncSessionLocal,
+    ReplicaSessionLocal,
+    SessionLocal,
+    get_async_db,
+    get_db,
+)
 
+from app.services.history_retriever import HistoryRetriever
 from app.services.llm_service import LLMService
+from app.services.observability_service import metrics
+from app.services.principal_cache import Principal, principal_cache
+from app.services.request_coalescer import RequestCoalescer
+from app.services.turn_writer import TurnWriter
+from app.services.write_tracker import (
+    WRITE_MARKER_COOKIE,
+    WRITE_MARKER_HEADER,
+    recent_writes,
+)
 
 # OAuth2PasswordBearer is used for extracting the token from the Authorization header
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -20,48 +39,135 @@ reusable_oauth2 = OAuth2PasswordBearer(
 )
 
 
-def get_llm_service() -> LLMService:
+def get_llm_service(request: Request) -> LLMService:
     """
-    Provides an instance of LLMService.
+    Provides the process-wide LLMService from the registry created at startup.
     """
-    return LLMService()
+    return request.app.state.llm_registry.get()
 
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> models.User:
+def get_chat_turn_coalescer(request: Request) -> RequestCoalescer:
+    """
+    Provides the process-wide coalescer for duplicate chat turns.
+    """
+    return request.app.state.chat_turn_coalescer
+
+
+def get_turn_writer(request: Request) -> TurnWriter:
+    """
+    Provides the process-wide writer that persists chat turns.
+    """
+    return request.app.state.turn_writer
+
+
+def get_history_retriever(request: Request) -> Optional[HistoryRetriever]:
+    """
+    Provides the process-wide history retriever, or None when the full history
+    is sent (CONTEXT_RETRIEVAL_SCOPE unset).
+    """
+    return request.app.state.history_retriever
+
+
+async def get_current_user(token: str = Depends(reusable_oauth2)) -> Principal:
     """
     Get the current authenticated user from the JWT token.
+
+    Served from the principal cache when the token was seen recently, with no
+    JWT decode or database round-trip. On a miss the user is loaded in its own
+    short-lived async session rather than the request's, so authentication does
+    not keep a pooled connection checked out for the rest of the request.
     """
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
         # The 'sub' claim in NextAuth.js JWT typically holds the user ID or email.
-        # Assuming 'sub' holds the user's email for lookup.
+        # Assuming 'sub' holds the user's ID for lookup.
         token_data = schemas.TokenPayload(sub=payload.get("sub"))
-    except (JWTError, ValidationError):
+        user_id = int(token_data.sub)
+    except (JWTError, ValidationError, TypeError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user = crud.user.get(db, id=token_data.sub)
+    loaded_at = time.time()
+    async with AsyncSessionLocal() as db:
+        user = await crud.user.aget(db, id=user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
-    return user
+    principal = Principal.from_user(user)
+    principal_cache.set(
+        token, principal, expires_at=payload.get("exp", math.inf), loaded_at=loaded_at
+    )
+    return principal
+
+
+def set_write_marker(response: Response, user_id: int, delay: float = 0.0) -> None:
+    """
+    Hands the client a marker of its write, as the X-Last-Write header and a
+    cookie, so its reads stay on the primary whichever worker serves them.
+    """
+    if not settings.DATABASE_REPLICA_URL:
+        return
+    marker = recent_writes.marker(user_id, delay=delay)
+    response.headers[WRITE_MARKER_HEADER] = marker
+    response.set_cookie(
+        WRITE_MARKER_COOKIE,
+        marker,
+        max_age=math.ceil(recent_writes.window + delay),
+        httponly=True,
+        samesite="lax",
+    )
 
 
-def get_current_active_user(
-    current_user: models.User = Depends(get_current_user),
-) -> models.User:
+async def get_current_active_user(
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     """
-    Get the current active user.
+    Get the current active user. A request other than GET/HEAD/OPTIONS counts
+    as a write by the user for read-your-writes (see `get_read_db`), and its
+    response carries the write marker.
     """
     if not crud.user.is_active(current_user):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user"
         )
+    if request.method not in ("GET", "HEAD", "OPTIONS"):
+        recent_writes.mark(current_user.id)
+        set_write_marker(response, current_user.id)
     return current_user
+
+
+def get_read_db(
+    request: Request,
+    current_user: Principal = Depends(get_current_active_user),
+) -> Generator[Session, None, None]:
+    """
+    Provides a session for read-only endpoints: on the read replica, except
+    for a user who wrote recently, whose reads stay on the primary so they see
+    their own writes. A write counts if this worker saw it or the request
+    carries its marker (the X-Last-Write header or cookie). Without
+    DATABASE_REPLICA_URL both are the primary.
+    """
+    marker = request.headers.get(WRITE_MARKER_HEADER) or request.cookies.get(
+        WRITE_MARKER_COOKIE
+    )
+    on_primary = not settings.DATABASE_REPLICA_URL or recent_writes.is_recent(
+        current_user.id, marker
+    )
+    if settings.DATABASE_REPLICA_URL:
+        metrics.incr("db.reads.primary" if on_primary else "db.reads.replica")
+    db = SessionLocal() if on_primary else ReplicaSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
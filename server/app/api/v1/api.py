@@ -1,9 +1,11 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import users, projects, chats, login
+from app.api.v1.endpoints import users, projects, chats, login, metrics, search
 
 api_router = APIRouter()
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(projects.router, prefix="/projects", tags=["projects"])
 api_router.include_router(chats.router, prefix="/chats", tags=["chats"])
 api_router.include_router(login.router, tags=["login"])
+api_router.include_router(metrics.router, tags=["metrics"])
+api_router.include_router(search.router, tags=["search"])
@@ -1,15 +1,90 @@
-from typing import Any, List, Dict
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload  # Import joinedload for eager loading
+import json
+import logging
+from typing import Any, AsyncIterator, List, Dict, Literal, Optional, Tuple
+
+import anyio
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
 from app import models, crud, schemas
 from app.api import deps
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.exceptions import (
+    LLMDeadlineExceededError,
+    LLMOverloadedError,
+    LLMUnavailableError,
+)
+from app.services.history_retriever import HistoryRetriever
 from app.services.llm_service import LLMService  # Import your LLMService
+from app.services.request_coalescer import RequestCoalescer, make_turn_key
+from app.services.turn_writer import TurnWriter
+from app.services.write_tracker import recent_writes
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-@router.post("/", response_model=schemas.Chat)
+def _get_chat_for_user(
+    db: Session, chat_id: int, current_user: models.User, action: str
+) -> models.Chat:
+    """
+    Loads a chat and checks that its project belongs to the current user, in a
+    single query. `action` completes the 403 message ("access", "update", ...).
+    """
+    chat, owner_id = crud.chat.get_with_owner_id(db, id=chat_id)
+    if not chat:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found"
+        )
+    if owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Not enough permissions to {action} this chat.",
+        )
+    return chat
+
+
+def _check_chats_owned(
+    db: Session,
+    chat_ids: List[int],
+    project_ids: List[int],
+    current_user: models.User,
+) -> Dict[int, int]:
+    """
+    Raises a 404 naming the chats or projects that don't exist or aren't the
+    current user's, checking each kind in one query.
+
+    Returns:
+        The project ID of each chat.
+    """
+    chats = {}
+    if chat_ids:
+        chats = crud.chat.get_project_ids(db, ids=chat_ids, owner_id=current_user.id)
+    missing_chats = sorted(set(chat_ids) - chats.keys())
+    if missing_chats:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Chats not found: {', '.join(map(str, missing_chats))}",
+        )
+    owned = set()
+    if project_ids:
+        owned = crud.project.get_owned_ids(
+            db, ids=project_ids, owner_id=current_user.id
+        )
+    missing_projects = sorted(set(project_ids) - owned)
+    if missing_projects:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Projects not found: {', '.join(map(str, missing_projects))}",
+        )
+    return chats
+
+
+@router.post("/", response_model=schemas.ChatSummary)
 def create_chat(
     *,
     db: Session = Depends(deps.get_db),
@@ -36,73 +111,174 @@ def create_chat(
     return chat
 
 
-@router.get("/", response_model=List[schemas.Chat])
+@router.get("/", response_model=schemas.Page[schemas.ChatSummary])
 def read_chats(
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     project_id: int | None = None,  # Optional filter by project_id
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
+    sort: Literal["created", "activity"] = "created",
     current_user: schemas.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Retrieve chats, optionally filtered by project ID.
+    Retrieve chats, optionally filtered by project ID, oldest first (or most
+    recently active first, with `sort=activity`), one page at a time. Pass the
+    returned `next_cursor` as `cursor` to get the next page.
     Only retrieves chats for projects owned by the current user.
     """
-    if project_id is not None:
-        project = crud.project.get(db, id=project_id)
-        if not project:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
+    try:
+        if project_id is not None:
+            # Ownership is part of the query; the project is only looked up on
+            # an empty page, to tell "no chats" from 404/403.
+            chats, next_cursor = crud.chat.get_multi_by_project(
+                db=db,
+                project_id=project_id,
+                owner_id=current_user.id,
+                cursor=cursor,
+                limit=limit,
+                sort=sort,
             )
-        if project.owner_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not enough permissions to access chats in this project.",
+            if not chats:
+                project = crud.project.get(db, id=project_id)
+                if not project:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="Project not found",
+                    )
+                if project.owner_id != current_user.id:
+                    raise HTTPException(
+                        status_code=status.HTTP_403_FORBIDDEN,
+                        detail="Not enough permissions to access chats in this project.",
+                    )
+        else:
+            # If no project_id is provided, retrieve all chats for projects owned by the user
+            chats, next_cursor = crud.chat.get_multi_by_owner(
+                db=db,
+                owner_id=current_user.id,
+                cursor=cursor,
+                limit=limit,
+                sort=sort,
             )
-        chats = crud.chat.get_multi_by_project(
-            db=db, project_id=project_id, skip=skip, limit=limit
-        )
-    else:
-        # If no project_id is provided, retrieve all chats for projects owned by the user
-        user_projects = crud.project.get_multi_by_owner(db=db, owner_id=current_user.id)
-        project_ids = [p.id for p in user_projects]
-        if not project_ids:
-            return []  # No projects, no chats
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-        chats = crud.chat.get_multi_by_project_ids(
-            db=db, project_ids=project_ids, skip=skip, limit=limit
-        )
+    return {"items": chats, "next_cursor": next_cursor}
 
-    return chats
 
+@router.post("/batch", response_model=List[schemas.ChatSummary])
+def create_chats(
+    *,
+    db: Session = Depends(deps.get_db),
+    chats_in: List[schemas.ChatCreate] = Body(max_length=settings.BATCH_MAX_ITEMS),
+    current_user: schemas.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Create many chats, in any of the current user's projects, in one
+    transaction.
+    """
+    _check_chats_owned(db, [], [item.project_id for item in chats_in], current_user)
+    return crud.chat.create_many(db=db, objs_in=chats_in)
 
-@router.get("/{chat_id}", response_model=schemas.Chat)
-def read_chat(
+
+@router.patch("/batch", response_model=List[schemas.ChatSummary])
+def update_chats(
     *,
     db: Session = Depends(deps.get_db),
-    chat_id: int,
+    chats_in: List[schemas.ChatBatchUpdate] = Body(
+        max_length=settings.BATCH_MAX_ITEMS
+    ),
     current_user: schemas.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Get a chat by ID.
+    Update many of the current user's chats in one transaction. Each item
+    holds a chat's `id` and the fields to change; nothing is changed if any
+    chat isn't found.
     """
-    chat = crud.chat.get(db, id=chat_id)
-    if not chat:
+    _check_chats_owned(db, [item.id for item in chats_in], [], current_user)
+    return crud.chat.update_many(db=db, objs_in=chats_in)
+
+
+@router.put("/batch", response_model=List[schemas.ChatSummary])
+def upsert_chats(
+    *,
+    db: Session = Depends(deps.get_db),
+    chats_in: List[schemas.ChatUpsert] = Body(max_length=settings.BATCH_MAX_ITEMS),
+    current_user: schemas.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Create or replace many chats of the current user in one transaction: items
+    with an `id` replace that chat's fields, items without create a new chat.
+    Chats can't move to another project. Nothing is changed if any chat or
+    project isn't found.
+    """
+    project_ids = _check_chats_owned(
+        db,
+        [item.id for item in chats_in if item.id is not None],
+        [item.project_id for item in chats_in],
+        current_user,
+    )
+    moved = sorted(
+        item.id
+        for item in chats_in
+        if item.id is not None and project_ids[item.id] != item.project_id
+    )
+    if moved:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Chats can't move to another project: {', '.join(map(str, moved))}",
         )
+    return crud.chat.upsert_many(db=db, objs_in=chats_in)
 
-    # Check if the chat's project belongs to the current user
-    project = crud.project.get(db, id=chat.project_id)
-    if not project or (project.owner_id != current_user.id):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions to access this chat.",
+
+@router.get("/{chat_id}", response_model=schemas.ChatSummary)
+def read_chat(
+    *,
+    db: Session = Depends(deps.get_read_db),
+    chat_id: int,
+    current_user: schemas.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get a chat by ID.
+    """
+    return _get_chat_for_user(db, chat_id, current_user, "access")
+
+
+@router.get("/{chat_id}/messages", response_model=schemas.MessagePage)
+def read_chat_messages(
+    *,
+    db: Session = Depends(deps.get_read_db),
+    chat_id: int,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    current_user: schemas.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get a page of a chat's messages, oldest first.
+
+    Without a cursor this is the latest `limit` messages. Pass `prev_cursor` as
+    `before` to scroll back through older messages, or `next_cursor` as `after`
+    to fetch messages newer than a page already loaded.
+    """
+    try:
+        messages, prev_cursor, next_cursor = crud.chat.get_messages(
+            db,
+            chat_id=chat_id,
+            owner_id=current_user.id,
+            before=before,
+            after=after,
+            limit=limit,
         )
-    return chat
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not messages:
+        # Ownership is part of the query; on an empty page check the chat to
+        # tell "no messages" from 404/403.
+        _get_chat_for_user(db, chat_id, current_user, "access")
+    return {"items": messages, "prev_cursor": prev_cursor, "next_cursor": next_cursor}
 
 
-@router.put("/{chat_id}", response_model=schemas.Chat)
+@router.put("/{chat_id}", response_model=schemas.ChatSummary)
 def update_chat(
     *,
     db: Session = Depends(deps.get_db),
@@ -113,24 +289,12 @@ def update_chat(
     """
     Update a chat.
     """
-    chat = crud.chat.get(db, id=chat_id)
-    if not chat:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found"
-        )
-
-    # Check if the chat's project belongs to the current user
-    project = crud.project.get(db, id=chat.project_id)
-    if not project or (project.owner_id != current_user.id):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions to update this chat.",
-        )
+    chat = _get_chat_for_user(db, chat_id, current_user, "update")
     chat = crud.chat.update(db, db_obj=chat, obj_in=chat_in)
     return chat
 
 
-@router.delete("/{chat_id}", response_model=schemas.Chat)
+@router.delete("/{chat_id}", response_model=schemas.ChatSummary)
 def delete_chat(
     *,
     db: Session = Depends(deps.get_db),
@@ -140,21 +304,53 @@ def delete_chat(
     """
     Delete a chat.
     """
-    chat = crud.chat.get(db, id=chat_id)
+    _get_chat_for_user(db, chat_id, current_user, "delete")
+    chat = crud.chat.remove(db, id=chat_id)
+    return chat
+
+
+async def _get_chat_for_message(
+    db: AsyncSession,
+    chat_id: int,
+    current_user: models.User,
+    history_retriever: Optional[HistoryRetriever],
+    user_message_content: str,
+) -> Tuple[models.Chat, Optional[List[models.Message]]]:
+    """
+    Loads a chat with its project for an LLM turn, ensuring it belongs to the
+    current user, and its history: selected by `history_retriever` if given,
+    otherwise the full history, loaded with the chat (and returned as None).
+    """
+    chat = await crud.chat.aget_with_history(
+        db, chat_id=chat_id, with_messages=history_retriever is None
+    )
+
     if not chat:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Chat with ID {chat_id} not found.",
         )
 
-    # Check if the chat's project belongs to the current user
-    project = crud.project.get(db, id=chat.project_id)
-    if not project or (project.owner_id != current_user.id):
+    # Authorization check:
+    if not chat.project or chat.project.owner_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions to delete this chat.",
+            detail="Not authorized to access this chat.",
         )
-    chat = crud.chat.remove(db, id=chat_id)
-    return chat
+    if chat.archived_at is not None:
+        # The chat is active again: back to the hot table
+        await crud.message_archive.arehydrate(db, chat=chat)
+    if history_retriever is None:
+        return chat, None
+    history = await history_retriever.aselect_history(db, chat, user_message_content)
+    return chat, history
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """
+    Formats a single Server-Sent Event frame.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 
 @router.post(
@@ -163,65 +359,168 @@ def delete_chat(
 async def post_chat_message(
     chat_id: int,
     user_message_request: schemas.UserMessageRequest,
-    db: Session = Depends(deps.get_db),
+    idempotency_key: Optional[str] = Header(
+        None,
+        description="Client-chosen key; retries with the same key get the original response.",
+    ),
     llm_service: LLMService = Depends(deps.get_llm_service),
+    coalescer: RequestCoalescer = Depends(deps.get_chat_turn_coalescer),
+    turn_writer: TurnWriter = Depends(deps.get_turn_writer),
+    history_retriever: Optional[HistoryRetriever] = Depends(
+        deps.get_history_retriever
+    ),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Dict[str, str]:
     """
     Receives a new user message for a specific chat, processes it with the LLM,
     persists both user and LLM messages, and returns the LLM's response.
+
+    Duplicate submissions (same `Idempotency-Key`, or same content when no key
+    is sent) share one in-flight turn. Retries with the same `Idempotency-Key`
+    within the dedup window get the stored response back without persisting or
+    generating anything new.
+
+    The turn runs in short database phases, each with its own session, so no
+    pooled connection is held while the LLM is generating. Both messages are
+    written together once the response is ready.
     """
     user_message_content = user_message_request.message_content
 
-    # 1. Fetch Chat & Project with messages loaded, ordered by created_at
-    chat = (
-        db.query(models.Chat)
-        .options(
-            joinedload(models.Chat.messages).load_only(
-                models.Message.content, models.Message.role, models.Message.created_at
-            ),
-            joinedload(models.Chat.project).load_only(models.Project.base_instructions),
-        )
-        .filter(models.Chat.id == chat_id)
-        .first()
-    )
-
-    if not chat:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Chat with ID {chat_id} not found.",
+    # 1. Fetch Chat & Project with the history for the prompt
+    async with AsyncSessionLocal() as db:
+        chat, history = await _get_chat_for_message(
+            db, chat_id, current_user, history_retriever, user_message_content
         )
 
-    # Authorization check:
-    if not chat.project or chat.project.owner_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to access this chat.",
+    async def run_turn() -> str:
+        # 2. Invoke LLM Service (no connection checked out)
+        try:
+            llm_response_content = await llm_service.get_llm_response(
+                new_user_message_content=user_message_content,
+                chat=chat,  # The chat object now has pre-sorted messages
+                history=history,
+            )
+        except Exception:
+            # Keep the user's message even though no reply was generated
+            await turn_writer.persist(chat.id, [("user", user_message_content)])
+            recent_writes.mark(current_user.id)
+            raise
+
+        # 3. Persist User Message and LLM Response in one transaction
+        await turn_writer.persist(
+            chat.id,
+            [("user", user_message_content), ("assistant", llm_response_content)],
         )
+        # Read-your-writes counts from the commit, not the start of the turn
+        recent_writes.mark(current_user.id)
+        return llm_response_content
 
-    # 2. Persist User Message
-    user_message = crud.chat.create_message(
-        db=db, chat_id=chat.id, role="user", content=user_message_content
+    turn_key = make_turn_key(
+        current_user.id, chat_id, user_message_content, idempotency_key
     )
-
-    # 3. Invoke LLM Service
     try:
-        llm_response_content = await llm_service.get_llm_response(
-            new_user_message_content=user_message_content,
-            chat=chat,  # The chat object now has pre-sorted messages
+        llm_response_content = await coalescer.run(
+            turn_key, run_turn, replay=idempotency_key is not None
         )
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except LLMUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e)
+        )
+    except LLMOverloadedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
+    except LLMDeadlineExceededError as e:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error generating LLM response: {e}",
         )
 
-    # 4. Persist LLM Response
-    llm_message = crud.chat.create_message(
-        db=db, chat_id=chat.id, role="assistant", content=llm_response_content
-    )
-
-    # 5. Return LLM Response
+    # 4. Return LLM Response
     return {"response": llm_response_content}
+
+
+@router.post(
+    "/{chat_id}/message/stream",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def stream_chat_message(
+    chat_id: int,
+    user_message_request: schemas.UserMessageRequest,
+    llm_service: LLMService = Depends(deps.get_llm_service),
+    turn_writer: TurnWriter = Depends(deps.get_turn_writer),
+    history_retriever: Optional[HistoryRetriever] = Depends(
+        deps.get_history_retriever
+    ),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> StreamingResponse:
+    """
+    Streaming variant of `post_chat_message` using Server-Sent Events.
+
+    Emits a `token` event per chunk as soon as the LLM produces it, then a
+    single `done` event (or `error` event). The user message and the assembled
+    assistant message are persisted together once the stream ends, including
+    when it ends partway because the client disconnected or the LLM failed.
+    """
+    user_message_content = user_message_request.message_content
+
+    async with AsyncSessionLocal() as db:
+        chat, history = await _get_chat_for_message(
+            db, chat_id, current_user, history_retriever, user_message_content
+        )
+    try:
+        token_stream = llm_service.stream_llm_response(
+            new_user_message_content=user_message_content, chat=chat, history=history
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    async def event_stream() -> AsyncIterator[str]:
+        chunks: List[str] = []
+        completed = False
+        message_id = None
+        try:
+            async for token in token_stream:
+                chunks.append(token)
+                yield _sse_event("token", {"delta": token})
+            completed = True
+        except Exception as e:
+            logger.error(
+                f"Streaming LLM response failed for chat {chat_id}: {e}", exc_info=True
+            )
+            yield _sse_event("error", {"detail": f"Error generating LLM response: {e}"})
+        finally:
+            # Persist the turn with whatever was assembled, even if the stream
+            # ended partway (LLM failure or client disconnect). The connection
+            # is only acquired for this write, which is shielded so a
+            # disconnect's cancellation cannot interrupt it.
+            turn = [("user", user_message_content)]
+            if chunks:
+                turn.append(("assistant", "".join(chunks)))
+            with anyio.CancelScope(shield=True):
+                created = await turn_writer.persist(chat_id, turn)
+            recent_writes.mark(current_user.id)
+            if chunks:
+                message_id = created[-1].id
+
+        if completed:
+            yield _sse_event("done", {"message_id": message_id})
+
+    response = StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Sent before the turn is written, so it also covers the time to generate it
+    deps.set_write_marker(
+        response, current_user.id, delay=settings.LLM_REQUEST_DEADLINE_SECONDS
+    )
+    return response
@@ -0,0 +1,15 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter
+
+from app.services.observability_service import metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_model=Dict[str, Any])
+def read_metrics() -> Any:
+    """
+    Returns this worker's in-process counters, gauges and timing summaries.
+    """
+    return metrics.snapshot()
@@ -1,13 +1,30 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Any, List, Literal, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
 from app.api import deps
+from app.core.config import settings
 
 router = APIRouter()
 
 
+def _check_projects_owned(
+    db: Session, project_ids: List[int], current_user: schemas.User
+) -> None:
+    """
+    Raises a 404 naming the projects among `project_ids` that don't exist or
+    aren't the current user's, checking them all in one query.
+    """
+    owned = crud.project.get_owned_ids(db, ids=project_ids, owner_id=current_user.id)
+    missing = sorted(set(project_ids) - owned)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Projects not found: {', '.join(map(str, missing))}",
+        )
+
+
 @router.post("/", response_model=schemas.Project)
 def create_project(
     *,
@@ -24,26 +41,90 @@ def create_project(
     return project
 
 
-@router.get("/", response_model=List[schemas.Project])
-def read_projects(
+@router.post("/batch", response_model=List[schemas.ProjectSummary])
+def create_projects(
+    *,
     db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
+    projects_in: List[schemas.ProjectCreate] = Body(
+        max_length=settings.BATCH_MAX_ITEMS
+    ),
     current_user: schemas.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Retrieve projects belonging to the current user.
+    Create many projects for the current user in one transaction.
     """
-    projects = crud.project.get_multi_by_owner(
-        db=db, owner_id=current_user.id, skip=skip, limit=limit
+    return crud.project.create_many_with_owner(
+        db=db, objs_in=projects_in, owner_id=current_user.id
     )
-    return projects
+
+
+@router.patch("/batch", response_model=List[schemas.ProjectSummary])
+def update_projects(
+    *,
+    db: Session = Depends(deps.get_db),
+    projects_in: List[schemas.ProjectBatchUpdate] = Body(
+        max_length=settings.BATCH_MAX_ITEMS
+    ),
+    current_user: schemas.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Update many of the current user's projects in one transaction. Each item
+    holds a project's `id` and the fields to change; nothing is changed if any
+    project isn't found.
+    """
+    _check_projects_owned(db, [item.id for item in projects_in], current_user)
+    return crud.project.update_many(db=db, objs_in=projects_in)
+
+
+@router.put("/batch", response_model=List[schemas.ProjectSummary])
+def upsert_projects(
+    *,
+    db: Session = Depends(deps.get_db),
+    projects_in: List[schemas.ProjectUpsert] = Body(
+        max_length=settings.BATCH_MAX_ITEMS
+    ),
+    current_user: schemas.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Create or replace many projects of the current user in one transaction:
+    items with an `id` replace that project's fields, items without create a
+    new project. Nothing is changed if any project isn't found.
+    """
+    _check_projects_owned(
+        db, [item.id for item in projects_in if item.id is not None], current_user
+    )
+    return crud.project.upsert_many_with_owner(
+        db=db, objs_in=projects_in, owner_id=current_user.id
+    )
+
+
+@router.get("/", response_model=schemas.Page[schemas.ProjectSummary])
+def read_projects(
+    db: Session = Depends(deps.get_read_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
+    sort: Literal["created", "activity"] = "created",
+    current_user: schemas.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve projects belonging to the current user, oldest first (or most
+    recently active first, with `sort=activity`), one page at a time. Pass the
+    returned `next_cursor` as `cursor` to get the next page. Projects come
+    without their chats; list those with `GET /chats/?project_id=...`.
+    """
+    try:
+        projects, next_cursor = crud.project.get_multi_by_owner(
+            db=db, owner_id=current_user.id, cursor=cursor, limit=limit, sort=sort
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"items": projects, "next_cursor": next_cursor}
 
 
 @router.get("/{project_id}", response_model=schemas.Project)
 def read_project(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     project_id: int,
     current_user: schemas.User = Depends(deps.get_current_active_user),
 ) -> Any:
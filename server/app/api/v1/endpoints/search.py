@@ -0,0 +1,31 @@
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app import crud, schemas
+from app.api import deps
+
+router = APIRouter()
+
+
+@router.get("/search", response_model=schemas.Page[schemas.SearchHit])
+def search(
+    db: Session = Depends(deps.get_read_db),
+    q: str = Query(..., min_length=1, max_length=256, description="Search terms."),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: schemas.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Full-text search over the current user's message history and chat titles:
+    matching chats first, then messages, each best match first. Supports quoted phrases, `OR` and `-term` exclusions on
+    PostgreSQL. Pass the returned `next_cursor` as `cursor` to get the next page.
+    """
+    try:
+        hits, next_cursor = crud.search.search(
+            db, owner_id=current_user.id, query=q, cursor=cursor, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"items": hits, "next_cursor": next_cursor}
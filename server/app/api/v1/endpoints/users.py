@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from app import crud, schemas
 from app.api import deps  # We will create this file for dependencies
 from app.core.security import get_password_hash  # Import for user creation
+from app.exceptions import PasswordHashingOverloadedError
 
 router = APIRouter()
 
@@ -24,7 +25,14 @@ def create_user(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="The user with this email already exists in the system.",
         )
-    user = crud.user.create(db, obj_in=user_in)
+    try:
+        user = crud.user.create(db, obj_in=user_in)
+    except PasswordHashingOverloadedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
     return user
 
 
@@ -79,5 +87,12 @@ def update_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions to update this user's information",
         )
-    user = crud.user.update(db, db_obj=user, obj_in=user_in)
+    try:
+        user = crud.user.update(db, db_obj=user, obj_in=user_in)
+    except PasswordHashingOverloadedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
     return user
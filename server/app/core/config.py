@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Literal
 import os
 
 
@@ -14,16 +15,108 @@ class Settings(BaseSettings):
 
     # Database settings
     DATABASE_URL: str
+    # Connection pool, per engine. Each worker process has a sync and an async
+    # engine, so keep workers * 2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW) below the
+    # server's (or PgBouncer's) connection limit.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # -1 never recycles
+    # Round-trip to test each connection on checkout. When disabled, a dead
+    # connection fails its first statement and the pool is invalidated instead.
+    DB_POOL_PRE_PING: bool = True
+    # Open a fresh connection per checkout instead of pooling in the process,
+    # e.g. when PgBouncer does the pooling
+    DB_NULL_POOL: bool = False
+    # Behind PgBouncer in transaction pooling mode: don't rely on server-side
+    # prepared statements persisting between transactions
+    DB_PGBOUNCER_TRANSACTION_MODE: bool = False
+    # Read replica for the read-only endpoints; None reads from the primary. For
+    # this long after a user's write, their reads stay on the primary, so they
+    # see their own writes through replica lag (per worker process).
+    DATABASE_REPLICA_URL: str | None = None
+    DB_READ_YOUR_WRITES_SECONDS: float = 10.0
+    DB_READ_YOUR_WRITES_MAX_USERS: int = 100000
 
     # LLM and Helicone settings
-    GEMINI_API_KEY: str
+    GEMINI_API_KEY: str | None = None  # Required when LLM_PROVIDER is "gemini"
     HELICONE_API_KEY: str | None = (  # Use | None for union type hint in Python 3.10+
         None  # Helicone is optional, set to None if not always required
     )
+    # "gemini", or "fake" for a local deterministic model (load tests, offline dev)
+    LLM_PROVIDER: str = "gemini"
+    LLM_MODEL: str = "gemini-2.5-flash"
+    LLM_TEMPERATURE: float = 0.7
+    # Open the LLM client's connection at startup instead of on the first chat turn
+    LLM_WARMUP_ON_STARTUP: bool = True
+    # Default prompt token budget; projects can override it per project
+    LLM_CONTEXT_TOKEN_BUDGET: int = 32000
+    # Retrieval-augmented history: instead of the full history, send the last
+    # CONTEXT_RECENT_MESSAGES plus the CONTEXT_RETRIEVAL_TOP_K older messages of
+    # the "chat" or its whole "project" most similar to the new one. None sends
+    # the full history. Message embeddings are computed at insert while enabled.
+    CONTEXT_RETRIEVAL_SCOPE: Literal["chat", "project"] | None = None
+    CONTEXT_RECENT_MESSAGES: int = 6
+    CONTEXT_RETRIEVAL_TOP_K: int = 8
+    # In-memory vector indexes kept per worker (one per chat or project)
+    CONTEXT_RETRIEVAL_MAX_INDEXES: int = 256
+    # Embedder for retrieval ("hashing": local, no model needed) and its size
+    EMBEDDER: str = "hashing"
+    EMBEDDING_DIM: int = 256
+    # Response cache for projects that opt in: "memory", "sql" or "none"
+    LLM_CACHE_BACKEND: str = "memory"
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_TTL_SECONDS: int = 3600
+    # Resilience: total time budget per chat turn, retries for transient errors only
+    LLM_REQUEST_DEADLINE_SECONDS: float = 30.0
+    LLM_MAX_ATTEMPTS: int = 3
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    LLM_CIRCUIT_RESET_SECONDS: float = 30.0
+    # Send a second, hedged request if the first is slower than this; None disables
+    LLM_HEDGE_DELAY_SECONDS: float | None = None
+    # Outbound LLM concurrency: global cap, fair per-user queues with a wait limit
+    LLM_MAX_CONCURRENCY: int = 32
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 10.0
+    LLM_MAX_QUEUED_PER_USER: int = 8
+    # Fake provider: time to first token distribution, token rate, failure injection
+    FAKE_LLM_LATENCY_DISTRIBUTION: str = "lognormal"  # fixed, uniform or lognormal
+    FAKE_LLM_LATENCY_MS: float = 300.0
+    FAKE_LLM_LATENCY_SPREAD: float = 0.5
+    FAKE_LLM_TOKENS_PER_SECOND: float = 50.0
+    FAKE_LLM_RESPONSE_TOKENS: int = 64
+    FAKE_LLM_FAILURE_RATE: float = 0.0
+    FAKE_LLM_SEED: int = 0
+    # Retries with the same Idempotency-Key within this window get the stored
+    # response replayed
+    CHAT_DEDUP_WINDOW_SECONDS: float = 30.0
+    # Group-commit chat turns that finish within the delay into one transaction
+    CHAT_WRITE_BATCHING: bool = False
+    CHAT_WRITE_BATCH_MAX_TURNS: int = 64
+    CHAT_WRITE_BATCH_DELAY_MS: float = 5.0
+    # Cold storage: archive_messages.py compresses the message contents of chats
+    # inactive for this many days, with "zstd" or "zlib"
+    ARCHIVE_INACTIVE_DAYS: int = 90
+    ARCHIVE_CODEC: Literal["zstd", "zlib"] = "zstd"
+    ARCHIVE_MAX_CHATS_PER_RUN: int = 1000
+    # Deleted projects and chats are only flagged; a background worker deletes
+    # their rows in batches every this many seconds (None disables it)
+    PURGE_INTERVAL_SECONDS: float | None = 30.0
+    PURGE_BATCH_SIZE: int = 1000
+    # Most items accepted by one request to the /batch endpoints
+    BATCH_MAX_ITEMS: int = 1000
 
     # JWT Authentication settings
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    # Authenticated principals cached per worker; user updates on another worker
+    # are seen within the TTL
+    AUTH_PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+    # bcrypt cost; existing hashes with a different cost are upgraded on login
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    # Dedicated threads for bcrypt, and how many more calls may wait for one
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUED: int = 64
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
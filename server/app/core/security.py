@@ -6,7 +6,13 @@ from jose import jwt, JWTError
 
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes made with a different number of rounds are reported as needing an
+# update by `verify_and_update`, so changing the cost upgrades them on login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
 
 ALGORITHM = "HS256"  # Standard algorithm for JWT
 
@@ -32,6 +38,7 @@ def create_access_token(
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifies a plain password against a hashed password.
+    CPU-bound; request handlers should go through `password_hasher` instead.
     """
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -39,6 +46,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     """
     Hashes a plain password.
+    CPU-bound; request handlers should go through `password_hasher` instead.
     """
     return pwd_context.hash(password)
 
@@ -1,6 +1,9 @@
 from .user import user
 from .project import project
 from .chat import chat
+from .search import search
+from .archive import message_archive
+from .purge import purge
 
 # This will allow you to import all CRUD objects from `app.crud`
 # e.g., from app.crud import user, project, chat
@@ -0,0 +1,240 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import bindparam, func, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models.chat import Chat
+from app.models.message import Message
+from app.models.message_archive import MessageArchive
+from app.services.compression import compress, decompress
+from app.services.observability_service import metrics
+
+
+def _decode_segment(archive: MessageArchive) -> Dict[int, str]:
+    pairs = json.loads(decompress(archive.data, archive.codec))
+    return {id_: content for id_, content in pairs}
+
+
+def _segments_query(messages: Sequence[Message]) -> Any:
+    return select(MessageArchive).where(
+        MessageArchive.chat_id.in_({msg.chat_id for msg in messages})
+    )
+
+
+def _contents_query(ids: Sequence[int]) -> Any:
+    return select(Message.id, Message.content).where(Message.id.in_(ids))
+
+
+def _set_contents(messages: Sequence[Message], contents: Dict[int, str]) -> None:
+    # Without marking the messages as changed
+    for msg in messages:
+        set_committed_value(msg, "content", contents.get(msg.id, ""))
+
+
+class CRUDMessageArchive:
+    """
+    Cold storage for the messages of inactive chats. The archival job moves the
+    contents of a chat's messages into one compressed `MessageArchive` segment
+    and sets them to NULL, so the messages table and its indexes only hold the
+    contents of active chats. The message rows themselves stay, so history
+    paging, counts and ordering are unchanged.
+
+    Rehydration is lazy: reads decompress the archived contents on the fly
+    (`fill`), and the next LLM turn in the chat moves them back into the
+    messages table (`arehydrate`). Archived messages are not found by search
+    and have no stored embeddings until then.
+    """
+
+    def archive_inactive(
+        self, db: Session, *, inactive_before: datetime, codec: str, limit: int
+    ) -> List[Dict[str, int]]:
+        """
+        Archives up to `limit` chats with no activity since `inactive_before`,
+        least recently active first, one transaction per chat.
+
+        Returns:
+            The `archive_chat` result of each chat archived.
+        """
+        chat_ids = db.scalars(
+            select(Chat.id)
+            .where(
+                Chat.archived_at.is_(None),
+                Chat.message_count > 0,
+                Chat.last_activity_at < inactive_before,
+            )
+            .order_by(Chat.last_activity_at)
+            .limit(limit)
+        ).all()
+        results = []
+        for chat_id in chat_ids:
+            result = self.archive_chat(
+                db, chat_id=chat_id, inactive_before=inactive_before, codec=codec
+            )
+            if result is not None:
+                results.append(result)
+        return results
+
+    def archive_chat(
+        self, db: Session, *, chat_id: int, inactive_before: datetime, codec: str
+    ) -> Optional[Dict[str, int]]:
+        """
+        Moves the contents of a chat's messages into a compressed segment, and
+        drops their embeddings (derived data, recomputed when needed). The chat
+        row is locked first, like message inserts do, and skipped if a writer
+        holds it or it was active since `inactive_before`.
+
+        Returns:
+            The chat_id, messages, raw_bytes and stored_bytes of the segment, or
+            None if the chat was skipped.
+        """
+        locked = db.scalars(
+            select(Chat.id)
+            .where(
+                Chat.id == chat_id,
+                Chat.archived_at.is_(None),
+                Chat.last_activity_at < inactive_before,
+            )
+            .with_for_update(skip_locked=True)
+        ).first()
+        rows = []
+        if locked is not None:
+            rows = db.execute(
+                select(Message.id, Message.content)
+                .where(Message.chat_id == chat_id, Message.content.is_not(None))
+                .order_by(Message.id)
+            ).all()
+        if not rows:
+            db.rollback()
+            return None
+
+        data = compress(json.dumps([list(row) for row in rows]).encode(), codec)
+        raw_bytes = sum(len(content.encode()) for _, content in rows)
+        db.add(
+            MessageArchive(
+                chat_id=chat_id,
+                codec=codec,
+                data=data,
+                message_count=len(rows),
+                raw_bytes=raw_bytes,
+                stored_bytes=len(data),
+            )
+        )
+        # Archiving is not an edit of the messages or the chat
+        db.execute(
+            update(Message)
+            .where(Message.id.in_([id_ for id_, _ in rows]))
+            .values(content=None, embedding=None, updated_at=Message.updated_at)
+        )
+        db.execute(
+            update(Chat)
+            .where(Chat.id == chat_id)
+            .values(archived_at=func.now(), updated_at=Chat.updated_at)
+        )
+        db.commit()
+        return {
+            "chat_id": chat_id,
+            "messages": len(rows),
+            "raw_bytes": raw_bytes,
+            "stored_bytes": len(data),
+        }
+
+    def totals(self, db: Session) -> Dict[str, int]:
+        """
+        Returns the chats, messages, raw_bytes and stored_bytes of all segments.
+        """
+        row = db.execute(
+            select(
+                func.count(),
+                func.coalesce(func.sum(MessageArchive.message_count), 0),
+                func.coalesce(func.sum(MessageArchive.raw_bytes), 0),
+                func.coalesce(func.sum(MessageArchive.stored_bytes), 0),
+            )
+        ).one()
+        return dict(zip(("chats", "messages", "raw_bytes", "stored_bytes"), row))
+
+    def fill(self, db: Session, messages: Sequence[Message]) -> None:
+        """
+        Loads the contents of archived `messages` (content None) from their
+        segments, in place. Messages rehydrated in the meantime are re-read.
+        """
+        missing = [msg for msg in messages if msg.content is None]
+        if not missing:
+            return
+        contents: Dict[int, str] = {}
+        for archive in db.scalars(_segments_query(missing)):
+            contents.update(_decode_segment(archive))
+        leftover = [msg.id for msg in missing if msg.id not in contents]
+        if leftover:
+            contents.update(db.execute(_contents_query(leftover)).all())
+        _set_contents(missing, contents)
+        metrics.incr("message_archive.messages_read", len(missing))
+
+    # Async variants
+
+    async def afill(self, db: AsyncSession, messages: Sequence[Message]) -> None:
+        """
+        Async variant of `fill`.
+        """
+        missing = [msg for msg in messages if msg.content is None]
+        if not missing:
+            return
+        contents: Dict[int, str] = {}
+        for archive in await db.scalars(_segments_query(missing)):
+            contents.update(_decode_segment(archive))
+        leftover = [msg.id for msg in missing if msg.id not in contents]
+        if leftover:
+            contents.update((await db.execute(_contents_query(leftover))).all())
+        _set_contents(missing, contents)
+        metrics.incr("message_archive.messages_read", len(missing))
+
+    async def arehydrate(self, db: AsyncSession, *, chat: Chat) -> None:
+        """
+        Moves an archived chat's contents back into the messages table and
+        deletes its segment, in one transaction; a no-op for the segment if a
+        concurrent call got there first. Messages already loaded with the chat
+        get their contents too.
+        """
+        archive = (
+            await db.scalars(
+                select(MessageArchive)
+                .where(MessageArchive.chat_id == chat.id)
+                .with_for_update()
+            )
+        ).first()
+        contents: Dict[int, str] = {}
+        if archive is not None:
+            contents = _decode_segment(archive)
+            await db.execute(
+                update(Message.__table__)
+                .where(Message.id == bindparam("message_id"), Message.content.is_(None))
+                .values(
+                    content=bindparam("message_content"),
+                    updated_at=Message.updated_at,
+                ),
+                [
+                    {"message_id": id_, "message_content": content}
+                    for id_, content in contents.items()
+                ],
+            )
+            await db.delete(archive)
+            metrics.incr("message_archive.rehydrated_chats")
+            metrics.incr("message_archive.rehydrated_messages", len(contents))
+        await db.execute(
+            update(Chat)
+            .where(Chat.id == chat.id)
+            .values(archived_at=None, updated_at=Chat.updated_at)
+        )
+        await db.commit()
+        if "messages" not in inspect(chat).unloaded:
+            missing = [msg for msg in chat.messages if msg.content is None]
+            leftover = [msg.id for msg in missing if msg.id not in contents]
+            if leftover:
+                contents.update((await db.execute(_contents_query(leftover))).all())
+            _set_contents(missing, contents)
+
+
+message_archive = CRUDMessageArchive()
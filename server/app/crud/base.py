@@ -1,16 +1,64 @@
 # server/app/crud/base.py
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from functools import cached_property
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from sqlalchemy import bindparam, insert, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.crud.pagination import paginate, split_page
 from app.db.base import Base
 
 ModelType = TypeVar("ModelType", bound=Base)  # type: ignore
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# Rows per multi-row upsert and per reload query, well within the bind
+# parameter limits of PostgreSQL and SQLite
+MAX_ROWS_PER_STATEMENT = 500
+
+
+def _row(obj_in: Union[BaseModel, Dict[str, Any]]) -> Dict[str, Any]:
+    return dict(obj_in) if isinstance(obj_in, dict) else obj_in.model_dump()
+
+
+def _group_by_keys(rows: Sequence[Dict[str, Any]]) -> List[List[int]]:
+    """
+    Groups the positions of `rows` by the columns they set, since all rows of
+    a multi-row statement must set the same columns.
+    """
+    groups: Dict[FrozenSet[str], List[int]] = {}
+    for position, row in enumerate(rows):
+        groups.setdefault(frozenset(row), []).append(position)
+    return list(groups.values())
+
+
+def _returned_keys(result: Any, index_elements: Sequence[str]) -> Dict[Tuple, Any]:
+    # Maps each upserted row's key to its ID
+    return {tuple(row._mapping[k] for k in index_elements): row.id for row in result}
+
+
+def _chunks(rows: Sequence[Any]) -> List[Sequence[Any]]:
+    return [
+        rows[start : start + MAX_ROWS_PER_STATEMENT]
+        for start in range(0, len(rows), MAX_ROWS_PER_STATEMENT)
+    ]
+
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
@@ -25,9 +73,14 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         return db.query(self.model).filter(self.model.id == id).first()
 
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
-    ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        self, db: Session, *, cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """
+        Returns one page of records ordered by (created_at, id), and the cursor
+        for the next page (None on the last page).
+        """
+        query = paginate(db.query(self.model), self.model, cursor=cursor, limit=limit)
+        return split_page(query.all(), limit)
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
@@ -42,28 +95,322 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db: Session,
         *,
         db_obj: ModelType,
-        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            update_data = obj_in.model_dump(
-                exclude_unset=True
-            )  # Use model_dump for Pydantic v2
-
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        for field, value in self._update_data(obj_in).items():
+            setattr(db_obj, field, value)
 
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
         return db_obj
 
+    def create_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+    ) -> List[ModelType]:
+        """
+        Creates many records in one transaction, with multi-row
+        INSERT ... RETURNING statements instead of a commit per record.
+
+        Returns:
+            The new records, in the order of `objs_in`.
+        """
+        rows = [_row(obj_in) for obj_in in objs_in]
+        ids: List[Any] = [None] * len(rows)
+        for positions in _group_by_keys(rows):
+            result = db.execute(self._insert(), [rows[p] for p in positions])
+            for position, id_ in zip(positions, result.scalars()):
+                ids[position] = id_
+        db.commit()
+        return self._get_many(db, ids)
+
+    def update_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[UpdateSchemaType, Dict[str, Any]]],
+    ) -> List[ModelType]:
+        """
+        Updates many records in one transaction, with one executemany UPDATE
+        per set of columns changed. Each of `objs_in` holds a record's `id` and
+        the fields to set, as for `update`. Records that don't exist are skipped.
+
+        Returns:
+            The updated records, in the order of `objs_in`.
+        """
+        rows = [self._update_data(obj_in) for obj_in in objs_in]
+        for statement, params in self._update_batches(rows):
+            db.execute(statement, params)
+        db.commit()
+        return self._get_many(db, [row["id"] for row in rows])
+
+    def upsert_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        index_elements: Sequence[str] = ("id",),
+    ) -> List[ModelType]:
+        """
+        Creates or updates many records in one transaction. Rows that set all
+        of `index_elements` (a unique key, the primary key by default) go
+        through multi-row INSERT ... ON CONFLICT DO UPDATE statements, which
+        overwrite the columns they set; the others are created as by
+        `create_many`. A key given twice takes its last row.
+
+        Returns:
+            The records, in the order of `objs_in`.
+        """
+        rows = self._upsert_rows(objs_in, index_elements)
+        ids: List[Any] = [None] * len(rows)
+        for positions in _group_by_keys(rows):
+            group = [rows[p] for p in positions]
+            if not set(index_elements) <= group[0].keys():
+                result = db.execute(self._insert(), group)
+                for position, id_ in zip(positions, result.scalars()):
+                    ids[position] = id_
+                continue
+            keys: Dict[Tuple, Any] = {}
+            for chunk in self._upsert_chunks(group, index_elements):
+                statement = self._upsert(db, list(chunk[0]), index_elements)
+                result = db.execute(statement, chunk)
+                keys.update(_returned_keys(result, index_elements))
+            for position, row in zip(positions, group):
+                ids[position] = keys[tuple(row[k] for k in index_elements)]
+        db.commit()
+        return self._get_many(db, ids)
+
+    def _get_many(self, db: Session, ids: Sequence[Any]) -> List[ModelType]:
+        """
+        Loads the records with the given IDs, in that order, with one query per
+        MAX_ROWS_PER_STATEMENT IDs. IDs of missing records are skipped.
+        """
+        by_id = {}
+        for chunk in _chunks(list(set(ids))):
+            by_id.update({obj.id: obj for obj in db.scalars(self._select_many(chunk))})
+        return [by_id[id_] for id_ in ids if id_ in by_id]
+
+    @cached_property
+    def _column_names(self) -> FrozenSet[str]:
+        return frozenset(inspect(self.model).column_attrs.keys())
+
+    def _update_data(
+        self, obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        The column values to set from `obj_in`: its set fields, or its items if
+        a dict. Column names come from the mapper, so the ORM object is never
+        encoded or loaded to find them.
+        """
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+        return {
+            field: value
+            for field, value in update_data.items()
+            if field in self._column_names
+        }
+
+    def _insert(self) -> Any:
+        table = self.model.__table__
+        return insert(table).returning(table.c.id, sort_by_parameter_order=True)
+
+    def _update_batches(
+        self, rows: Sequence[Dict[str, Any]]
+    ) -> List[Tuple[Any, List[Dict[str, Any]]]]:
+        table = self.model.__table__
+        batches = []
+        for positions in _group_by_keys(rows):
+            fields = [field for field in rows[positions[0]] if field != "id"]
+            if not fields:
+                continue
+            statement = (
+                update(table)
+                .where(table.c.id == bindparam("where_id"))
+                .values({field: bindparam(f"set_{field}") for field in fields})
+            )
+            params = [
+                {
+                    "where_id": rows[p]["id"],
+                    **{f"set_{field}": rows[p][field] for field in fields},
+                }
+                for p in positions
+            ]
+            batches.append((statement, params))
+        return batches
+
+    def _upsert_rows(
+        self,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        index_elements: Sequence[str],
+    ) -> List[Dict[str, Any]]:
+        # A key column left None can't conflict; it gets its default instead
+        rows = [_row(obj_in) for obj_in in objs_in]
+        for row in rows:
+            for key in index_elements:
+                if row.get(key, ...) is None:
+                    del row[key]
+        return rows
+
+    def _upsert_chunks(
+        self, rows: Sequence[Dict[str, Any]], index_elements: Sequence[str]
+    ) -> List[Sequence[Dict[str, Any]]]:
+        # ON CONFLICT DO UPDATE can't touch a row twice in one statement
+        unique = {tuple(row[k] for k in index_elements): row for row in rows}
+        return _chunks(list(unique.values()))
+
+    def _upsert(
+        self,
+        db: Union[Session, AsyncSession],
+        columns: Sequence[str],
+        index_elements: Sequence[str],
+    ) -> Any:
+        # RETURNING order isn't guaranteed here, so rows are matched by key
+        table = self.model.__table__
+        dialect = sqlite if db.get_bind().dialect.name == "sqlite" else postgresql
+        statement = dialect.insert(table)
+        keys = [table.c[k] for k in index_elements if k != "id"]
+        set_ = {
+            column: statement.excluded[column]
+            for column in columns
+            if column not in index_elements
+        }
+        # DO UPDATE doesn't apply onupdate defaults (e.g. updated_at) by itself
+        for column in table.c:
+            if column.onupdate is not None and column.name not in set_:
+                if column.onupdate.is_clause_element or column.onupdate.is_scalar:
+                    set_[column.name] = column.onupdate.arg
+        return statement.on_conflict_do_update(
+            index_elements=index_elements, set_=set_
+        ).returning(table.c.id, *keys)
+
+    def _select_many(self, ids: Sequence[Any]) -> Any:
+        # Overwrites records already in the session, which may be stale
+        return (
+            select(self.model)
+            .where(self.model.id.in_(ids))
+            .execution_options(populate_existing=True)
+        )
+
     def remove(self, db: Session, *, id: int) -> Optional[ModelType]:
-        obj = db.query(self.model).get(id)
+        obj = db.get(self.model, id)
         if obj:
             db.delete(obj)
             db.commit()
         return obj
+
+    # Async variants for `async def` endpoints using an AsyncSession.
+
+    async def aget(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        result = await db.scalars(select(self.model).where(self.model.id == id))
+        return result.first()
+
+    async def aget_multi(
+        self, db: AsyncSession, *, cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        query = paginate(select(self.model), self.model, cursor=cursor, limit=limit)
+        return split_page((await db.scalars(query)).all(), limit)
+
+    async def acreate(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        obj_in_data = jsonable_encoder(obj_in)
+        db_obj = self.model(**obj_in_data)  # type: ignore
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def aupdate(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+    ) -> ModelType:
+        for field, value in self._update_data(obj_in).items():
+            setattr(db_obj, field, value)
+
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def acreate_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+    ) -> List[ModelType]:
+        """
+        Async variant of `create_many`.
+        """
+        rows = [_row(obj_in) for obj_in in objs_in]
+        ids: List[Any] = [None] * len(rows)
+        for positions in _group_by_keys(rows):
+            result = await db.execute(self._insert(), [rows[p] for p in positions])
+            for position, id_ in zip(positions, result.scalars()):
+                ids[position] = id_
+        await db.commit()
+        return await self._aget_many(db, ids)
+
+    async def aupdate_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[Union[UpdateSchemaType, Dict[str, Any]]],
+    ) -> List[ModelType]:
+        """
+        Async variant of `update_many`.
+        """
+        rows = [self._update_data(obj_in) for obj_in in objs_in]
+        for statement, params in self._update_batches(rows):
+            await db.execute(statement, params)
+        await db.commit()
+        return await self._aget_many(db, [row["id"] for row in rows])
+
+    async def aupsert_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        index_elements: Sequence[str] = ("id",),
+    ) -> List[ModelType]:
+        """
+        Async variant of `upsert_many`.
+        """
+        rows = self._upsert_rows(objs_in, index_elements)
+        ids: List[Any] = [None] * len(rows)
+        for positions in _group_by_keys(rows):
+            group = [rows[p] for p in positions]
+            if not set(index_elements) <= group[0].keys():
+                result = await db.execute(self._insert(), group)
+                for position, id_ in zip(positions, result.scalars()):
+                    ids[position] = id_
+                continue
+            keys: Dict[Tuple, Any] = {}
+            for chunk in self._upsert_chunks(group, index_elements):
+                statement = self._upsert(db, list(chunk[0]), index_elements)
+                result = await db.execute(statement, chunk)
+                keys.update(_returned_keys(result, index_elements))
+            for position, row in zip(positions, group):
+                ids[position] = keys[tuple(row[k] for k in index_elements)]
+        await db.commit()
+        return await self._aget_many(db, ids)
+
+    async def _aget_many(self, db: AsyncSession, ids: Sequence[Any]) -> List[ModelType]:
+        by_id = {}
+        for chunk in _chunks(list(set(ids))):
+            by_id.update(
+                {obj.id: obj for obj in await db.scalars(self._select_many(chunk))}
+            )
+        return [by_id[id_] for id_ in ids if id_ in by_id]
+
+    async def aremove(self, db: AsyncSession, *, id: int) -> Optional[ModelType]:
+        obj = await db.get(self.model, id)
+        if obj:
+            await db.delete(obj)
+            await db.commit()
+        return obj
@@ -1,50 +1,676 @@
-from typing import List
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, case, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, load_only
 
+from app.core.config import settings
+from app.crud.archive import message_archive
 from app.crud.base import CRUDBase
-from app.models.chat import Chat
+from app.crud.pagination import SORT_ORDERS, encode_cursor, paginate, split_page
+from app.models.chat import PREVIEW_LENGTH, Chat
 from app.models.message import Message
+from app.models.project import Project
 from app.schemas.chat import ChatCreate, ChatUpdate
+from app.services.embeddings import get_embedder, to_bytes
+from app.services.token_counter import count_tokens
+
+
+def _history_columns():
+    # The message columns prompt building needs
+    return load_only(
+        Message.chat_id,
+        Message.content,
+        Message.role,
+        Message.token_count,
+        Message.created_at,
+    )
+
+
+def _embed_contents(contents: Sequence[str]) -> List[Optional[bytes]]:
+    """
+    Embeddings to store with new messages, while retrieval-augmented history is
+    enabled (the embedder is cheap and batched per insert); otherwise None.
+    """
+    if settings.CONTEXT_RETRIEVAL_SCOPE is None or not contents:
+        return [None] * len(contents)
+    return [to_bytes(vector) for vector in get_embedder().embed(contents)]
+
+
+# (message count, token count, preview of the newest message) per chat
+_Activity = Dict[int, Tuple[int, int, str]]
+
+
+def _collect_activity(rows: Sequence[Dict[str, Any]]) -> _Activity:
+    """
+    Sums up new message rows, in insert order, per chat.
+    """
+    activity: _Activity = {}
+    for row in rows:
+        count, tokens, _ = activity.get(row["chat_id"], (0, 0, ""))
+        activity[row["chat_id"]] = (
+            count + 1,
+            tokens + row["token_count"],
+            row["content"][:PREVIEW_LENGTH],
+        )
+    return activity
+
+
+def _chat_activity_update(
+    chat_id: int,
+    count: int,
+    tokens: int,
+    preview: str,
+    values: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """
+    Adds `count` new messages to a chat's stats, plus any other column
+    `values`, and returns the chat's project_id. The newest-message fields only
+    move forward, so a transaction that commits late cannot roll them back.
+    """
+    now = func.now()
+    newer = or_(Chat.last_message_at.is_(None), Chat.last_message_at <= now)
+    stats: Dict[str, Any] = {}
+    if count:
+        stats = {
+            "message_count": Chat.message_count + count,
+            "token_count": Chat.token_count + tokens,
+            "last_message_at": case((newer, now), else_=Chat.last_message_at),
+            "last_message_preview": case(
+                (newer, preview), else_=Chat.last_message_preview
+            ),
+            "last_activity_at": case(
+                (Chat.last_activity_at < now, now), else_=Chat.last_activity_at
+            ),
+            # Stats are not an edit of the chat
+            "updated_at": Chat.updated_at,
+        }
+    return (
+        update(Chat)
+        .where(Chat.id == chat_id, Chat.deleted_at.is_(None))
+        .values(**stats, **(values or {}))
+        .returning(Chat.project_id)
+    )
+
+
+def _project_activity_update(project_id: int, count: int, tokens: int) -> Any:
+    """
+    Rolls `count` new messages up into a project's stats.
+    """
+    now = func.now()
+    return (
+        update(Project)
+        .where(Project.id == project_id)
+        .values(
+            message_count=Project.message_count + count,
+            token_count=Project.token_count + tokens,
+            last_message_at=case(
+                (
+                    or_(
+                        Project.last_message_at.is_(None),
+                        Project.last_message_at <= now,
+                    ),
+                    now,
+                ),
+                else_=Project.last_message_at,
+            ),
+            last_activity_at=case(
+                (Project.last_activity_at < now, now), else_=Project.last_activity_at
+            ),
+            updated_at=Project.updated_at,
+        )
+    )
+
+
+def _project_unroll_update(chat: Chat) -> Any:
+    """
+    Takes a deleted chat's messages out of its project's stats.
+    """
+    return (
+        update(Project)
+        .where(Project.id == chat.project_id)
+        .values(
+            message_count=Project.message_count - chat.message_count,
+            token_count=Project.token_count - chat.token_count,
+            updated_at=Project.updated_at,
+        )
+    )
+
+
+def _project_totals(
+    activity: _Activity, project_ids: Dict[int, int]
+) -> Dict[int, Tuple[int, int]]:
+    totals: Dict[int, Tuple[int, int]] = {}
+    for chat_id, project_id in project_ids.items():
+        count, tokens, _ = activity.get(chat_id, (0, 0, ""))
+        if count:
+            total_count, total_tokens = totals.get(project_id, (0, 0))
+            totals[project_id] = (total_count + count, total_tokens + tokens)
+    return totals
 
 
 class CRUDChat(CRUDBase[Chat, ChatCreate, ChatUpdate]):
-    def get_multi_by_project(
-        self, db: Session, *, project_id: int, skip: int = 0, limit: int = 100
-    ) -> List[Chat]:
-        return (
+    """
+    CRUD operations for chats and their messages.
+
+    Every message insert also updates the chat's activity stats and its
+    project's rollups in the same transaction. Chat rows are updated before
+    project rows, each in ID order, so concurrent writers lock rows in the
+    same order and cannot deadlock.
+    """
+
+    def _record_activity(self, db: Session, activity: _Activity) -> None:
+        project_ids = {}
+        for chat_id in sorted(activity):
+            project_id = db.execute(
+                _chat_activity_update(chat_id, *activity[chat_id])
+            ).scalar_one_or_none()
+            if project_id is not None:
+                project_ids[chat_id] = project_id
+        totals = _project_totals(activity, project_ids)
+        for project_id in sorted(totals):
+            db.execute(_project_activity_update(project_id, *totals[project_id]))
+
+    async def _arecord_activity(
+        self,
+        db: AsyncSession,
+        activity: _Activity,
+        chat_values: Optional[Dict[int, Dict[str, Any]]] = None,
+    ) -> None:
+        chat_values = chat_values or {}
+        project_ids = {}
+        for chat_id in sorted(set(activity) | set(chat_values)):
+            project_id = (
+                await db.execute(
+                    _chat_activity_update(
+                        chat_id,
+                        *activity.get(chat_id, (0, 0, "")),
+                        values=chat_values.get(chat_id),
+                    )
+                )
+            ).scalar_one_or_none()
+            if project_id is not None:
+                project_ids[chat_id] = project_id
+        totals = _project_totals(activity, project_ids)
+        for project_id in sorted(totals):
+            await db.execute(_project_activity_update(project_id, *totals[project_id]))
+
+    def get_project_ids(
+        self, db: Session, *, ids: Sequence[int], owner_id: int
+    ) -> Dict[int, int]:
+        """
+        Returns the project ID of each of `ids` that is a chat of `owner_id`,
+        in one query.
+        """
+        rows = db.execute(
+            select(Chat.id, Chat.project_id)
+            .join(Chat.project)
+            .where(Chat.id.in_(ids), Project.owner_id == owner_id)
+        )
+        return {id_: project_id for id_, project_id in rows}
+
+    def get_with_owner_id(
+        self, db: Session, *, id: int
+    ) -> Tuple[Optional[Chat], Optional[int]]:
+        """
+        Loads a chat together with its project's owner ID in one query, so an
+        ownership check needs no second round-trip for the project.
+
+        Returns:
+            The chat and the owner ID, or (None, None) if the chat doesn't exist.
+        """
+        row = (
+            db.query(self.model, Project.owner_id)
+            .join(Chat.project)
+            .filter(Chat.id == id)
+            .first()
+        )
+        return (row[0], row[1]) if row else (None, None)
+
+    def get_multi_by_owner(
+        self,
+        db: Session,
+        *,
+        owner_id: int,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        sort: str = "created",
+    ) -> Tuple[List[Chat], Optional[str]]:
+        """
+        Retrieves one page of chats across all projects owned by a user, and
+        the next page's cursor. `sort` is a key of `SORT_ORDERS`.
+        """
+        column, descending = SORT_ORDERS[sort]
+        query = paginate(
             db.query(self.model)
-            .filter(Chat.project_id == project_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+            .join(Chat.project)
+            .filter(Project.owner_id == owner_id),
+            self.model,
+            cursor=cursor,
+            limit=limit,
+            descending=descending,
+            column=column,
         )
+        return split_page(query.all(), limit, column)
+
+    def get_multi_by_project(
+        self,
+        db: Session,
+        *,
+        project_id: int,
+        owner_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        sort: str = "created",
+    ) -> Tuple[List[Chat], Optional[str]]:
+        """
+        Retrieves one page of a project's chats and the next page's cursor.
+        With `owner_id`, only returns chats if the project belongs to that user.
+        `sort` is a key of `SORT_ORDERS`.
+        """
+        column, descending = SORT_ORDERS[sort]
+        query = db.query(self.model).filter(Chat.project_id == project_id)
+        if owner_id is not None:
+            query = query.join(Chat.project).filter(Project.owner_id == owner_id)
+        query = paginate(
+            query,
+            self.model,
+            cursor=cursor,
+            limit=limit,
+            descending=descending,
+            column=column,
+        )
+        return split_page(query.all(), limit, column)
 
     def get_multi_by_project_ids(
-        self, db: Session, *, project_ids: List[int], skip: int = 0, limit: int = 100
-    ) -> List[Chat]:
+        self,
+        db: Session,
+        *,
+        project_ids: List[int],
+        cursor: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[List[Chat], Optional[str]]:
+        """
+        Retrieves one page of chats for a list of project IDs and the next
+        page's cursor.
+        """
+        query = paginate(
+            db.query(self.model).filter(Chat.project_id.in_(project_ids)),
+            self.model,
+            cursor=cursor,
+            limit=limit,
+        )
+        return split_page(query.all(), limit)
+
+    def remove(self, db: Session, *, id: int) -> Optional[Chat]:
         """
-        Retrieves multiple chats for a list of project IDs.
+        Soft-deletes a chat, and takes its messages out of the project's stats
+        in the same transaction. The chat row is locked first, as on insert.
+        Its rows are deleted later by the purge worker.
         """
-        return (
+        obj = (
             db.query(self.model)
-            .filter(Chat.project_id.in_(project_ids))
-            .offset(skip)
-            .limit(limit)
-            .all()
+            .filter(Chat.id == id)
+            .populate_existing()
+            .with_for_update()
+            .first()
         )
+        if obj:
+            db.execute(_project_unroll_update(obj))
+            db.execute(update(Chat).where(Chat.id == id).values(deleted_at=func.now()))
+            db.commit()
+        return obj
 
     def create_message(
         self, db: Session, chat_id: int, role: str, content: str
     ) -> Message:
         """
-        Creates a new message record linked to a specific chat.
+        Creates a new message record linked to a specific chat, and updates the
+        chat's activity stats in the same transaction.
         """
-        db_obj = Message(chat_id=chat_id, role=role, content=content)
+        row = {
+            "chat_id": chat_id,
+            "role": role,
+            "content": content,
+            "token_count": count_tokens(content),
+        }
+        db_obj = Message(**row, embedding=_embed_contents([content])[0])
         db.add(db_obj)
+        self._record_activity(db, _collect_activity([row]))
         db.commit()
         db.refresh(db_obj)
         return db_obj
 
+    def get_messages(
+        self,
+        db: Session,
+        *,
+        chat_id: int,
+        owner_id: Optional[int] = None,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Message], Optional[str], Optional[str]]:
+        """
+        Retrieves one page of a chat's messages in chronological order: the
+        newest `limit` messages, or the ones just before the `before` cursor, or
+        just after the `after` cursor. With `owner_id`, only returns messages if
+        the chat's project belongs to that user.
+
+        Returns:
+            The messages, the cursor to pass as `before` for older messages and
+            the cursor to pass as `after` for newer ones. Each cursor is None
+            when there is nothing further in that direction.
+
+        Raises:
+            ValueError: If both cursors are given, or a cursor is malformed.
+        """
+        if before is not None and after is not None:
+            raise ValueError("Pass either `before` or `after`, not both.")
+        query = db.query(Message).filter(Message.chat_id == chat_id)
+        if owner_id is not None:
+            query = (
+                query.join(Message.chat)
+                .join(Chat.project)
+                .filter(Project.owner_id == owner_id)
+            )
+
+        if after is not None:
+            rows = paginate(query, Message, cursor=after, limit=limit).all()
+            messages, after_cursor = split_page(rows, limit)
+            message_archive.fill(db, messages)
+            # The `after` message itself is older than this page
+            before_cursor = encode_cursor(messages[0]) if messages else None
+            return messages, before_cursor, after_cursor
+
+        rows = paginate(
+            query, Message, cursor=before, limit=limit, descending=True
+        ).all()
+        messages, before_cursor = split_page(rows, limit)
+        messages.reverse()
+        message_archive.fill(db, messages)
+        # The `before` message itself is newer than this page
+        after_cursor = encode_cursor(messages[-1]) if before and messages else None
+        return messages, before_cursor, after_cursor
+
+    # Async variants
+
+    async def aget_multi_by_project(
+        self,
+        db: AsyncSession,
+        *,
+        project_id: int,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        sort: str = "created",
+    ) -> Tuple[List[Chat], Optional[str]]:
+        column, descending = SORT_ORDERS[sort]
+        query = paginate(
+            select(self.model).where(Chat.project_id == project_id),
+            self.model,
+            cursor=cursor,
+            limit=limit,
+            descending=descending,
+            column=column,
+        )
+        return split_page((await db.scalars(query)).all(), limit, column)
+
+    async def aget_multi_by_project_ids(
+        self,
+        db: AsyncSession,
+        *,
+        project_ids: List[int],
+        cursor: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[List[Chat], Optional[str]]:
+        """
+        Retrieves one page of chats for a list of project IDs and the next
+        page's cursor.
+        """
+        query = paginate(
+            select(self.model).where(Chat.project_id.in_(project_ids)),
+            self.model,
+            cursor=cursor,
+            limit=limit,
+        )
+        return split_page((await db.scalars(query)).all(), limit)
+
+    async def aremove(self, db: AsyncSession, *, id: int) -> Optional[Chat]:
+        """
+        Async variant of `remove`.
+        """
+        obj = (
+            await db.scalars(
+                select(self.model)
+                .where(Chat.id == id)
+                .execution_options(populate_existing=True)
+                .with_for_update()
+            )
+        ).first()
+        if obj:
+            await db.execute(_project_unroll_update(obj))
+            await db.execute(
+                update(Chat).where(Chat.id == id).values(deleted_at=func.now())
+            )
+            await db.commit()
+        return obj
+
+    async def aget_with_history(
+        self, db: AsyncSession, *, chat_id: int, with_messages: bool = True
+    ) -> Optional[Chat]:
+        """
+        Loads a chat with everything an LLM turn needs in one query: the project
+        fields used for the prompt and authorization, and the message history
+        ordered by created_at. Pass `with_messages=False` when the history is
+        selected separately (see `HistoryRetriever`).
+        """
+        options = [
+            joinedload(Chat.project).load_only(
+                Project.owner_id,
+                Project.base_instructions,
+                Project.context_token_budget,
+                Project.response_cache_enabled,
+            )
+        ]
+        if with_messages:
+            options.append(
+                joinedload(Chat.messages).load_only(
+                    Message.content,
+                    Message.role,
+                    Message.token_count,
+                    Message.created_at,
+                )
+            )
+        result = await db.execute(
+            select(self.model).options(*options).where(Chat.id == chat_id)
+        )
+        return result.unique().scalars().first()
+
+    async def aget_recent_messages(
+        self, db: AsyncSession, *, chat_id: int, limit: int
+    ) -> List[Message]:
+        """
+        Returns the newest `limit` messages of a chat, oldest first.
+        """
+        result = await db.scalars(
+            select(Message)
+            .options(_history_columns())
+            .where(Message.chat_id == chat_id)
+            .order_by(Message.created_at.desc(), Message.id.desc())
+            .limit(limit)
+        )
+        messages = list(reversed(result.all()))
+        await message_archive.afill(db, messages)
+        return messages
+
+    async def aget_messages_by_ids(
+        self, db: AsyncSession, *, ids: Sequence[int]
+    ) -> List[Message]:
+        """
+        Returns the messages with the given IDs that still exist, oldest first.
+        Messages of deleted chats count as gone.
+        """
+        if not ids:
+            return []
+        result = await db.scalars(
+            select(Message)
+            .options(_history_columns())
+            .join(Chat, Chat.id == Message.chat_id)
+            .where(Message.id.in_(ids))
+            .order_by(Message.created_at, Message.id)
+        )
+        messages = list(result.all())
+        await message_archive.afill(db, messages)
+        return messages
+
+    async def aget_embeddings(
+        self,
+        db: AsyncSession,
+        *,
+        chat_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        after_id: int = 0,
+        dim: int,
+    ) -> List[Tuple[int, Optional[bytes], Optional[str]]]:
+        """
+        Returns (id, embedding, content) for the messages of a chat, or of all
+        chats in a project, with an ID above `after_id`. Content is only sent for
+        messages whose embedding is missing or not `dim` float32 values, so the
+        caller can embed those itself. Archived messages are left out.
+        """
+        needs_embedding = or_(
+            Message.embedding.is_(None), func.length(Message.embedding) != dim * 4
+        )
+        query = select(
+            Message.id,
+            Message.embedding,
+            case((needs_embedding, Message.content)),
+        ).where(
+            Message.id > after_id,
+            or_(Message.embedding.is_not(None), Message.content.is_not(None)),
+        )
+        if project_id is not None:
+            query = query.join(Chat, Chat.id == Message.chat_id).where(
+                Chat.project_id == project_id
+            )
+        else:
+            query = query.where(Message.chat_id == chat_id)
+        result = await db.execute(query)
+        return [tuple(row) for row in result.all()]
+
+    async def asave_embeddings(
+        self, db: AsyncSession, *, embeddings: Sequence[Tuple[int, bytes]]
+    ) -> None:
+        """
+        Stores embeddings computed for existing messages, given as (message ID,
+        embedding) pairs, in one executemany UPDATE, and commits.
+        """
+        if not embeddings:
+            return
+        # Derived data, not an edit of the messages
+        await db.execute(
+            update(Message.__table__)
+            .where(Message.id == bindparam("message_id"))
+            .values(
+                embedding=bindparam("message_embedding"),
+                updated_at=Message.updated_at,
+            ),
+            [
+                {"message_id": id_, "message_embedding": data}
+                for id_, data in embeddings
+            ],
+        )
+        await db.commit()
+
+    async def acreate_message(
+        self, db: AsyncSession, chat_id: int, role: str, content: str
+    ) -> Message:
+        """
+        Creates a new message record linked to a specific chat, and updates the
+        chat's activity stats in the same transaction.
+        """
+        row = {
+            "chat_id": chat_id,
+            "role": role,
+            "content": content,
+            "token_count": count_tokens(content),
+        }
+        db_obj = Message(**row, embedding=_embed_contents([content])[0])
+        db.add(db_obj)
+        await self._arecord_activity(db, _collect_activity([row]))
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def apersist_turn(
+        self,
+        db: AsyncSession,
+        *,
+        chat_id: int,
+        messages: Sequence[Tuple[str, str]],
+        chat_updates: Optional[Dict[str, Any]] = None,
+    ) -> List[Message]:
+        """
+        Writes the messages of one chat turn, given as (role, content) pairs,
+        and optional column updates for the chat, in a single transaction.
+        See `apersist_turns`.
+        """
+        (created,) = await self.apersist_turns(db, [(chat_id, messages, chat_updates)])
+        return created
+
+    async def apersist_turns(
+        self,
+        db: AsyncSession,
+        turns: Sequence[
+            Tuple[int, Sequence[Tuple[str, str]], Optional[Dict[str, Any]]]
+        ],
+    ) -> List[List[Message]]:
+        """
+        Writes several chat turns, each given as (chat_id, [(role, content),
+        ...], chat_updates), in a single transaction: one multi-row INSERT ...
+        RETURNING for all messages, one UPDATE per chat (activity stats and
+        chat_updates) and per project (rollups), and one commit. The returned
+        messages are fully populated (ids and server defaults), so no refresh
+        round-trip is needed.
+
+        Returns:
+            The created messages of each turn, in input order.
+        """
+        rows = [
+            {
+                "chat_id": chat_id,
+                "role": role,
+                "content": content,
+                "token_count": count_tokens(content),
+            }
+            for chat_id, messages, _ in turns
+            for role, content in messages
+        ]
+        embeddings = _embed_contents([row["content"] for row in rows])
+        for row, embedding in zip(rows, embeddings):
+            row["embedding"] = embedding
+        created: List[Message] = []
+        if rows:
+            result = await db.scalars(
+                insert(Message).returning(Message, sort_by_parameter_order=True),
+                rows,
+            )
+            created = list(result)
+        # Stored messages go in the stats; chat_updates ride along in the
+        # same UPDATE
+        chat_values: Dict[int, Dict[str, Any]] = {}
+        for chat_id, _, chat_updates in turns:
+            if chat_updates:
+                chat_values.setdefault(chat_id, {}).update(chat_updates)
+        await self._arecord_activity(db, _collect_activity(rows), chat_values)
+        await db.commit()
+
+        per_turn: List[List[Message]] = []
+        offset = 0
+        for _, messages, _ in turns:
+            per_turn.append(created[offset : offset + len(messages)])
+            offset += len(messages)
+        return per_turn
+
 
 chat = CRUDChat(Chat)
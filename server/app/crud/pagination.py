@@ -0,0 +1,112 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy import tuple_
+
+T = TypeVar("T")
+
+# Listing orders: name -> (datetime sort column, descending). The sort column
+# is followed by id, and each needs an index on (<filter columns>, column, id).
+SORT_ORDERS = {
+    "created": ("created_at", False),
+    "activity": ("last_activity_at", True),
+}
+
+
+def _encode(payload: Any) -> str:
+    raw = json.dumps(payload)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> Any:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+
+def encode_cursor(obj: Any, column: str = "created_at") -> str:
+    """
+    Encodes the (<column>, id) position of `obj` as an opaque cursor string.
+    """
+    return _encode([getattr(obj, column).isoformat(), obj.id])
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decodes a cursor produced by `encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        created_at, id_ = _decode(cursor)
+        return datetime.fromisoformat(created_at), int(id_)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid pagination cursor.") from e
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """
+    Encodes a row offset as an opaque cursor string, for orders that have no
+    stable keyset to resume from (such as search relevance).
+    """
+    return _encode({"offset": offset})
+
+
+def decode_offset_cursor(cursor: str) -> int:
+    """
+    Decodes a cursor produced by `encode_offset_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        offset = int(_decode(cursor)["offset"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError("Invalid pagination cursor.") from e
+    if offset < 0:
+        raise ValueError("Invalid pagination cursor.")
+    return offset
+
+
+def paginate(
+    query: Any,
+    model: Any,
+    *,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False,
+    column: str = "created_at",
+) -> Any:
+    """
+    Applies keyset pagination on (<column>, id) to a `Query` or `Select`: rows
+    strictly after `cursor` in ascending order (or strictly before it, in
+    descending order), plus one extra row so `split_page` can tell whether
+    another page follows. `column` must be a non-null datetime. With an index
+    on (<filter columns>, <column>, id) every page is a single index range
+    scan, however deep.
+    """
+    sort_column = getattr(model, column)
+    position = tuple_(sort_column, model.id)
+    if cursor is not None:
+        value, id_ = decode_cursor(cursor)
+        bound = (value, id_)
+        query = query.where(position < bound if descending else position > bound)
+    if descending:
+        return query.order_by(sort_column.desc(), model.id.desc()).limit(limit + 1)
+    return query.order_by(sort_column, model.id).limit(limit + 1)
+
+
+def split_page(
+    rows: Sequence[T], limit: int, column: str = "created_at"
+) -> Tuple[List[T], Optional[str]]:
+    """
+    Splits the rows of a `paginate` query into the page and the cursor for the
+    next page in the same direction, which is None on the last page.
+    """
+    items = list(rows[:limit])
+    next_cursor = (
+        encode_cursor(items[-1], column) if len(rows) > limit and items else None
+    )
+    return items, next_cursor
@@ -1,14 +1,28 @@
-from typing import List, TypeVar, Any
+from typing import List, Optional, Sequence, Set, Tuple, TypeVar, Any
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.crud.base import CRUDBase
+from app.crud.pagination import SORT_ORDERS, paginate, split_page
+from app.models.chat import Chat
 from app.models.project import Project
-from app.schemas.project import ProjectCreate, ProjectUpdate
+from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectUpsert
 
 # Define a TypeVar for the model to help with type hinting in the generic CRUDBase
 ModelType = TypeVar("ModelType", bound=Project)
 
 
+def _soft_delete_statements(project_id: int) -> List[Any]:
+    now = func.now()
+    return [
+        update(Chat)
+        .where(Chat.project_id == project_id, Chat.deleted_at.is_(None))
+        .values(deleted_at=now),
+        update(Project).where(Project.id == project_id).values(deleted_at=now),
+    ]
+
+
 class CRUDProject(CRUDBase[Project, ProjectCreate, ProjectUpdate]):
     """
     CRUD operations for Project model.
@@ -37,28 +51,145 @@ class CRUDProject(CRUDBase[Project, ProjectCreate, ProjectUpdate]):
         db.refresh(db_obj)
         return db_obj
 
-    def get_multi_by_owner(
-        self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100
+    def create_many_with_owner(
+        self, db: Session, *, objs_in: Sequence[ProjectCreate], owner_id: int
     ) -> List[Project]:
         """
-        Retrieves multiple projects filtered by a specific owner ID.
+        Creates many projects for one owner in one transaction (see
+        `create_many`).
+        """
+        return self.create_many(
+            db,
+            objs_in=[
+                {**obj_in.model_dump(), "owner_id": owner_id} for obj_in in objs_in
+            ],
+        )
+
+    def upsert_many_with_owner(
+        self, db: Session, *, objs_in: Sequence[ProjectUpsert], owner_id: int
+    ) -> List[Project]:
+        """
+        Creates or replaces many projects of one owner in one transaction (see
+        `upsert_many`). The caller checks that the projects with an `id` are
+        the owner's.
+        """
+        return self.upsert_many(
+            db,
+            objs_in=[
+                {**obj_in.model_dump(), "owner_id": owner_id} for obj_in in objs_in
+            ],
+        )
+
+    def get_owned_ids(
+        self, db: Session, *, ids: Sequence[int], owner_id: int
+    ) -> Set[int]:
+        """
+        Returns those of `ids` that are projects of `owner_id`, in one query.
+        """
+        return set(
+            db.scalars(
+                select(Project.id).where(
+                    Project.id.in_(ids), Project.owner_id == owner_id
+                )
+            )
+        )
+
+    def get_multi_by_owner(
+        self,
+        db: Session,
+        *,
+        owner_id: int,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        sort: str = "created",
+    ) -> Tuple[List[Project], Optional[str]]:
+        """
+        Retrieves one page of projects filtered by a specific owner ID, ordered
+        by (created_at, id), or most recently active first.
 
         Args:
             db: The database session.
             owner_id: The ID of the owner whose projects are to be retrieved.
-            skip: The number of records to skip (for pagination).
-            limit: The maximum number of records to return (for pagination).
+            cursor: Opaque cursor from the previous page; None for the first page.
+            limit: The maximum number of records to return.
+            sort: A key of `SORT_ORDERS`: "created" or "activity".
 
         Returns:
-            A list of Project ORM objects.
-        """
-        return (
-            db.query(self.model)
-            .filter(Project.owner_id == owner_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+            A tuple of the Project ORM objects and the cursor for the next page,
+            which is None on the last page.
+        """
+        column, descending = SORT_ORDERS[sort]
+        query = paginate(
+            db.query(self.model).filter(Project.owner_id == owner_id),
+            self.model,
+            cursor=cursor,
+            limit=limit,
+            descending=descending,
+            column=column,
         )
+        return split_page(query.all(), limit, column)
+
+    def remove(self, db: Session, *, id: int) -> Optional[Project]:
+        """
+        Soft-deletes a project and its chats in one transaction, so they
+        disappear at once however big the project is. Their rows are deleted
+        later, in batches, by the purge worker.
+        """
+        obj = db.get(self.model, id)
+        if obj:
+            for statement in _soft_delete_statements(id):
+                db.execute(statement)
+            db.commit()
+        return obj
+
+    # Async variants
+
+    async def acreate_with_owner(
+        self, db: AsyncSession, *, obj_in: ProjectCreate, owner_id: int
+    ) -> Project:
+        """
+        Async variant of `create_with_owner`.
+        """
+        obj_in_data = obj_in.model_dump()
+        db_obj = self.model(**obj_in_data, owner_id=owner_id)
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def aget_multi_by_owner(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: int,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        sort: str = "created",
+    ) -> Tuple[List[Project], Optional[str]]:
+        """
+        Async variant of `get_multi_by_owner`.
+        """
+        column, descending = SORT_ORDERS[sort]
+        query = paginate(
+            select(self.model).where(Project.owner_id == owner_id),
+            self.model,
+            cursor=cursor,
+            limit=limit,
+            descending=descending,
+            column=column,
+        )
+        return split_page((await db.scalars(query)).all(), limit, column)
+
+    async def aremove(self, db: AsyncSession, *, id: int) -> Optional[Project]:
+        """
+        Async variant of `remove`.
+        """
+        obj = await db.get(self.model, id)
+        if obj:
+            for statement in _soft_delete_statements(id):
+                await db.execute(statement)
+            await db.commit()
+        return obj
 
 
 # Create an instance of CRUDProject for direct use in API endpoints
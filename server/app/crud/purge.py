@@ -0,0 +1,71 @@
+from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.chat import Chat
+from app.models.message import Message
+from app.models.project import Project
+
+
+def _batch_delete(model: Any, ids: Any) -> Any:
+    # Rows locked by another purger are left for its batch
+    return (
+        delete(model)
+        .where(model.id.in_(ids.with_for_update(skip_locked=True)))
+        .execution_options(synchronize_session=False)
+    )
+
+
+class CRUDPurge:
+    """
+    Physically deletes soft-deleted projects and chats, in bounded batches of
+    one transaction each, so removing a big project never holds locks or
+    bloats the WAL the way one cascading DELETE would. Messages go first, then
+    chats (their archive segments cascade), then projects.
+    """
+
+    async def apurge_messages(self, db: AsyncSession, *, limit: int) -> int:
+        """
+        Deletes up to `limit` messages of soft-deleted chats.
+
+        Returns:
+            The number of messages deleted.
+        """
+        deleted_chats = select(Chat.id).where(Chat.deleted_at.is_not(None))
+        ids = (
+            select(Message.id)
+            .where(Message.chat_id.in_(deleted_chats.scalar_subquery()))
+            .limit(limit)
+        )
+        result = await db.execute(_batch_delete(Message, ids))
+        await db.commit()
+        return result.rowcount
+
+    async def apurge_chats(self, db: AsyncSession, *, limit: int) -> int:
+        """
+        Deletes up to `limit` soft-deleted chats, with anything of theirs left.
+
+        Returns:
+            The number of chats deleted.
+        """
+        ids = select(Chat.id).where(Chat.deleted_at.is_not(None)).limit(limit)
+        result = await db.execute(_batch_delete(Chat, ids))
+        await db.commit()
+        return result.rowcount
+
+    async def apurge_projects(self, db: AsyncSession, *, limit: int) -> int:
+        """
+        Deletes up to `limit` soft-deleted projects, with anything of theirs
+        left.
+
+        Returns:
+            The number of projects deleted.
+        """
+        ids = select(Project.id).where(Project.deleted_at.is_not(None)).limit(limit)
+        result = await db.execute(_batch_delete(Project, ids))
+        await db.commit()
+        return result.rowcount
+
+
+purge = CRUDPurge()
@@ -0,0 +1,217 @@
+import html
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    case,
+    column,
+    func,
+    literal_column,
+    null,
+    select,
+    table,
+    union_all,
+)
+from sqlalchemy.orm import Session
+
+from app.crud.pagination import decode_offset_cursor, encode_offset_cursor
+from app.db.full_text_search import SEARCH_CONFIG, SEARCH_VECTOR_COLUMN, fts_table_name
+from app.models.chat import Chat
+from app.models.message import Message
+from app.models.project import Project
+
+# Private-use characters that mark matches in the database's snippets; the
+# snippet is HTML-escaped before they are turned into <b></b>
+MATCH_START = "\ue000"
+MATCH_END = "\ue001"
+
+
+def _highlight(snippet: str) -> str:
+    """
+    Escapes the stored text of a snippet for HTML and wraps its matches in
+    <b></b>, so message contents can't inject markup.
+    """
+    return html.escape(snippet).replace(MATCH_START, "<b>").replace(MATCH_END, "</b>")
+
+
+class CRUDSearch:
+    """
+    Ranked full-text search over message contents and chat titles, limited to
+    one owner's projects. Served by the indexes from `app.db.full_text_search`:
+    a GIN index on PostgreSQL, FTS5 tables on SQLite.
+    """
+
+    def search(
+        self,
+        db: Session,
+        *,
+        owner_id: int,
+        query: str,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Finds the messages and chats of `owner_id` matching `query`, best match
+        first. Each hit has kind ("message" or "chat"), chat_id, chat_title,
+        project_id, message_id and role (None for chats), snippet (HTML-escaped,
+        with matches wrapped in <b></b>), rank and created_at. Chat title matches
+        come before message matches.
+
+        Returns:
+            The hits and the cursor for the next page, which is None on the last.
+
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        offset = decode_offset_cursor(cursor) if cursor is not None else 0
+        if db.get_bind().dialect.name == "sqlite":
+            statement = self._sqlite_search(owner_id, query, offset, limit)
+        else:
+            statement = self._postgresql_search(owner_id, query, offset, limit)
+        if statement is None:
+            return [], None
+
+        rows = [dict(row) for row in db.execute(statement).mappings()]
+        for row in rows:
+            row["snippet"] = _highlight(row["snippet"] or "")
+        hits = rows[:limit]
+        next_cursor = (
+            encode_offset_cursor(offset + limit) if len(rows) > limit else None
+        )
+        return hits, next_cursor
+
+    def _postgresql_search(
+        self, owner_id: int, query: str, offset: int, limit: int
+    ) -> Any:
+        """
+        Matches the generated tsvector columns against a web-search style query
+        (quoted phrases, OR, -exclusions), ranks with ts_rank, and only builds
+        headlines for the rows of the requested page.
+        """
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        message_vector = literal_column(f"messages.{SEARCH_VECTOR_COLUMN}")
+        chat_vector = literal_column(f"chats.{SEARCH_VECTOR_COLUMN}")
+
+        message_hits = (
+            select(
+                literal_column("'message'").label("kind"),
+                Message.chat_id.label("chat_id"),
+                Chat.title.label("chat_title"),
+                Chat.project_id.label("project_id"),
+                Message.id.label("message_id"),
+                Message.role.label("role"),
+                Message.content.label("text"),
+                func.ts_rank(message_vector, tsquery).label("rank"),
+                Message.created_at.label("created_at"),
+            )
+            .join(Chat, Chat.id == Message.chat_id)
+            .join(Project, Project.id == Chat.project_id)
+            .where(Project.owner_id == owner_id, message_vector.op("@@")(tsquery))
+        )
+        chat_hits = (
+            select(
+                literal_column("'chat'"),
+                Chat.id,
+                Chat.title,
+                Chat.project_id,
+                null(),
+                null(),
+                Chat.title,
+                func.ts_rank(chat_vector, tsquery),
+                Chat.created_at,
+            )
+            .join(Project, Project.id == Chat.project_id)
+            .where(Project.owner_id == owner_id, chat_vector.op("@@")(tsquery))
+        )
+        hits = union_all(message_hits, chat_hits).subquery("hits")
+        order = self._order(hits)
+        page = select(hits).order_by(*order).offset(offset).limit(limit + 1)
+        page = page.subquery("page")
+        return select(
+            *(c for c in page.c if c.name != "text"),
+            func.ts_headline(
+                SEARCH_CONFIG,
+                page.c.text,
+                tsquery,
+                f"StartSel={MATCH_START}, StopSel={MATCH_END}",
+            ).label("snippet"),
+        ).order_by(*self._order(page))
+
+    def _sqlite_search(self, owner_id: int, query: str, offset: int, limit: int) -> Any:
+        """
+        Local fallback on the FTS5 tables. Every whitespace-separated term of
+        `query` must match (as a quoted FTS5 string, so user input cannot use
+        the query syntax); rank is the negated bm25 score.
+        """
+        terms = query.split()
+        if not terms:
+            return None
+        match = " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+        messages_fts = fts_table_name("messages")
+        chats_fts = fts_table_name("chats")
+        message_index = table(messages_fts, column("rowid"))
+        chat_index = table(chats_fts, column("rowid"))
+
+        message_hits = (
+            select(
+                literal_column("'message'").label("kind"),
+                Message.chat_id.label("chat_id"),
+                Chat.title.label("chat_title"),
+                Chat.project_id.label("project_id"),
+                Message.id.label("message_id"),
+                Message.role.label("role"),
+                func.snippet(
+                    literal_column(messages_fts), 0, MATCH_START, MATCH_END, "...", 16
+                ).label("snippet"),
+                (-func.bm25(literal_column(messages_fts))).label("rank"),
+                Message.created_at.label("created_at"),
+            )
+            .select_from(message_index)
+            .join(Message, Message.id == message_index.c.rowid)
+            .join(Chat, Chat.id == Message.chat_id)
+            .join(Project, Project.id == Chat.project_id)
+            .where(
+                Project.owner_id == owner_id,
+                literal_column(messages_fts).op("MATCH")(match),
+            )
+        )
+        chat_hits = (
+            select(
+                literal_column("'chat'"),
+                Chat.id,
+                Chat.title,
+                Chat.project_id,
+                null(),
+                null(),
+                func.snippet(
+                    literal_column(chats_fts), 0, MATCH_START, MATCH_END, "...", 16
+                ),
+                -func.bm25(literal_column(chats_fts)),
+                Chat.created_at,
+            )
+            .select_from(chat_index)
+            .join(Chat, Chat.id == chat_index.c.rowid)
+            .join(Project, Project.id == Chat.project_id)
+            .where(
+                Project.owner_id == owner_id,
+                literal_column(chats_fts).op("MATCH")(match),
+            )
+        )
+        hits = union_all(message_hits, chat_hits).subquery("hits")
+        return select(hits).order_by(*self._order(hits)).offset(offset).limit(limit + 1)
+
+    @staticmethod
+    def _order(hits: Any) -> List[Any]:
+        # Chat title matches first, then best match first; ties broken
+        # deterministically so pages don't overlap. Ranks of the two kinds come
+        # from different documents, so they aren't compared with each other.
+        return [
+            case((hits.c.kind == "chat", 0), else_=1),
+            hits.c.rank.desc(),
+            hits.c.created_at.desc(),
+            hits.c.chat_id,
+            hits.c.message_id,
+        ]
+
+
+search = CRUDSearch()
@@ -1,12 +1,14 @@
 from typing import Any, Dict, Optional, Union
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 
 from app.crud.base import CRUDBase
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash, verify_password
+from app.services.password_hasher import password_hasher
+from app.services.principal_cache import principal_cache
 
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
@@ -16,7 +18,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     def create(self, db: Session, *, obj_in: UserCreate) -> User:
         db_obj = User(
             email=obj_in.email,
-            hashed_password=get_password_hash(obj_in.password),
+            hashed_password=password_hasher.hash(obj_in.password),
             is_active=(obj_in.is_active if obj_in.is_active is not None else True),
         )
         db.add(db_obj)
@@ -33,21 +35,30 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             update_data = obj_in.model_dump(exclude_unset=True)  # Pydantic v2
 
         if "password" in update_data and update_data["password"]:
-            hashed_password = get_password_hash(update_data["password"])
+            hashed_password = password_hasher.hash(update_data["password"])
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
 
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        user = super().update(db, db_obj=db_obj, obj_in=update_data)
+        principal_cache.invalidate_user(user.id)
+        return user
 
     def authenticate(self, db: Session, *, email: str, password: str) -> Optional[User]:
         """
-        Authenticates a user by email and password.
+        Authenticates a user by email and password. A stored hash made with
+        outdated settings (e.g. a different bcrypt cost) is replaced.
         """
         user = self.get_by_email(db, email=email)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        valid, new_hash = password_hasher.verify_and_update(
+            password, user.hashed_password
+        )
+        if not valid:
             return None
+        if new_hash:
+            user.hashed_password = new_hash
+            db.commit()
         return user
 
     def is_active(self, user: User) -> bool:
@@ -56,5 +67,64 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         """
         return user.is_active
 
+    # Async variants
+
+    async def aget_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
+        result = await db.scalars(select(User).where(User.email == email))
+        return result.first()
+
+    async def acreate(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
+        db_obj = User(
+            email=obj_in.email,
+            hashed_password=await password_hasher.ahash(obj_in.password),
+            is_active=(obj_in.is_active if obj_in.is_active is not None else True),
+        )
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def aupdate(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: User,
+        obj_in: Union[UserUpdate, Dict[str, Any]]
+    ) -> User:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+
+        if "password" in update_data and update_data["password"]:
+            hashed_password = await password_hasher.ahash(update_data["password"])
+            del update_data["password"]
+            update_data["hashed_password"] = hashed_password
+
+        user = await super().aupdate(db, db_obj=db_obj, obj_in=update_data)
+        principal_cache.invalidate_user(user.id)
+        return user
+
+    async def aauthenticate(
+        self, db: AsyncSession, *, email: str, password: str
+    ) -> Optional[User]:
+        """
+        Async variant of `authenticate`.
+        """
+        user = await self.aget_by_email(db, email=email)
+        if not user:
+            return None
+        # End the read transaction so no connection is held while bcrypt runs
+        await db.commit()
+        valid, new_hash = await password_hasher.averify_and_update(
+            password, user.hashed_password
+        )
+        if not valid:
+            return None
+        if new_hash:
+            user.hashed_password = new_hash
+            await db.commit()
+        return user
+
 
 user = CRUDUser(User)
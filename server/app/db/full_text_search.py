@@ -0,0 +1,88 @@
+from sqlalchemy import DDL, Table, event
+
+# Text search configuration used for both indexing and querying (PostgreSQL)
+SEARCH_CONFIG = "english"
+# tsvector column added to each indexed table, kept current by a trigger
+# (PostgreSQL)
+SEARCH_VECTOR_COLUMN = "search_vector"
+
+
+def fts_table_name(table_name: str) -> str:
+    """
+    Returns the name of the FTS5 index table kept for `table_name` (SQLite).
+    """
+    return f"{table_name}_fts"
+
+
+def is_search_object(name: str, type_: str) -> bool:
+    """
+    Tells whether a reflected schema object belongs to the full-text index
+    rather than the models, so Alembic autogenerate leaves it alone.
+    """
+    if type_ == "column":
+        return name == SEARCH_VECTOR_COLUMN
+    if type_ == "index":
+        return name.endswith(f"_{SEARCH_VECTOR_COLUMN}")
+    if type_ == "table":
+        return "_fts" in name
+    return False
+
+
+def index_column(table: Table, column: str, weight: str = "D") -> None:
+    """
+    Maintains a full-text index over `table.column`, created and dropped with
+    the table (so `Base.metadata.create_all` sets it up too):
+
+    - PostgreSQL: a tsvector column, with a GIN index, that a trigger keeps
+      current on every insert and update of the column. `weight` (A-D) lets
+      `ts_rank` score matches in some tables above others. (Not a generated
+      column: adding one rewrites the table, so the migration couldn't add it
+      without locking out writes.)
+    - SQLite: an external-content FTS5 table kept in sync by triggers, so the
+      search is testable locally without Postgres.
+
+    The Alembic migration that adds search creates the same objects.
+    """
+    name = table.name
+    fts = fts_table_name(name)
+    function = f"{name}_{SEARCH_VECTOR_COLUMN}_update"
+    postgresql = [
+        f"ALTER TABLE {name} ADD COLUMN {SEARCH_VECTOR_COLUMN} tsvector",
+        f"CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$ BEGIN "
+        f"NEW.{SEARCH_VECTOR_COLUMN} := setweight(to_tsvector('{SEARCH_CONFIG}', "
+        f"coalesce(NEW.{column}, '')), '{weight}'); RETURN NEW; END $$ "
+        f"LANGUAGE plpgsql",
+        f"CREATE TRIGGER {function} BEFORE INSERT OR UPDATE OF {column} ON {name} "
+        f"FOR EACH ROW EXECUTE FUNCTION {function}()",
+        f"CREATE INDEX ix_{name}_{SEARCH_VECTOR_COLUMN} ON {name} "
+        f"USING gin ({SEARCH_VECTOR_COLUMN})",
+    ]
+    sqlite = [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({column}, content='{name}', "
+        f"content_rowid='id', tokenize='porter unicode61')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {name} BEGIN "
+        f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column}) "
+        f"VALUES ('delete', old.id, old.{column}); END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {column} ON {name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column}) "
+        f"VALUES ('delete', old.id, old.{column}); "
+        f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END",
+    ]
+    for statement in postgresql:
+        event.listen(
+            table, "after_create", DDL(statement).execute_if(dialect="postgresql")
+        )
+    for statement in sqlite:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    event.listen(
+        table,
+        "before_drop",
+        DDL(f"DROP TABLE IF EXISTS {fts}").execute_if(dialect="sqlite"),
+    )
+    event.listen(
+        table,
+        "after_drop",
+        DDL(f"DROP FUNCTION IF EXISTS {function}()").execute_if(dialect="postgresql"),
+    )
@@ -8,6 +8,7 @@ from alembic import context
 # This is the Base object that your models import.
 # It needs to be imported so Alembic can discover your models.
 from app.db.base import Base
+from app.db.full_text_search import is_search_object
 from app.models import (
     user,
     project,
@@ -30,6 +31,11 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    # The full-text index objects are created by DDL, not declared on models
+    return not (reflected and compare_to is None and is_search_object(name, type_))
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired and used here.
 def get_url():
@@ -71,6 +77,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -97,6 +104,7 @@ def run_migrations_online() -> None:
             connection=connection,
             target_metadata=target_metadata,
             compare_type=True,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,62 @@
+"""Replace the messages chat_id index with (chat_id, created_at, id)
+
+Revision ID: 09c4678e81a3
+Revises: edddb98cc74c
+Create Date: 2026-10-17 21:00:51.312363
+
+The indexes are built and dropped CONCURRENTLY so writes to messages are not
+blocked while this runs on a live database. CONCURRENTLY cannot run inside a
+transaction, hence the autocommit block. If a concurrent build fails it leaves
+an INVALID index behind; drop it and rerun the migration.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '09c4678e81a3'
+down_revision: Union[str, Sequence[str], None] = 'edddb98cc74c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_messages_chat_id_created_at_id',
+            'messages',
+            ['chat_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Redundant: chat_id is the leading column of the new index
+        op.drop_index(
+            'ix_messages_chat_id',
+            table_name='messages',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_messages_chat_id',
+            'messages',
+            ['chat_id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_messages_chat_id_created_at_id',
+            table_name='messages',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
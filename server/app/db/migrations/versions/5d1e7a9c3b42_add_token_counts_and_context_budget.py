@@ -0,0 +1,33 @@
+"""Add token counts to messages and context budget to projects
+
+Revision ID: 5d1e7a9c3b42
+Revises: 4cc32e6965cb
+Create Date: 2026-10-17 20:45:12.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d1e7a9c3b42'
+down_revision: Union[str, Sequence[str], None] = '4cc32e6965cb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('messages', sa.Column('token_count', sa.Integer(), nullable=True))
+    op.add_column('projects', sa.Column('context_token_budget', sa.Integer(), nullable=True))
+    # Backfill with the same estimate used by app.services.token_counter
+    # (ceil(chars / 4) + 4 tokens of per-message overhead).
+    op.execute("UPDATE messages SET token_count = (length(content) + 3) / 4 + 4")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('projects', 'context_token_budget')
+    op.drop_column('messages', 'token_count')
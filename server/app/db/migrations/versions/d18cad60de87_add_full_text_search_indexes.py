@@ -0,0 +1,127 @@
+"""Add full-text search indexes on message contents and chat titles
+
+Revision ID: d18cad60de87
+Revises: 09c4678e81a3
+Create Date: 2026-10-17 21:12:27.675743
+
+Mirrors app.db.full_text_search.index_column. On PostgreSQL each table gets a
+nullable tsvector column (a catalog-only change) kept current by a trigger,
+existing rows are filled in batches of BACKFILL_BATCH_SIZE ids, each committed
+on its own so no long lock or transaction is held, and the GIN index is built
+CONCURRENTLY. On SQLite each table gets an external-content FTS5 table, kept
+in sync by triggers and filled with the existing rows.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd18cad60de87'
+down_revision: Union[str, Sequence[str], None] = '09c4678e81a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, ts_rank weight)
+INDEXED = [('messages', 'content', 'D'), ('chats', 'title', 'A')]
+BACKFILL_BATCH_SIZE = 10000
+
+
+def search_vector(column: str, weight: str, row: str = '') -> str:
+    return (
+        f"setweight(to_tsvector('english', coalesce({row}{column}, '')), "
+        f"'{weight}')"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        for table, column, _ in INDEXED:
+            fts = f'{table}_fts'
+            op.execute(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5({column}, content='{table}', "
+                f"content_rowid='id', tokenize='porter unicode61')"
+            )
+            op.execute(
+                f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END"
+            )
+            op.execute(
+                f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {column}) "
+                f"VALUES ('delete', old.id, old.{column}); END"
+            )
+            op.execute(
+                f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {column} ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {column}) "
+                f"VALUES ('delete', old.id, old.{column}); "
+                f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END"
+            )
+            op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        return
+
+    for table, column, weight in INDEXED:
+        op.add_column(table, sa.Column('search_vector', postgresql.TSVECTOR()))
+        op.execute(
+            f"CREATE OR REPLACE FUNCTION {table}_search_vector_update() "
+            f"RETURNS trigger AS $$ BEGIN "
+            f"NEW.search_vector := {search_vector(column, weight, 'NEW.')}; "
+            f"RETURN NEW; END $$ LANGUAGE plpgsql"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_search_vector_update "
+            f"BEFORE INSERT OR UPDATE OF {column} ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()"
+        )
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        for table, column, weight in INDEXED:
+            max_id = bind.execute(sa.text(f'SELECT max(id) FROM {table}')).scalar()
+            for start in range(0, (max_id or 0) + 1, BACKFILL_BATCH_SIZE):
+                # Rows written since the trigger was added already have one
+                bind.execute(
+                    sa.text(
+                        f'UPDATE {table} '
+                        f'SET search_vector = {search_vector(column, weight)} '
+                        f'WHERE id >= :start AND id < :end '
+                        f'AND search_vector IS NULL'
+                    ),
+                    {'start': start, 'end': start + BACKFILL_BATCH_SIZE},
+                )
+        for table, _, _ in INDEXED:
+            op.create_index(
+                f'ix_{table}_search_vector',
+                table,
+                ['search_vector'],
+                unique=False,
+                postgresql_using='gin',
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        for table, _, _ in INDEXED:
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f'DROP TRIGGER IF EXISTS {table}_fts_{suffix}')
+            op.execute(f'DROP TABLE IF EXISTS {table}_fts')
+        return
+
+    with op.get_context().autocommit_block():
+        for table, _, _ in INDEXED:
+            op.drop_index(
+                f'ix_{table}_search_vector',
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    for table, _, _ in INDEXED:
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_search_vector_update ON {table}')
+        op.execute(f'DROP FUNCTION IF EXISTS {table}_search_vector_update()')
+        op.drop_column(table, 'search_vector')
@@ -0,0 +1,61 @@
+"""Add keyset pagination indexes on projects and chats
+
+Revision ID: edddb98cc74c
+Revises: 9b3f2c71e8a5
+Create Date: 2026-10-17 20:58:24.663635
+
+The indexes are built and dropped CONCURRENTLY, in an autocommit block, so
+writes to projects and chats are not blocked while this runs on a live
+database. If a concurrent build fails it leaves an INVALID index behind; drop
+it and rerun the migration.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'edddb98cc74c'
+down_revision: Union[str, Sequence[str], None] = '9b3f2c71e8a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_chats_project_id_created_at_id',
+            'chats',
+            ['project_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_projects_owner_id_created_at_id',
+            'projects',
+            ['owner_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_projects_owner_id_created_at_id',
+            table_name='projects',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_chats_project_id_created_at_id',
+            table_name='chats',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,68 @@
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.services.observability_service import metrics
+
+
+class _TimedCheckoutMixin:
+    """
+    Times every checkout, including waiting for a free slot, opening a new
+    connection and the pre-ping, under `db.pool.<logging_name>`. Checkouts that
+    give up after the pool timeout are counted separately.
+    """
+
+    def connect(self):
+        prefix = f"db.pool.{self._orig_logging_name}"
+        start = time.monotonic()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            metrics.incr(f"{prefix}.checkout_timeouts")
+            raise
+        finally:
+            metrics.observe(f"{prefix}.checkout_seconds", time.monotonic() - start)
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class InstrumentedNullPool(_TimedCheckoutMixin, NullPool):
+    pass
+
+
+def instrument_pool(engine: Engine, name: str) -> None:
+    """
+    Publishes connection pool occupancy for `engine` under `db.pool.<name>`:
+    an `in_use` gauge, the occupancy seen by each checkout (its max is the
+    peak), and how long each connection was held before being returned.
+    """
+    prefix = f"db.pool.{name}"
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.monotonic()
+        metrics.incr(f"{prefix}.checkouts")
+        metrics.add_gauge(f"{prefix}.in_use", 1)
+        # NullPool keeps no count of its connections
+        if isinstance(engine.pool, QueuePool):
+            metrics.observe(
+                f"{prefix}.in_use_at_checkout", engine.pool.checkedout()
+            )
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is None:
+            return
+        metrics.add_gauge(f"{prefix}.in_use", -1)
+        metrics.observe(
+            f"{prefix}.hold_seconds", time.monotonic() - checked_out_at
+        )
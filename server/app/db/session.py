@@ -1,14 +1,56 @@
-from sqlalchemy import create_engine
+from typing import Any, Dict
+from uuid import uuid4
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.sql import functions
 from app.core.config import get_settings  # Import settings
+from app.db.pool_metrics import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedNullPool,
+    InstrumentedQueuePool,
+    instrument_pool,
+)
 
 # Get the application settings, which includes DATABASE_URL
 settings = get_settings()
 
+
+def get_engine_options(name: str, is_async: bool = False) -> Dict[str, Any]:
+    """
+    Builds the pool configuration for an engine from the DB_* settings.
+    `name` labels the pool's metrics (`db.pool.<name>.*`).
+    """
+    options: Dict[str, Any] = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_logging_name": name,
+    }
+    if settings.DB_NULL_POOL:
+        options["poolclass"] = InstrumentedNullPool
+    else:
+        options["poolclass"] = (
+            InstrumentedAsyncAdaptedQueuePool if is_async else InstrumentedQueuePool
+        )
+        options["pool_size"] = settings.DB_POOL_SIZE
+        options["max_overflow"] = settings.DB_MAX_OVERFLOW
+        options["pool_timeout"] = settings.DB_POOL_TIMEOUT_SECONDS
+    if is_async and settings.DB_PGBOUNCER_TRANSACTION_MODE:
+        # asyncpg prepares every statement server-side and caches it per
+        # connection; under transaction pooling the next transaction may run on
+        # another server connection. psycopg2 (sync) never prepares statements.
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return options
+
+
 # Create the SQLAlchemy engine
-# The pool_pre_ping=True option ensures that connections are still alive before being used.
-# This helps prevent issues with stale connections in the pool.
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+engine = create_engine(settings.DATABASE_URL, **get_engine_options("sync"))
 
 # Create a SessionLocal class
 # This will be the actual database session that you use in your code.
@@ -16,6 +58,83 @@ engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
 # where you want to explicitly commit changes.
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine for read-only endpoints (see `deps.get_read_db`): the read replica, or
+# the primary engine itself when DATABASE_REPLICA_URL is not set
+replica_engine = (
+    create_engine(settings.DATABASE_REPLICA_URL, **get_engine_options("replica"))
+    if settings.DATABASE_REPLICA_URL
+    else engine
+)
+ReplicaSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=replica_engine
+)
+
+
+def get_async_database_url(database_url: str) -> URL:
+    """
+    Maps the sync DATABASE_URL onto the matching asyncio driver, so both engines
+    are configured from the same setting.
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+        if settings.DB_PGBOUNCER_TRANSACTION_MODE:
+            url = url.update_query_dict({"prepared_statement_cache_size": "0"})
+        return url
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    return url
+
+
+# Async engine and session factory for `async def` endpoints, so database
+# round-trips never block the event loop.
+# `expire_on_commit=False` keeps loaded attributes usable after a commit, since
+# async sessions cannot lazily reload them.
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    **get_engine_options("async", is_async=True),
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+@compiles(functions.now, "sqlite")
+def _sqlite_now(element: Any, compiler: Any, **kw: Any) -> str:
+    """
+    Renders NOW() on SQLite in the "YYYY-MM-DD HH:MM:SS.ffffff" format that
+    SQLAlchemy stores bound datetimes in. SQLite keeps datetimes as text, and
+    CURRENT_TIMESTAMP's "YYYY-MM-DD HH:MM:SS" doesn't compare correctly with
+    it, which breaks keyset pagination over same-second rows.
+    """
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
+def enforce_foreign_keys(engine: Engine) -> None:
+    """
+    Turns on foreign key enforcement, and so ON DELETE CASCADE, for SQLite,
+    which only enforces them when asked to on each connection.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+for _engine in {engine, async_engine.sync_engine, replica_engine}:
+    enforce_foreign_keys(_engine)
+
+# Pool occupancy metrics for each engine (see GET /metrics)
+instrument_pool(engine, "sync")
+instrument_pool(async_engine.sync_engine, "async")
+if replica_engine is not engine:
+    instrument_pool(replica_engine, "replica")
+
 # Base class for your ORM models
 # All your SQLAlchemy models will inherit from this Base.
 Base = declarative_base()
@@ -32,3 +151,13 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependency to get an async database session
+async def get_async_db():
+    """
+    Dependency function to provide an async database session for `async def`
+    endpoints. The session is closed after the request.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
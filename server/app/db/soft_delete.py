@@ -0,0 +1,34 @@
+from typing import Set, Type
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session, with_loader_criteria
+
+# Models whose rows are hidden from ORM queries once `deleted_at` is set
+_soft_deleted_models: Set[Type] = set()
+
+
+def soft_delete(model: Type) -> None:
+    """
+    Hides rows of `model` with a non-null `deleted_at` from every ORM SELECT,
+    including joins and the relationship loads of objects it returns, so a
+    deleted project or chat disappears at once while the purge worker removes
+    its rows in the background. Refreshes of already-loaded objects still see
+    the row. Pass `execution_options(include_deleted=True)` to see them all.
+    """
+    _soft_deleted_models.add(model)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _exclude_deleted(state: ORMExecuteState) -> None:
+    if (
+        state.is_select
+        and not state.is_column_load
+        and not state.is_relationship_load
+        and not state.execution_options.get("include_deleted", False)
+    ):
+        for model in _soft_deleted_models:
+            state.statement = state.statement.options(
+                with_loader_criteria(
+                    model, lambda cls: cls.deleted_at.is_(None), include_aliases=True
+                )
+            )
@@ -0,0 +1,7 @@
+from .llm_exceptions import (
+    LLMServiceError,
+    LLMUnavailableError,
+    LLMOverloadedError,
+    LLMDeadlineExceededError,
+)
+from .auth_exceptions import PasswordHashingOverloadedError
@@ -0,0 +1,4 @@
+class PasswordHashingOverloadedError(Exception):
+    """
+    Raised when the password hashing pool's queue is full.
+    """
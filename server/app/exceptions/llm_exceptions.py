@@ -0,0 +1,23 @@
+class LLMServiceError(Exception):
+    """
+    Base class for failures raised by the LLM service layer.
+    """
+
+
+class LLMUnavailableError(LLMServiceError):
+    """
+    Raised without calling the provider because it is currently considered
+    unhealthy (the circuit breaker is open).
+    """
+
+
+class LLMOverloadedError(LLMServiceError):
+    """
+    Raised when an LLM request cannot get a concurrency slot in time.
+    """
+
+
+class LLMDeadlineExceededError(LLMServiceError):
+    """
+    Raised when an LLM request, including its retries, exceeds its total deadline.
+    """
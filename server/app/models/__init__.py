@@ -7,3 +7,5 @@ from .user import User
 from .project import Project
 from .chat import Chat
 from .message import Message
+from .message_archive import MessageArchive
+from .llm_response_cache import LLMResponseCacheEntry
@@ -1,18 +1,57 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
-from typing import List
+from sqlalchemy import Column, Index, Integer, String, ForeignKey, DateTime
+from typing import List, Optional
 from sqlalchemy.orm import relationship, Mapped
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from app.db.base import Base
+from app.db.full_text_search import index_column
+from app.db.soft_delete import soft_delete
+
+# Characters of the newest message kept on the chat for listings
+PREVIEW_LENGTH = 200
 
 
 class Chat(Base):
     __tablename__ = "chats"
+    __table_args__ = (
+        # Keyset pagination of a project's chats
+        Index("ix_chats_project_id_created_at_id", "project_id", "created_at", "id"),
+        # A project's chats, most recently active first
+        Index(
+            "ix_chats_project_id_last_activity_at_id",
+            "project_id",
+            "last_activity_at",
+            "id",
+        ),
+        # Deleted chats awaiting the purge worker
+        Index(
+            "ix_chats_deleted_at",
+            "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+            sqlite_where=text("deleted_at IS NOT NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True, nullable=False)
-    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    project_id = Column(
+        Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False
+    )
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Activity stats, updated in the same transaction as every message insert
+    # (see CRUDChat), so listings never aggregate over messages
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    token_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_message_at = Column(DateTime(timezone=True), nullable=True)
+    last_message_preview = Column(String(PREVIEW_LENGTH), nullable=True)
+    # Sort key for activity listings: last message, or creation if none yet
+    last_activity_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    # Set while the messages' contents are in cold storage (MessageArchive)
+    archived_at = Column(DateTime(timezone=True), nullable=True)
+    # Soft delete: hidden from queries at once, purged in the background
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
 
     # Relationships
     project: Mapped["Project"] = relationship("Project", back_populates="chats")  # type: ignore
@@ -20,5 +59,20 @@ class Chat(Base):
         "Message",
         back_populates="chat",
         cascade="all, delete-orphan",
-        order_by="Message.created_at",
+        # Deleted by the database (ON DELETE CASCADE), not loaded to be deleted
+        passive_deletes=True,
+        # Messages written in one transaction share created_at; id keeps order
+        order_by="[Message.created_at, Message.id]",
     )
+    archive: Mapped[Optional["MessageArchive"]] = relationship(  # type: ignore
+        "MessageArchive",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        uselist=False,
+    )
+
+
+# Searchable through GET /search; title matches rank above message matches
+index_column(Chat.__table__, "title", weight="A")
+
+soft_delete(Chat)
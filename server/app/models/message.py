@@ -1,19 +1,42 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime
-from sqlalchemy.orm import relationship, Mapped
+from sqlalchemy import (
+    Column,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    ForeignKey,
+    Text,
+    DateTime,
+)
+from sqlalchemy.orm import deferred, relationship, Mapped
 from sqlalchemy.sql import func
 
 from app.db.base import Base
+from app.db.full_text_search import index_column
 
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # A chat's history in order, and keyset pagination over it
+        Index("ix_messages_chat_id_created_at_id", "chat_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    chat_id = Column(Integer, ForeignKey("chats.id"), index=True)
+    chat_id = Column(Integer, ForeignKey("chats.id", ondelete="CASCADE"))
     role = Column(String, nullable=False)
-    content = Column(Text, nullable=False)
+    # NULL while the chat is archived; the content is in its MessageArchive
+    content = Column(Text, nullable=True)
+    token_count = Column(Integer, nullable=True)  # Estimated once at insert time
+    # float32 vector (app.services.embeddings) for retrieval-augmented history;
+    # only loaded when asked for
+    embedding = deferred(Column(LargeBinary, nullable=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
     chat: Mapped["Chat"] = relationship("Chat", back_populates="messages")  # type: ignore
+
+
+# Searchable through GET /search
+index_column(Message.__table__, "content")
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, LargeBinary, String
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class MessageArchive(Base):
+    """
+    Cold storage for the contents of an inactive chat's messages: one
+    compressed segment per chat, written by the archival job (see
+    `app.crud.archive`). The messages keep their rows, with content NULL.
+    """
+
+    __tablename__ = "message_archives"
+
+    chat_id = Column(
+        Integer, ForeignKey("chats.id", ondelete="CASCADE"), primary_key=True
+    )
+    codec = Column(String(16), nullable=False)  # app.services.compression
+    # JSON list of [message id, content] pairs, compressed with `codec`
+    data = Column(LargeBinary, nullable=False)
+    message_count = Column(Integer, nullable=False)
+    raw_bytes = Column(Integer, nullable=False)  # UTF-8 size of the contents
+    stored_bytes = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
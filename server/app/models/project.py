@@ -1,20 +1,52 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Boolean, Column, Index, Integer, String, Text, ForeignKey, DateTime
 from typing import List
 from sqlalchemy.orm import relationship, Mapped
-from sqlalchemy.sql import func
+from sqlalchemy.sql import false, func, text
 from app.db.base import Base
+from app.db.soft_delete import soft_delete
 
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        # Keyset pagination of a user's projects
+        Index("ix_projects_owner_id_created_at_id", "owner_id", "created_at", "id"),
+        # A user's projects, most recently active first
+        Index(
+            "ix_projects_owner_id_last_activity_at_id",
+            "owner_id",
+            "last_activity_at",
+            "id",
+        ),
+        # Deleted projects awaiting the purge worker
+        Index(
+            "ix_projects_deleted_at",
+            "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+            sqlite_where=text("deleted_at IS NOT NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
     description = Column(Text, nullable=True)
     base_instructions = Column(Text, nullable=False)
+    context_token_budget = Column(Integer, nullable=True)  # None uses the default
+    response_cache_enabled = Column(
+        Boolean, nullable=False, default=False, server_default=false()
+    )
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Rollups of the chats' activity stats, maintained alongside them
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    token_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_message_at = Column(DateTime(timezone=True), nullable=True)
+    last_activity_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    # Soft delete: hidden from queries at once, purged in the background
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
 
     # Relationships
     owner: Mapped["User"] = relationship("User", back_populates="projects")  # type: ignore
@@ -22,5 +54,10 @@ class Project(Base):
         "Chat",
         back_populates="project",
         cascade="all, delete-orphan",
+        # Deleted by the database (ON DELETE CASCADE), not loaded to be deleted
+        passive_deletes=True,
         order_by="Chat.created_at",
     )
+
+
+soft_delete(Project)
@@ -1,6 +1,22 @@
 from .user import User, UserCreate, UserUpdate, UserInDBBase
-from .project import Project, ProjectCreate, ProjectUpdate
-from .chat import Chat, ChatCreate, ChatUpdate
+from .project import (
+    Project,
+    ProjectBatchUpdate,
+    ProjectCreate,
+    ProjectSummary,
+    ProjectUpdate,
+    ProjectUpsert,
+)
+from .chat import (
+    Chat,
+    ChatBatchUpdate,
+    ChatCreate,
+    ChatSummary,
+    ChatUpdate,
+    ChatUpsert,
+)
 from .token import TokenPayload
-from .message import Message, MessageCreate, MessageUpdate
+from .message import Message, MessageCreate, MessagePage, MessageUpdate
 from .user_message_request import UserMessageRequest
+from .page import Page
+from .search import SearchHit
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
@@ -17,17 +17,42 @@ class ChatUpdate(ChatBase):
     title: Optional[str] = None
 
 
+class ChatBatchUpdate(ChatUpdate):
+    id: int
+
+
+class ChatUpsert(ChatCreate):
+    id: Optional[int] = Field(
+        None, description="The chat to replace; omit to create a new one."
+    )
+
+
 class ChatInDBBase(ChatBase):
     id: int
     title: str
     project_id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
+    # Activity stats
+    message_count: int = 0
+    token_count: int = 0
+    last_message_at: Optional[datetime] = None
+    last_message_preview: Optional[str] = None
+    last_activity_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
 
+class ChatSummary(ChatInDBBase):
+    """
+    A chat without its message history; page through that with
+    `GET /chats/{chat_id}/messages`.
+    """
+
+    pass
+
+
 class Chat(ChatInDBBase):
     messages: List[Message] = []
 
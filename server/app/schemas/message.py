@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -29,6 +29,7 @@ class MessageUpdate(MessageBase):
 class MessageInDBBase(MessageBase):
     id: int
     chat_id: int
+    token_count: Optional[int] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -42,3 +43,15 @@ class Message(MessageInDBBase):
 
 class MessageInDB(MessageInDBBase):
     pass
+
+
+class MessagePage(BaseModel):
+    items: List[Message] = Field(..., description="Messages, oldest first.")
+    prev_cursor: Optional[str] = Field(
+        None,
+        description="Pass as `before` to load older messages; null when there are none.",
+    )
+    next_cursor: Optional[str] = Field(
+        None,
+        description="Pass as `after` to load newer messages; null when there were none.",
+    )
@@ -1,14 +1,20 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
-from app.schemas.chat import Chat
+from app.schemas.chat import ChatSummary
 
 
 class ProjectBase(BaseModel):
     name: str
     description: Optional[str] = None
     base_instructions: str
+    context_token_budget: Optional[int] = Field(
+        None, gt=0, description="Prompt token budget for chats in this project."
+    )
+    response_cache_enabled: bool = Field(
+        False, description="Serve identical prompts from the LLM response cache."
+    )
 
 
 class ProjectCreate(ProjectBase):
@@ -18,6 +24,17 @@ class ProjectCreate(ProjectBase):
 class ProjectUpdate(ProjectBase):
     name: Optional[str] = None
     base_instructions: Optional[str] = None
+    response_cache_enabled: Optional[bool] = None
+
+
+class ProjectBatchUpdate(ProjectUpdate):
+    id: int
+
+
+class ProjectUpsert(ProjectCreate):
+    id: Optional[int] = Field(
+        None, description="The project to replace; omit to create a new one."
+    )
 
 
 class ProjectInDBBase(ProjectBase):
@@ -25,10 +42,24 @@ class ProjectInDBBase(ProjectBase):
     owner_id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
+    # Rollups of the chats' activity stats
+    message_count: int = 0
+    token_count: int = 0
+    last_message_at: Optional[datetime] = None
+    last_activity_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True  # Changed from orm_mode = True for Pydantic v2
 
 
+class ProjectSummary(ProjectInDBBase):
+    """
+    A project without its chats; list those with
+    `GET /chats/?project_id={project_id}`.
+    """
+
+    pass
+
+
 class Project(ProjectInDBBase):
-    chats: List[Chat] = []
+    chats: List[ChatSummary] = []
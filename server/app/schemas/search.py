@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class SearchHit(BaseModel):
+    kind: Literal["message", "chat"] = Field(
+        ..., description="Whether a message's content or a chat's title matched."
+    )
+    chat_id: int
+    chat_title: str
+    project_id: int
+    message_id: Optional[int] = Field(None, description="Null for chat matches.")
+    role: Optional[str] = Field(None, description="Null for chat matches.")
+    snippet: str = Field(
+        ...,
+        description="The matching text, HTML-escaped, with matched terms "
+        "wrapped in <b></b>.",
+    )
+    rank: float = Field(..., description="Relevance; higher is better.")
+    created_at: datetime
@@ -0,0 +1,36 @@
+import zlib
+from typing import Callable, Dict, Tuple
+
+import zstandard
+
+# Levels for cold data: written once by the archival job, read rarely
+ZSTD_LEVEL = 19
+ZLIB_LEVEL = 9
+
+CODECS: Dict[str, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    "zstd": (
+        lambda data: zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    ),
+    "zlib": (
+        lambda data: zlib.compress(data, ZLIB_LEVEL),
+        zlib.decompress,
+    ),
+}
+
+
+def _codec(name: str) -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown codec '{name}'. Expected one of: {', '.join(CODECS)}."
+        )
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    return _codec(codec)[0](data)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    return _codec(codec)[1](data)
@@ -0,0 +1,71 @@
+import logging
+from typing import List, Optional, Sequence
+
+from app.core.config import settings
+from app.models import Message
+from app.services.token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class ContextWindowManager:
+    """
+    Selects which historical messages are sent to the LLM under a token budget.
+
+    The base instructions and the new user message are always kept; the
+    remaining budget is filled with the newest history messages, so the prompt
+    size stays bounded no matter how long the chat grows.
+    """
+
+    def __init__(self, default_budget: Optional[int] = None):
+        self.default_budget = default_budget or settings.LLM_CONTEXT_TOKEN_BUDGET
+
+    def select_history(
+        self,
+        history_messages: Sequence[Message],
+        base_instructions: Optional[str],
+        new_user_message_content: str,
+        budget: Optional[int] = None,
+    ) -> List[Message]:
+        """
+        Returns the newest messages that fit in the budget, in chronological order.
+
+        Args:
+            history_messages: Historical messages ordered oldest first.
+            base_instructions: The project's base instructions, always kept.
+            new_user_message_content: The current user message, always kept.
+            budget: Total prompt token budget; falls back to the default budget.
+
+        Returns:
+            The selected messages, oldest first.
+        """
+        budget = budget or self.default_budget
+        remaining = budget - count_tokens(new_user_message_content)
+        if base_instructions:
+            remaining -= count_tokens(base_instructions)
+
+        selected: List[Message] = []
+        for msg in reversed(history_messages):
+            # token_count is stored at insert time; rows written before it
+            # existed are estimated on the fly.
+            tokens = (
+                msg.token_count
+                if msg.token_count is not None
+                else count_tokens(msg.content)
+            )
+            if tokens > remaining:
+                break
+            remaining -= tokens
+            selected.append(msg)
+        selected.reverse()
+
+        # Don't open the window on a dangling assistant reply whose question was cut.
+        while selected and selected[0].role == "assistant":
+            selected.pop(0)
+
+        if len(selected) < len(history_messages):
+            logger.info(
+                f"Context window trimmed history from {len(history_messages)} to "
+                f"{len(selected)} messages (budget {budget} tokens)."
+            )
+        return selected
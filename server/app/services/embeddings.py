@@ -0,0 +1,103 @@
+import hashlib
+import math
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Type
+
+import numpy as np
+
+from app.core.config import settings
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class Embedder(ABC):
+    """
+    Turns texts into fixed-size, L2-normalized float32 vectors, so the cosine
+    similarity of two texts is the dot product of their embeddings.
+    """
+
+    name: str
+    dim: int
+
+    @abstractmethod
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Returns a (len(texts), dim) float32 array, one unit-length row per text
+        (all zeros for a text without tokens).
+        """
+
+    def embed_one(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+
+class HashingEmbedder(Embedder):
+    """
+    Local, dependency-free embedder: word unigrams and bigrams are hashed into
+    `dim` signed buckets (the "hashing trick") and weighted by sublinear term
+    frequency. It captures lexical overlap rather than meaning, which is enough
+    to find the older messages that talk about the same things, and needs no
+    model, network or fitted vocabulary.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _features(self, text: str) -> Counter:
+        words = _TOKEN_RE.findall(text.lower())
+        return Counter(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+
+    def _bucket(self, feature: str) -> tuple:
+        # A stable hash (unlike hash(), which is salted per process), so stored
+        # embeddings stay comparable across restarts and workers
+        digest = int.from_bytes(
+            hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little"
+        )
+        return digest % self.dim, 1.0 if digest >> 63 else -1.0
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, count in self._features(text or "").items():
+                bucket, sign = self._bucket(feature)
+                vectors[row, bucket] += sign * (1.0 + math.log(count))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+EMBEDDERS: Dict[str, Type[Embedder]] = {
+    HashingEmbedder.name: HashingEmbedder,
+}
+
+
+@lru_cache()
+def get_embedder(name: Optional[str] = None) -> Embedder:
+    """
+    Returns the embedder selected by `name` or the EMBEDDER setting.
+    """
+    name = name or settings.EMBEDDER
+    try:
+        return EMBEDDERS[name](dim=settings.EMBEDDING_DIM)
+    except KeyError:
+        raise ValueError(
+            f"Unknown EMBEDDER '{name}'. Expected one of: {', '.join(EMBEDDERS)}."
+        )
+
+
+def to_bytes(vector: np.ndarray) -> bytes:
+    """
+    Serializes an embedding compactly for storage: raw little-endian float32.
+    """
+    return np.asarray(vector, dtype="<f4").tobytes()
+
+
+def from_bytes(data: bytes) -> np.ndarray:
+    """
+    Deserializes an embedding stored by `to_bytes` (without copying).
+    """
+    return np.frombuffer(data, dtype="<f4")
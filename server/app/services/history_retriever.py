@@ -0,0 +1,135 @@
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+from cachetools import LRUCache
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.core.config import settings
+from app.models import Chat, Message
+from app.services.embeddings import Embedder, from_bytes, get_embedder, to_bytes
+from app.services.observability_service import metrics
+from app.services.vector_index import VectorIndex
+
+# Rows are fetched again this far below the newest indexed ID, to pick up
+# messages whose transactions committed out of ID order (more than the rows of
+# all transactions that can be committing at once)
+REFRESH_ID_OVERLAP = 256
+
+
+class HistoryRetriever:
+    """
+    Selects the history for an LLM turn: the chat's last `recent_messages`,
+    plus the `top_k` older messages most similar to the new user message,
+    from the same chat or (with scope "project") any chat of its project.
+    This keeps prompts small for very long chats while keeping the context
+    that matters.
+
+    Similarity search runs on an in-memory `VectorIndex` per chat or project,
+    cached per worker and topped up with new rows on each turn, so a turn only
+    reads the embeddings inserted since the last one plus the few messages it
+    selects, not the whole history. Messages stored without an embedding are
+    embedded once and written back. Runs in the turn's load phase, before the
+    LLM call, on the caller's session.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        scope: str,
+        recent_messages: int,
+        top_k: int,
+        max_indexes: int,
+        embedder: Optional[Embedder] = None,
+    ):
+        if scope not in ("chat", "project"):
+            raise ValueError(
+                f"Unknown CONTEXT_RETRIEVAL_SCOPE '{scope}'. Expected 'chat' or 'project'."
+            )
+        self.name = name
+        self.scope = scope
+        self.recent_messages = recent_messages
+        self.top_k = top_k
+        self.embedder = embedder or get_embedder()
+        self._indexes: LRUCache = LRUCache(maxsize=max_indexes)
+
+    @classmethod
+    def from_settings(cls, name: str = "context.retriever") -> "HistoryRetriever":
+        return cls(
+            name,
+            scope=settings.CONTEXT_RETRIEVAL_SCOPE,
+            recent_messages=settings.CONTEXT_RECENT_MESSAGES,
+            top_k=settings.CONTEXT_RETRIEVAL_TOP_K,
+            max_indexes=settings.CONTEXT_RETRIEVAL_MAX_INDEXES,
+        )
+
+    async def aselect_history(
+        self, db: AsyncSession, chat: Chat, new_user_message_content: str
+    ) -> List[Message]:
+        """
+        Returns the retrieved older messages followed by the recent ones, each
+        group oldest first. The context window budget is applied afterwards as
+        usual, and drops retrieved messages before recent ones.
+        """
+        recent = await crud.chat.aget_recent_messages(
+            db, chat_id=chat.id, limit=self.recent_messages
+        )
+        index = await self._refreshed_index(db, chat)
+
+        start = time.monotonic()
+        hits = index.search(
+            self.embedder.embed_one(new_user_message_content),
+            self.top_k,
+            exclude={msg.id for msg in recent},
+        )
+        metrics.observe(f"{self.name}.search_seconds", time.monotonic() - start)
+
+        retrieved = await crud.chat.aget_messages_by_ids(
+            db, ids=[id_ for id_, _ in hits]
+        )
+        metrics.observe(f"{self.name}.retrieved", len(retrieved))
+        return retrieved + recent
+
+    async def _refreshed_index(self, db: AsyncSession, chat: Chat) -> VectorIndex:
+        """
+        Returns the cached index for the chat's scope, after adding the rows
+        inserted since it was last refreshed.
+        """
+        scope_id = chat.project_id if self.scope == "project" else chat.id
+        key: Tuple[str, int] = (self.scope, scope_id)
+        index = self._indexes.get(key)
+        if index is None:
+            index = VectorIndex(self.embedder.dim)
+            self._indexes[key] = index
+            metrics.incr(f"{self.name}.index_misses")
+        else:
+            metrics.incr(f"{self.name}.index_hits")
+
+        rows = await crud.chat.aget_embeddings(
+            db,
+            chat_id=chat.id if self.scope == "chat" else None,
+            project_id=scope_id if self.scope == "project" else None,
+            after_id=max(0, index.max_id - REFRESH_ID_OVERLAP),
+            dim=self.embedder.dim,
+        )
+        rows = [row for row in rows if row[0] not in index]
+        stored = [(id_, data) for id_, data, content in rows if content is None]
+        # Rows written before retrieval was enabled (or by another embedder)
+        missing = [(id_, content) for id_, _, content in rows if content is not None]
+        if stored:
+            index.add(
+                [id_ for id_, _ in stored],
+                np.stack([from_bytes(data) for _, data in stored]),
+            )
+        if missing:
+            ids = [id_ for id_, _ in missing]
+            vectors = self.embedder.embed([content for _, content in missing])
+            index.add(ids, vectors)
+            # So other workers, and this one after an eviction, don't redo it
+            await crud.chat.asave_embeddings(
+                db, embeddings=list(zip(ids, map(to_bytes, vectors)))
+            )
+        metrics.incr(f"{self.name}.rows_loaded", len(rows))
+        metrics.incr(f"{self.name}.rows_embedded", len(missing))
+        return index
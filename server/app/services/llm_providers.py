@@ -0,0 +1,238 @@
+import asyncio
+import hashlib
+import logging
+import math
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Type
+
+from google.api_core import exceptions as google_exceptions
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_google_genai import ChatGoogleGenerativeAI
+from pydantic import PrivateAttr
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMProvider(ABC):
+    """
+    Creates and manages the lifecycle of chat models for one LLM backend.
+    """
+
+    name: str
+
+    @abstractmethod
+    def create_chat_model(self, model: str) -> BaseChatModel:
+        """
+        Returns a LangChain chat model for `model`.
+        """
+
+    async def warmup(self, llm: BaseChatModel, timeout: float) -> None:
+        """
+        Prepares connections ahead of the first request. No-op by default.
+        """
+
+    async def aclose(self, llm: BaseChatModel) -> None:
+        """
+        Releases the model's transports. No-op by default.
+        """
+
+
+class GeminiProvider(LLMProvider):
+    """
+    Google Gemini via `langchain_google_genai`.
+    """
+
+    name = "gemini"
+
+    def create_chat_model(self, model: str) -> BaseChatModel:
+        if not settings.GEMINI_API_KEY:
+            raise ValueError("GEMINI_API_KEY environment variable not set.")
+        return ChatGoogleGenerativeAI(
+            model=model,
+            temperature=settings.LLM_TEMPERATURE,
+            google_api_key=settings.GEMINI_API_KEY,
+        )
+
+    async def warmup(self, llm: ChatGoogleGenerativeAI, timeout: float) -> None:
+        # The async client is created lazily on first access inside a running loop.
+        async_client = llm.async_client
+        channel = getattr(async_client.transport, "grpc_channel", None)
+        if channel is not None:
+            await asyncio.wait_for(channel.channel_ready(), timeout=timeout)
+
+    async def aclose(self, llm: ChatGoogleGenerativeAI) -> None:
+        async_client = llm.async_client_running
+        if async_client is not None:
+            await async_client.transport.close()
+        llm.client.transport.close()
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic local chat model for load tests and offline development.
+
+    The reply is derived from a hash of the prompt, so identical prompts get
+    identical replies. Time to first token is drawn from the configured latency
+    distribution and tokens are then emitted at `tokens_per_second`. A
+    `failure_rate` fraction of calls fail with a retryable 503, like the real
+    provider during an outage.
+    """
+
+    latency_distribution: str = "lognormal"  # "fixed", "uniform" or "lognormal"
+    latency_ms: float = 300.0  # Median time to first token
+    latency_spread: float = 0.5  # Lognormal sigma, or +/- fraction for uniform
+    tokens_per_second: float = 50.0
+    response_tokens: int = 64
+    failure_rate: float = 0.0
+    seed: int = 0
+
+    _rng: random.Random = PrivateAttr()
+
+    _VOCABULARY = (
+        "the project chat answer context model token stream latency request "
+        "response user assistant message history budget cache provider queue"
+    ).split()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "keryx-fake"
+
+    def _first_token_delay(self) -> float:
+        if self.latency_distribution == "fixed":
+            delay_ms = self.latency_ms
+        elif self.latency_distribution == "uniform":
+            delay_ms = self.latency_ms * self._rng.uniform(
+                1 - self.latency_spread, 1 + self.latency_spread
+            )
+        elif self.latency_distribution == "lognormal":
+            delay_ms = self._rng.lognormvariate(
+                math.log(self.latency_ms), self.latency_spread
+            )
+        else:
+            raise ValueError(
+                f"Unknown fake LLM latency distribution: {self.latency_distribution}"
+            )
+        return max(0.0, delay_ms) / 1000
+
+    def _maybe_fail(self) -> None:
+        if self.failure_rate and self._rng.random() < self.failure_rate:
+            raise google_exceptions.ServiceUnavailable("Injected fake LLM failure")
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        prompt = "\x1e".join(f"{m.type}:{m.content}" for m in messages)
+        digest = hashlib.sha256(f"{self.seed}:{prompt}".encode("utf-8")).digest()
+        rng = random.Random(digest)
+        return [f"{rng.choice(self._VOCABULARY)} " for _ in range(self.response_tokens)]
+
+    def _token_delay(self) -> float:
+        return 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self._maybe_fail()
+        tokens = self._tokens(messages)
+        time.sleep(self._first_token_delay() + len(tokens) * self._token_delay())
+        message = AIMessage(content="".join(tokens).rstrip())
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self._maybe_fail()
+        tokens = self._tokens(messages)
+        await asyncio.sleep(
+            self._first_token_delay() + len(tokens) * self._token_delay()
+        )
+        message = AIMessage(content="".join(tokens).rstrip())
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        self._maybe_fail()
+        time.sleep(self._first_token_delay())
+        for i, token in enumerate(self._tokens(messages)):
+            if i:
+                time.sleep(self._token_delay())
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        self._maybe_fail()
+        await asyncio.sleep(self._first_token_delay())
+        for i, token in enumerate(self._tokens(messages)):
+            if i:
+                await asyncio.sleep(self._token_delay())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+class FakeProvider(LLMProvider):
+    """
+    Local provider backed by `FakeChatModel`, configured via FAKE_LLM_* settings.
+    """
+
+    name = "fake"
+
+    def create_chat_model(self, model: str) -> BaseChatModel:
+        return FakeChatModel(
+            latency_distribution=settings.FAKE_LLM_LATENCY_DISTRIBUTION,
+            latency_ms=settings.FAKE_LLM_LATENCY_MS,
+            latency_spread=settings.FAKE_LLM_LATENCY_SPREAD,
+            tokens_per_second=settings.FAKE_LLM_TOKENS_PER_SECOND,
+            response_tokens=settings.FAKE_LLM_RESPONSE_TOKENS,
+            failure_rate=settings.FAKE_LLM_FAILURE_RATE,
+            seed=settings.FAKE_LLM_SEED,
+        )
+
+
+PROVIDERS: Dict[str, Type[LLMProvider]] = {
+    GeminiProvider.name: GeminiProvider,
+    FakeProvider.name: FakeProvider,
+}
+
+
+def get_provider(name: Optional[str] = None) -> LLMProvider:
+    """
+    Returns the provider selected by `name` or the LLM_PROVIDER setting.
+    """
+    name = name or settings.LLM_PROVIDER
+    try:
+        return PROVIDERS[name]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown LLM_PROVIDER '{name}'. Expected one of: {', '.join(PROVIDERS)}."
+        )
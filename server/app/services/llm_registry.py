@@ -0,0 +1,64 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.services.llm_providers import get_provider
+from app.services.llm_scheduler import LLMScheduler
+from app.services.llm_service import LLMService
+from app.services.response_cache import build_response_cache
+
+logger = logging.getLogger(__name__)
+
+
+class LLMRegistry:
+    """
+    Application-scoped registry of LLMService instances, keyed by model name.
+
+    A single instance is created in the FastAPI lifespan hook and stored on
+    `app.state`, so every request reuses the same client and its open gRPC
+    channel instead of constructing a new one per chat turn.
+    """
+
+    def __init__(self):
+        self._services: Dict[str, LLMService] = {}
+        self.provider = get_provider()
+        # One cache for all models; the model name is part of the cache key.
+        self.response_cache = build_response_cache()
+        # The concurrency cap is for the provider account, so it spans all models.
+        self.scheduler = LLMScheduler.from_settings()
+
+    def get(self, model: Optional[str] = None) -> LLMService:
+        """
+        Returns the shared LLMService for `model`, creating it on first use.
+        """
+        model = model or settings.LLM_MODEL
+        service = self._services.get(model)
+        if service is None:
+            service = LLMService(
+                model=model,
+                response_cache=self.response_cache,
+                scheduler=self.scheduler,
+                provider=self.provider,
+            )
+            self._services[model] = service
+        return service
+
+    async def warmup(self) -> None:
+        """
+        Creates the default service and opens its connection ahead of traffic.
+        """
+        self.get()
+        await asyncio.gather(*(s.warmup() for s in self._services.values()))
+
+    async def aclose(self) -> None:
+        """
+        Closes every registered service. Errors are logged so one failing
+        transport does not prevent the others from shutting down.
+        """
+        for model, service in self._services.items():
+            try:
+                await service.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close LLMService for model {model}: {e}")
+        self._services.clear()
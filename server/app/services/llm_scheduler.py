@@ -0,0 +1,162 @@
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Hashable
+
+from app.core.config import settings
+from app.exceptions import LLMOverloadedError
+from app.services.observability_service import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class _Waiter:
+    __slots__ = ("future", "weight")
+
+    def __init__(self, future: asyncio.Future, weight: int):
+        self.future = future
+        self.weight = weight
+
+
+class LLMScheduler:
+    """
+    Caps concurrent outbound LLM calls and shares the capacity fairly.
+
+    At most `max_concurrency` calls run at once across all users. Callers
+    beyond that wait in per-user queues that are served by weighted round
+    robin, so one user's burst cannot starve the others. A user may have at
+    most `max_queued_per_user` calls waiting, and no call waits longer than
+    `queue_timeout` seconds; both limits fail fast with LLMOverloadedError.
+
+    All state is touched only from the event loop, so no locking is needed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        queue_timeout: float,
+        max_queued_per_user: int,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.max_queued_per_user = max_queued_per_user
+        self._active = 0
+        self._queued = 0
+        # Round-robin ring: users with waiting calls, in service order
+        self._queues: "OrderedDict[Hashable, Deque[_Waiter]]" = OrderedDict()
+        self._credits: Dict[Hashable, int] = {}
+
+    @classmethod
+    def from_settings(cls, name: str = "llm.scheduler") -> "LLMScheduler":
+        return cls(
+            name=name,
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+            max_queued_per_user=settings.LLM_MAX_QUEUED_PER_USER,
+        )
+
+    @asynccontextmanager
+    async def slot(self, user_id: Hashable, weight: int = 1) -> AsyncIterator[None]:
+        """
+        Holds one concurrency slot for `user_id` for the duration of the block.
+
+        Args:
+            user_id: The key calls are queued and shared by.
+            weight: Calls served for this user per round-robin turn.
+
+        Raises:
+            LLMOverloadedError: If the user's queue is full or the wait times out.
+        """
+        await self._acquire(user_id, weight)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, user_id: Hashable, weight: int) -> None:
+        if self._active < self.max_concurrency and not self._queued:
+            self._active += 1
+            self._update_gauges()
+            metrics.observe(f"{self.name}.wait_seconds", 0.0)
+            return
+
+        queue = self._queues.get(user_id)
+        if queue is not None and len(queue) >= self.max_queued_per_user:
+            metrics.incr(f"{self.name}.rejected.queue_full")
+            raise LLMOverloadedError(
+                "Too many pending LLM requests for this user. Please retry shortly."
+            )
+        if queue is None:
+            queue = self._queues[user_id] = deque()
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(loop.create_future(), max(1, weight))
+        queue.append(waiter)
+        self._queued += 1
+        self._update_gauges()
+
+        started = loop.time()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done():
+                # Granted right as we gave up: hand the slot back
+                self._release()
+            else:
+                waiter.future.cancel()
+                self._remove_waiter(user_id, waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            metrics.incr(f"{self.name}.rejected.timeout")
+            raise LLMOverloadedError(
+                "LLM capacity is exhausted. Please retry shortly."
+            ) from e
+        finally:
+            metrics.observe(f"{self.name}.wait_seconds", loop.time() - started)
+
+    def _release(self) -> None:
+        self._active -= 1
+        self._dispatch()
+        self._update_gauges()
+
+    def _dispatch(self) -> None:
+        """
+        Grants free slots to queued callers by weighted round robin.
+        """
+        while self._active < self.max_concurrency and self._queues:
+            user_id, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            self._queued -= 1
+            credits = self._credits.get(user_id, waiter.weight) - 1
+
+            if not queue:
+                del self._queues[user_id]
+                self._credits.pop(user_id, None)
+            elif credits <= 0:
+                # Turn used up: move to the back of the ring
+                self._queues.move_to_end(user_id)
+                self._credits.pop(user_id, None)
+            else:
+                self._credits[user_id] = credits
+
+            if not waiter.future.done():
+                self._active += 1
+                waiter.future.set_result(None)
+
+    def _remove_waiter(self, user_id: Hashable, waiter: _Waiter) -> None:
+        queue = self._queues.get(user_id)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        self._queued -= 1
+        if not queue:
+            del self._queues[user_id]
+            self._credits.pop(user_id, None)
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        metrics.set_gauge(f"{self.name}.active", self._active)
+        metrics.set_gauge(f"{self.name}.queued", self._queued)
@@ -1,21 +1,19 @@
-import os
 import logging
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 
 from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
-from tenacity import (
-    retry,
-    wait_exponential,
-    stop_after_attempt,
-    retry_if_exception_type,
-)
 
+from app.core.config import settings
 from app.models import (
     Chat,
     Message,
     Project,
 )  # SQLAlchemy models
+from app.services.context_manager import ContextWindowManager
+from app.services.llm_providers import LLMProvider, get_provider
+from app.services.llm_scheduler import LLMScheduler
+from app.services.resilience import ResiliencePolicy
+from app.services.response_cache import ResponseCache, make_cache_key
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -25,22 +23,58 @@ logging.basicConfig(
 
 
 class LLMService:
-    def __init__(self):
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        response_cache: Optional[ResponseCache] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        provider: Optional[LLMProvider] = None,
+    ):
         """
-        Initializes the LLMService with a Google Gemini LLM instance.
-        The Google API key is loaded from GEMINI_API_KEY environment variable.
+        Initializes the LLMService with a chat model from the configured provider
+        (Google Gemini by default, see the LLM_PROVIDER setting).
+
+        Constructing the client is comparatively expensive and each instance opens
+        its own connection, so instances are meant to be long-lived and shared
+        through `LLMRegistry` rather than created per request.
+
+        Args:
+            model: The model name; defaults to the LLM_MODEL setting.
+            response_cache: Optional cache consulted for projects that opt in.
+            scheduler: Concurrency scheduler for outbound calls; a private one
+                is created if not given.
+            provider: The LLM backend; defaults to the LLM_PROVIDER setting.
         """
-        GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-        if not GEMINI_API_KEY:
-            raise ValueError("GEMINI_API_KEY environment variable not set.")
+        self.model = model or settings.LLM_MODEL
+        self.provider = provider or get_provider()
+        self.context_manager = ContextWindowManager()
+        self.response_cache = response_cache
+        self.resilience = ResiliencePolicy.from_settings()
+        self.scheduler = scheduler or LLMScheduler.from_settings()
 
-        # Initialize the ChatGoogleGenerativeAI model
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            temperature=0.7,
-            google_api_key=GEMINI_API_KEY,
+        self.llm = self.provider.create_chat_model(self.model)
+        logger.info(
+            f"LLMService initialized with {self.provider.name} model: {self.model}"
         )
-        logger.info("LLMService initialized with Google Gemini model: gemini-2.5-flash")
+
+    async def warmup(self, timeout: float = 5.0) -> None:
+        """
+        Opens the provider connection ahead of the first request so the first chat
+        turn does not pay for channel creation and the TLS handshake.
+        Failures are logged and ignored; the connection is retried lazily on use.
+        """
+        try:
+            await self.provider.warmup(self.llm, timeout)
+            logger.info(f"LLMService warm-up completed for model: {self.model}")
+        except Exception as e:
+            logger.warning(f"LLMService warm-up failed for model {self.model}: {e}")
+
+    async def aclose(self) -> None:
+        """
+        Closes the underlying transports. Called once at application shutdown.
+        """
+        await self.provider.aclose(self.llm)
+        logger.info(f"LLMService closed for model: {self.model}")
 
     def _build_messages(
         self,
@@ -85,60 +119,198 @@ class LLMService:
 
         return messages
 
-    @retry(
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        stop=stop_after_attempt(5),
-        retry=(
-            retry_if_exception_type(Exception)
-        ),  # Consider refining to specific LLM API exceptions
-    )
+    def _prepare_messages(
+        self,
+        new_user_message_content: str,
+        chat: Chat,
+        history: Optional[List[Message]] = None,
+    ) -> List[BaseMessage]:
+        """
+        Validates the chat context and builds the LangChain message list for it,
+        from `history` if given (e.g. from `HistoryRetriever`), otherwise from
+        the chat's full message history.
+
+        Raises:
+            ValueError: If the Chat object or its associated Project is missing base instructions.
+        """
+        if not chat.project or not chat.project.base_instructions:
+            logger.error(
+                f"Chat {chat.id} or its associated Project is missing base_instructions."
+            )
+            raise ValueError("Chat project is missing base instructions.")
+
+        base_instructions = chat.project.base_instructions
+
+        if history is not None:
+            history_messages = history
+        else:
+            # chat.messages should be pre-loaded via SQLAlchemy's joinedload
+            history_messages = chat.messages if chat.messages is not None else []
+        history_messages = self.context_manager.select_history(
+            history_messages,
+            base_instructions=base_instructions,
+            new_user_message_content=new_user_message_content,
+            budget=chat.project.context_token_budget,
+        )
+
+        return self._build_messages(
+            base_instructions=base_instructions,
+            history_messages=history_messages,
+            new_user_message_content=new_user_message_content,
+        )
+
+    def _cache_key(self, chat: Chat, messages: List[BaseMessage]) -> Optional[str]:
+        """
+        Returns the response cache key if the chat's project opted in to caching.
+        """
+        if self.response_cache is None or not chat.project.response_cache_enabled:
+            return None
+        return make_cache_key(self.model, messages)
+
     async def get_llm_response(
         self,
         new_user_message_content: str,
         chat: Chat,  # The Chat object with pre-loaded project and messages
+        history: Optional[List[Message]] = None,
     ) -> str:
         """
         Orchestrates the LLM call, preparing messages and handling the response.
+        Identical prompts are served from the response cache when the chat's
+        project has `response_cache_enabled`.
 
         Args:
             new_user_message_content: The current message from the user.
             chat: The Chat object, which includes its associated Project and historical Messages.
+            history: Messages to use as history instead of `chat.messages`.
 
         Returns:
             The content of the LLM's response.
 
         Raises:
             ValueError: If the Chat object or its associated Project is missing base instructions.
-            Exception: If the LLM call fails after retries.
+            LLMUnavailableError: If the provider's circuit breaker is open.
+            LLMOverloadedError: If no concurrency slot frees up in time.
+            LLMDeadlineExceededError: If the request deadline elapses.
+            Exception: If the LLM call fails permanently or after retries.
         """
-        if not chat.project or not chat.project.base_instructions:
-            logger.error(
-                f"Chat {chat.id} or its associated Project is missing base_instructions."
-            )
-            raise ValueError("Chat project is missing base instructions.")
-
-        base_instructions = chat.project.base_instructions
+        langchain_messages = self._prepare_messages(
+            new_user_message_content, chat, history
+        )
 
-        # chat.messages should be pre-loaded via SQLAlchemy's joinedload
-        history_messages = chat.messages if chat.messages is not None else []
+        cache_key = self._cache_key(chat, langchain_messages)
+        if cache_key is not None:
+            cached = await self.response_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"LLM response for chat {chat.id} served from cache.")
+                return cached
 
-        langchain_messages = self._build_messages(
-            base_instructions=base_instructions,
-            history_messages=history_messages,
-            new_user_message_content=new_user_message_content,
+        llm_response_content = await self._invoke(
+            chat.id, chat.project.owner_id, langchain_messages
         )
+
+        if cache_key is not None:
+            await self.response_cache.set(cache_key, llm_response_content)
+        return llm_response_content
+
+    async def _invoke(
+        self, chat_id: int, user_id: int, langchain_messages: List[BaseMessage]
+    ) -> str:
+        """
+        Sends the prepared messages to the LLM under the resilience policy:
+        transient errors are retried within the request deadline, permanent
+        errors fail immediately and an open circuit fails without a call.
+        Each attempt waits for a scheduler slot in the user's fair queue.
+        """
+
+        async def attempt():
+            async with self.scheduler.slot(user_id):
+                return await self.llm.ainvoke(langchain_messages)
+
         logger.info(
-            f"Initiating LLM call for chat {chat.id} with {len(langchain_messages)} messages."
+            f"Initiating LLM call for chat {chat_id} with {len(langchain_messages)} messages."
         )
 
         try:
-            # Asynchronously invoke the LLM with the prepared messages
-            response = await self.llm.ainvoke(langchain_messages)
-            llm_response_content = response.content
-            logger.info(f"LLM response received for chat {chat.id}.")
-            return llm_response_content
+            response = await self.resilience.call(attempt)
+            logger.info(f"LLM response received for chat {chat_id}.")
+            return response.content
         except Exception as e:
             logger.error(
-                f"Failed to get LLM response for chat {chat.id}: {e}", exc_info=True
+                f"Failed to get LLM response for chat {chat_id}: {e}", exc_info=True
             )
-            raise  # Re-raise to be caught by the retry decorator or calling function
+            raise
+
+    def stream_llm_response(
+        self,
+        new_user_message_content: str,
+        chat: Chat,  # The Chat object with pre-loaded project and messages
+        history: Optional[List[Message]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Streams the LLM's response token by token using the model's `astream`.
+
+        The prompt is built eagerly, so validation errors surface here rather than
+        on first iteration, and the returned iterator no longer touches `chat`.
+        Unlike `get_llm_response`, the stream is not retried: once the first chunk
+        has been sent to the client a retry would duplicate output.
+
+        Args:
+            new_user_message_content: The current message from the user.
+            chat: The Chat object, which includes its associated Project and historical Messages.
+            history: Messages to use as history instead of `chat.messages`.
+
+        Returns:
+            An async iterator of text chunks, yielded as soon as they arrive.
+
+        Raises:
+            ValueError: If the Chat object or its associated Project is missing base instructions.
+        """
+        langchain_messages = self._prepare_messages(
+            new_user_message_content, chat, history
+        )
+        cache_key = self._cache_key(chat, langchain_messages)
+        return self._stream(
+            chat.id, chat.project.owner_id, langchain_messages, cache_key
+        )
+
+    async def _stream(
+        self,
+        chat_id: int,
+        user_id: int,
+        langchain_messages: List[BaseMessage],
+        cache_key: Optional[str],
+    ) -> AsyncIterator[str]:
+        if cache_key is not None:
+            cached = await self.response_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"LLM response for chat {chat_id} served from cache.")
+                yield cached
+                return
+
+        logger.info(
+            f"Initiating streaming LLM call for chat {chat_id} with {len(langchain_messages)} messages."
+        )
+        # Streams are not retried (chunks may already be sent), but they are
+        # still gated by and reported to the circuit breaker. The scheduler
+        # slot is held for the whole stream.
+        chunks: List[str] = []
+        async with self.scheduler.slot(user_id):
+            self.resilience.breaker.before_call()
+            try:
+                async for chunk in self.llm.astream(langchain_messages):
+                    if chunk.content:
+                        chunks.append(chunk.content)
+                        yield chunk.content
+            except Exception as e:
+                self.resilience.breaker.record_failure(e)
+                raise
+            except BaseException:
+                # Client went away; says nothing about provider health
+                self.resilience.breaker.release()
+                raise
+            self.resilience.breaker.record_success()
+        logger.info(f"LLM stream completed for chat {chat_id}.")
+
+        # Only complete streams are cached
+        if cache_key is not None:
+            await self.response_cache.set(cache_key, "".join(chunks))
@@ -0,0 +1,66 @@
+import threading
+from collections import defaultdict
+from typing import Any, Dict
+
+
+class Metrics:
+    """
+    Process-local counters, gauges and timing summaries.
+
+    Sync endpoints run in FastAPI's threadpool, so updates are guarded by a lock.
+    Values are per worker process; aggregate across workers in the scraper.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._gauges: Dict[str, float] = defaultdict(float)
+        self._summaries: Dict[str, Dict[str, float]] = {}
+
+    def incr(self, name: str, value: int = 1) -> None:
+        """
+        Increments a monotonically increasing counter.
+        """
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """
+        Sets a gauge to an absolute value.
+        """
+        with self._lock:
+            self._gauges[name] = value
+
+    def add_gauge(self, name: str, delta: float) -> None:
+        """
+        Moves a gauge up or down by `delta`.
+        """
+        with self._lock:
+            self._gauges[name] += delta
+
+    def observe(self, name: str, value: float) -> None:
+        """
+        Records one sample (e.g. a duration in seconds) into a count/sum/max summary.
+        """
+        with self._lock:
+            summary = self._summaries.setdefault(
+                name, {"count": 0, "sum": 0.0, "max": 0.0}
+            )
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["max"] = max(summary["max"], value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns a point-in-time copy of all metrics.
+        """
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "summaries": {k: dict(v) for k, v in self._summaries.items()},
+            }
+
+
+# Global metrics registry shared by all services
+metrics = Metrics()
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.security import get_password_hash, pwd_context
+from app.exceptions import PasswordHashingOverloadedError
+from app.services.observability_service import metrics
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a dedicated, bounded thread pool.
+
+    Each bcrypt call burns a few hundred milliseconds of CPU. Run inline it
+    would stall the event loop (or tie up FastAPI's shared threadpool), so a
+    login burst would freeze chat streaming. bcrypt releases the GIL while it
+    works, so a thread pool gives real parallelism without the cost of
+    pickling into a process pool. At most `max_workers` hashes run at once;
+    up to `max_queued` more may wait, and anything beyond that fails fast with
+    PasswordHashingOverloadedError.
+
+    Both the async (`a`-prefixed) and the blocking methods go through the same
+    pool and limits, so sync endpoints are bounded too.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queued: int):
+        self.name = name
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hasher"
+        )
+        # Admission control; acquired without blocking, from any thread
+        self._slots = threading.BoundedSemaphore(max_workers + max_queued)
+
+    @classmethod
+    def from_settings(cls, name: str = "auth.password_hasher") -> "PasswordHasher":
+        return cls(
+            name,
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            max_queued=settings.PASSWORD_HASH_MAX_QUEUED,
+        )
+
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        if not self._slots.acquire(blocking=False):
+            metrics.incr(f"{self.name}.rejected")
+            raise PasswordHashingOverloadedError(
+                "Too many password operations in progress. Retry shortly."
+            )
+        metrics.add_gauge(f"{self.name}.pending", 1)
+        submitted_at = time.monotonic()
+
+        def run() -> Any:
+            started_at = time.monotonic()
+            metrics.observe(f"{self.name}.wait_seconds", started_at - submitted_at)
+            try:
+                return fn(*args)
+            finally:
+                metrics.observe(
+                    f"{self.name}.run_seconds", time.monotonic() - started_at
+                )
+
+        def done(_: Future) -> None:
+            self._slots.release()
+            metrics.add_gauge(f"{self.name}.pending", -1)
+
+        future = self._executor.submit(run)
+        future.add_done_callback(done)
+        return future
+
+    def hash(self, password: str) -> str:
+        """
+        Hashes a password with the configured cost, blocking the calling thread.
+        """
+        return self._submit(get_password_hash, password).result()
+
+    async def ahash(self, password: str) -> str:
+        """
+        Hashes a password with the configured cost without blocking the loop.
+        """
+        return await asyncio.wrap_future(self._submit(get_password_hash, password))
+
+    def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Verifies a password, blocking the calling thread.
+
+        Returns:
+            Whether it matched, and a new hash to store if the stored one uses
+            outdated settings (e.g. a different bcrypt cost), else None.
+        """
+        return self._submit(
+            pwd_context.verify_and_update, password, hashed_password
+        ).result()
+
+    async def averify_and_update(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Async variant of `verify_and_update`.
+        """
+        return await asyncio.wrap_future(
+            self._submit(pwd_context.verify_and_update, password, hashed_password)
+        )
+
+
+# Process-wide pool shared by all password operations
+password_hasher = PasswordHasher.from_settings()
@@ -0,0 +1,105 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from cachetools import TTLCache
+
+from app.core.config import settings
+from app.services.observability_service import metrics
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    The authenticated user as seen by request handlers: just the fields
+    authorization needs, detached from any database session.
+    """
+
+    id: int
+    email: str
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(id=user.id, email=user.email, is_active=user.is_active)
+
+
+class PrincipalCache:
+    """
+    Bounded TTL cache of access token -> Principal, so authenticating a request
+    needs neither a JWT decode nor a database lookup on a hit.
+
+    An entry never outlives its token's `exp`. Updating a user invalidates all
+    of that user's entries in this process; other worker processes pick up the
+    change within the TTL, so keep it short.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl: float):
+        self.name = name
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # token -> (principal, expires_at, cached_at)
+        self._entries: TTLCache = TTLCache(maxsize=max_entries, ttl=ttl)
+        # user_id -> time of the last invalidation, kept for one TTL (older
+        # invalidations predate every live entry)
+        self._invalidated: TTLCache = TTLCache(maxsize=max_entries, ttl=ttl)
+
+    @classmethod
+    def from_settings(cls, name: str = "auth.principal_cache") -> "PrincipalCache":
+        return cls(
+            name,
+            max_entries=settings.AUTH_PRINCIPAL_CACHE_MAX_ENTRIES,
+            ttl=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+        )
+
+    def get(self, token: str) -> Optional[Principal]:
+        """
+        Returns the cached principal for `token`, recording a hit or miss.
+        """
+        now = time.time()
+        with self._lock:
+            entry: Optional[Tuple[Principal, float, float]] = self._entries.get(token)
+            if entry is not None:
+                principal, expires_at, cached_at = entry
+                if now >= expires_at or cached_at <= self._invalidated.get(
+                    principal.id, 0.0
+                ):
+                    del self._entries[token]
+                    entry = None
+        metrics.incr(f"{self.name}.{'hits' if entry is not None else 'misses'}")
+        return entry[0] if entry is not None else None
+
+    def set(
+        self,
+        token: str,
+        principal: Principal,
+        expires_at: float,
+        loaded_at: Optional[float] = None,
+    ) -> None:
+        """
+        Caches `principal` for `token` until the TTL or `expires_at` (the token's
+        `exp`, as a Unix timestamp), whichever comes first.
+
+        `loaded_at` is when the user was read from the database (default: now).
+        Pass the time taken before the read, so an invalidation that lands
+        while the read is in flight still discards the possibly stale entry.
+        """
+        with self._lock:
+            self._entries[token] = (
+                principal,
+                expires_at,
+                loaded_at if loaded_at is not None else time.time(),
+            )
+
+    def invalidate_user(self, user_id: int) -> None:
+        """
+        Drops every cached principal of `user_id`, e.g. after the user changed.
+        """
+        with self._lock:
+            self._invalidated[user_id] = time.time()
+        metrics.incr(f"{self.name}.invalidations")
+
+
+# Process-wide cache used by `deps.get_current_user`
+principal_cache = PrincipalCache.from_settings()
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from app import crud
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.services.observability_service import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PurgeWorker:
+    """
+    Deletes the rows of soft-deleted projects and chats in the background,
+    every `interval` seconds, through `crud.purge` in batches of `batch_size`
+    rows. Delete endpoints only flag rows, so they return at once however
+    much history they remove.
+
+    Every API worker runs one; batches lock with SKIP LOCKED, so concurrent
+    purgers split the work instead of waiting on each other.
+    """
+
+    def __init__(self, name: str, interval: float, batch_size: int):
+        self.name = name
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(cls, name: str = "purge") -> "PurgeWorker":
+        return cls(
+            name,
+            interval=settings.PURGE_INTERVAL_SECONDS,
+            batch_size=settings.PURGE_BATCH_SIZE,
+        )
+
+    def start(self) -> None:
+        self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.purge()
+            except Exception as e:
+                logger.warning(f"Purge of deleted rows failed: {e}")
+                metrics.incr(f"{self.name}.failures")
+            await asyncio.sleep(self.interval)
+
+    async def purge(self) -> int:
+        """
+        Deletes everything soft-deleted so far, one batch per transaction.
+
+        Returns:
+            The number of rows deleted.
+        """
+        total = 0
+        for kind, step in (
+            ("messages", crud.purge.apurge_messages),
+            ("chats", crud.purge.apurge_chats),
+            ("projects", crud.purge.apurge_projects),
+        ):
+            while True:
+                start = time.monotonic()
+                async with AsyncSessionLocal() as db:
+                    deleted = await step(db, limit=self.batch_size)
+                metrics.observe(f"{self.name}.batch_seconds", time.monotonic() - start)
+                metrics.incr(f"{self.name}.{kind}", deleted)
+                total += deleted
+                if deleted < self.batch_size:
+                    break
+        return total
+
+    async def aclose(self) -> None:
+        """
+        Stops the worker; an interrupted batch is rolled back and redone later.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,79 @@
+import asyncio
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from cachetools import TTLCache
+
+from app.services.observability_service import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def make_turn_key(
+    user_id: int, chat_id: int, content: str, idempotency_key: Optional[str] = None
+) -> str:
+    """
+    Identifies a chat turn for deduplication: by the client-supplied
+    idempotency key if present, otherwise by the message content. Content keys
+    only join turns still in flight, since sending the same text again later
+    (e.g. "yes") is a new turn.
+    """
+    if idempotency_key:
+        return f"{user_id}:{chat_id}:key:{idempotency_key}"
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return f"{user_id}:{chat_id}:content:{digest}"
+
+
+class RequestCoalescer:
+    """
+    Single-flight execution of duplicate requests.
+
+    Concurrent calls with the same key await one shared task instead of each
+    doing the work. Runs started with `replay=True` also have their successful
+    results replayed to repeats of the same key for `replay_window` seconds.
+    Failures are not replayed, so a retry after an error runs again.
+    """
+
+    def __init__(self, name: str, replay_window: float, max_entries: int = 10000):
+        self.name = name
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._recent: TTLCache = TTLCache(maxsize=max_entries, ttl=replay_window)
+
+    async def run(
+        self, key: str, fn: Callable[[], Awaitable[Any]], replay: bool = True
+    ) -> Any:
+        """
+        Returns the result of `fn`, sharing it with duplicate calls for `key`.
+
+        Args:
+            replay: Whether a finished result is kept for repeats of `key`.
+                Only pass True when the key names one logical request (e.g. a
+                client-supplied idempotency key); with False, a repeat after
+                the run has finished runs again.
+        """
+        if replay and key in self._recent:
+            metrics.incr(f"{self.name}.coalesce.replayed")
+            return self._recent[key]
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            metrics.incr(f"{self.name}.coalesce.joined")
+        else:
+            metrics.incr(f"{self.name}.coalesce.executed")
+            # Run as its own task so a caller going away does not cancel the
+            # work the other callers are waiting on.
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t, replay))
+
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task, replay: bool) -> None:
+        self._in_flight.pop(key, None)
+        if task.cancelled():
+            return
+        # Retrieving the exception also silences "never retrieved" warnings
+        # when every caller has gone away.
+        if task.exception() is None and replay:
+            self._recent[key] = task.result()
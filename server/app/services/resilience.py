@@ -0,0 +1,244 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from google.api_core import exceptions as google_exceptions
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception,
+    stop_after_attempt,
+    stop_before_delay,
+    wait_exponential_jitter,
+)
+
+from app.core.config import settings
+from app.exceptions import LLMDeadlineExceededError, LLMUnavailableError
+from app.services.observability_service import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Provider-side or transient failures. Anything else (bad request, auth,
+# permission, unknown errors) is permanent and fails fast.
+RETRYABLE_EXCEPTIONS = (
+    google_exceptions.ServerError,  # 5xx, incl. ServiceUnavailable, DeadlineExceeded
+    google_exceptions.TooManyRequests,  # 429, incl. ResourceExhausted
+    asyncio.TimeoutError,
+    ConnectionError,
+)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    Returns True if `exc` is a transient provider failure worth retrying.
+    """
+    return isinstance(exc, RETRYABLE_EXCEPTIONS)
+
+
+class CircuitBreaker:
+    """
+    Fails fast while the provider is unhealthy.
+
+    The circuit opens after `failure_threshold` consecutive retryable failures.
+    After `reset_timeout` seconds one probe request is let through (half-open);
+    its success closes the circuit, its failure reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def before_call(self) -> None:
+        """
+        Raises LLMUnavailableError if the call must not reach the provider.
+        """
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                metrics.incr(f"{self.name}.circuit.rejected")
+                raise LLMUnavailableError(
+                    "LLM provider is temporarily unavailable. Please retry shortly."
+                )
+            self._set_state(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                metrics.incr(f"{self.name}.circuit.rejected")
+                raise LLMUnavailableError(
+                    "LLM provider is recovering. Please retry shortly."
+                )
+            self._probe_in_flight = True
+
+    def release(self) -> None:
+        """
+        Ends a call without an outcome (e.g. it was cancelled).
+        """
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        self._consecutive_failures = 0
+        self._probe_in_flight = False
+        if self.state != self.CLOSED:
+            self._set_state(self.CLOSED)
+
+    def record_failure(self, exc: BaseException) -> None:
+        self._probe_in_flight = False
+        if not is_retryable(exc):
+            # Client errors say nothing about provider health
+            return
+        self._consecutive_failures += 1
+        if (
+            self.state == self.HALF_OPEN
+            or self._consecutive_failures >= self.failure_threshold
+        ):
+            self._opened_at = time.monotonic()
+            if self.state != self.OPEN:
+                metrics.incr(f"{self.name}.circuit.opened")
+                logger.warning(
+                    f"Circuit '{self.name}' opened after {self._consecutive_failures} failures."
+                )
+            self._set_state(self.OPEN)
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        metrics.set_gauge(
+            f"{self.name}.circuit.state",
+            {self.CLOSED: 0, self.HALF_OPEN: 1, self.OPEN: 2}[state],
+        )
+
+
+class ResiliencePolicy:
+    """
+    Wraps provider calls with classified retries, a total deadline, a circuit
+    breaker and optional hedged requests. All outcomes are counted in `metrics`
+    under the policy's name.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_attempts: int,
+        deadline: float,
+        breaker: CircuitBreaker,
+        hedge_delay: Optional[float] = None,
+    ):
+        self.name = name
+        self.max_attempts = max_attempts
+        self.deadline = deadline
+        self.breaker = breaker
+        self.hedge_delay = hedge_delay
+
+    @classmethod
+    def from_settings(cls, name: str = "llm") -> "ResiliencePolicy":
+        return cls(
+            name=name,
+            max_attempts=settings.LLM_MAX_ATTEMPTS,
+            deadline=settings.LLM_REQUEST_DEADLINE_SECONDS,
+            breaker=CircuitBreaker(
+                name,
+                failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.LLM_CIRCUIT_RESET_SECONDS,
+            ),
+            hedge_delay=settings.LLM_HEDGE_DELAY_SECONDS,
+        )
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs `fn` under the policy and returns its result.
+
+        Raises:
+            LLMUnavailableError: If the circuit breaker is open.
+            LLMDeadlineExceededError: If the total deadline elapses.
+            Exception: The last provider error once retries are exhausted or
+                immediately for non-retryable errors.
+        """
+        metrics.incr(f"{self.name}.calls")
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + self.deadline
+
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(self.max_attempts)
+            | stop_before_delay(self.deadline),
+            wait=wait_exponential_jitter(initial=0.5, max=4, jitter=0.5),
+            retry=retry_if_exception(is_retryable),
+            reraise=True,
+        )
+        try:
+            async for attempt in retrying:
+                with attempt:
+                    if attempt.retry_state.attempt_number > 1:
+                        metrics.incr(f"{self.name}.retries")
+                    self.breaker.before_call()
+                    remaining = deadline_at - loop.time()
+                    if remaining <= 0:
+                        raise LLMDeadlineExceededError("LLM request deadline exceeded.")
+                    try:
+                        result = await asyncio.wait_for(
+                            self._attempt(fn), timeout=remaining
+                        )
+                    except Exception as e:
+                        self.breaker.record_failure(e)
+                        raise
+                    except BaseException:
+                        self.breaker.release()
+                        raise
+                    self.breaker.record_success()
+                    return result
+        except asyncio.TimeoutError as e:
+            metrics.incr(f"{self.name}.deadline_exceeded")
+            raise LLMDeadlineExceededError("LLM request deadline exceeded.") from e
+        except LLMDeadlineExceededError:
+            metrics.incr(f"{self.name}.deadline_exceeded")
+            raise
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            metrics.incr(
+                f"{self.name}.failures."
+                f"{'retryable' if is_retryable(e) else 'non_retryable'}"
+            )
+            raise
+
+    async def _attempt(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs one attempt, hedging it with a second request if configured and
+        the first has not finished within `hedge_delay` seconds.
+        """
+        metrics.incr(f"{self.name}.attempts")
+        if not self.hedge_delay:
+            return await fn()
+
+        primary = asyncio.ensure_future(fn())
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.hedge_delay)
+            if done:
+                return primary.result()
+
+            metrics.incr(f"{self.name}.hedges.launched")
+            hedge = asyncio.ensure_future(fn())
+            pending.add(hedge)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            metrics.incr(f"{self.name}.hedges.won")
+                        return task.result()
+            # Both failed: surface the primary's error
+            return primary.result()
+        finally:
+            # Also reached when the deadline cancels this attempt
+            for task in pending:
+                task.cancel()
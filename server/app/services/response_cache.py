@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from cachetools import TTLCache
+from langchain_core.messages import BaseMessage
+from sqlalchemy import delete, select
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models import LLMResponseCacheEntry
+from app.services.observability_service import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(model: str, messages: List[BaseMessage]) -> str:
+    """
+    Returns a stable hash of the model name and the fully built message list.
+    """
+    payload = json.dumps(
+        [model, [[m.type, m.content] for m in messages]],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(ABC):
+    """
+    Cache of LLM responses keyed by `make_cache_key`, with LRU + TTL eviction.
+    """
+
+    backend: str
+
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Returns the cached response for `key`, recording a hit or miss.
+        Backend failures are logged and treated as a miss.
+        """
+        try:
+            value = await self._get(key)
+        except Exception as e:
+            logger.warning(f"Response cache ({self.backend}) read failed: {e}")
+            metrics.incr("llm_response_cache.errors")
+            value = None
+        metrics.incr(
+            f"llm_response_cache.{'hits' if value is not None else 'misses'}"
+        )
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        """
+        Stores a response, evicting the least recently used entries if full.
+        Writes are best-effort; a failure never fails the chat turn.
+        """
+        try:
+            await self._set(key, value)
+        except Exception as e:
+            logger.warning(f"Response cache ({self.backend}) write failed: {e}")
+            metrics.incr("llm_response_cache.errors")
+
+    @abstractmethod
+    async def _get(self, key: str) -> Optional[str]: ...
+
+    @abstractmethod
+    async def _set(self, key: str, value: str) -> None: ...
+
+
+class InMemoryResponseCache(ResponseCache):
+    """
+    Per-process cache backed by `cachetools.TTLCache` (LRU within a TTL).
+    """
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self._cache: TTLCache = TTLCache(maxsize=max_entries, ttl=ttl_seconds)
+        self._lock = threading.Lock()
+
+    async def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._cache.get(key)
+
+    async def _set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._cache[key] = value
+
+
+class SQLResponseCache(ResponseCache):
+    """
+    Persistent cache stored in the `llm_response_cache` table, shared by all
+    workers and surviving restarts. Expired and least recently used rows are
+    pruned every `prune_every` writes.
+    """
+
+    backend = "sql"
+
+    def __init__(self, max_entries: int, ttl_seconds: int, prune_every: int = 100):
+        self.max_entries = max_entries
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.prune_every = prune_every
+        self._writes = 0
+
+    async def _get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get_sync, key)
+
+    async def _set(self, key: str, value: str) -> None:
+        self._writes += 1
+        prune = self._writes % self.prune_every == 0
+        await asyncio.to_thread(self._set_sync, key, value, prune)
+
+    def _get_sync(self, key: str) -> Optional[str]:
+        now = datetime.now(timezone.utc)
+        with SessionLocal() as db:
+            entry = db.scalar(
+                select(LLMResponseCacheEntry).where(
+                    LLMResponseCacheEntry.key == key,
+                    LLMResponseCacheEntry.expires_at > now,
+                )
+            )
+            if entry is None:
+                return None
+            # Touch for LRU ordering
+            entry.last_accessed_at = now
+            db.commit()
+            return entry.response
+
+    def _set_sync(self, key: str, value: str, prune: bool) -> None:
+        now = datetime.now(timezone.utc)
+        with SessionLocal() as db:
+            db.merge(
+                LLMResponseCacheEntry(
+                    key=key,
+                    response=value,
+                    expires_at=now + self.ttl,
+                    last_accessed_at=now,
+                )
+            )
+            if prune:
+                self._prune(db, now)
+            db.commit()
+
+    def _prune(self, db, now: datetime) -> None:
+        db.execute(
+            delete(LLMResponseCacheEntry).where(LLMResponseCacheEntry.expires_at <= now)
+        )
+        # Keep only the `max_entries` most recently used rows
+        cutoff = db.scalar(
+            select(LLMResponseCacheEntry.last_accessed_at)
+            .order_by(LLMResponseCacheEntry.last_accessed_at.desc())
+            .offset(self.max_entries)
+            .limit(1)
+        )
+        if cutoff is not None:
+            result = db.execute(
+                delete(LLMResponseCacheEntry).where(
+                    LLMResponseCacheEntry.last_accessed_at <= cutoff
+                )
+            )
+            metrics.incr("llm_response_cache.evictions", result.rowcount)
+
+
+def build_response_cache() -> Optional[ResponseCache]:
+    """
+    Creates the response cache selected by `LLM_CACHE_BACKEND`, or None if disabled.
+    """
+    backend = settings.LLM_CACHE_BACKEND
+    if backend == "memory":
+        return InMemoryResponseCache(
+            settings.LLM_CACHE_MAX_ENTRIES, settings.LLM_CACHE_TTL_SECONDS
+        )
+    if backend == "sql":
+        return SQLResponseCache(
+            settings.LLM_CACHE_MAX_ENTRIES, settings.LLM_CACHE_TTL_SECONDS
+        )
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown LLM_CACHE_BACKEND: {backend}")
@@ -0,0 +1,16 @@
+import math
+
+# Gemini does not ship an offline tokenizer and `count_tokens` is a network call,
+# so token counts are estimated. ~4 characters per token holds well for English
+# text and errs on the side of overestimating for code and non-Latin scripts.
+CHARS_PER_TOKEN = 4
+
+# Fixed per-message cost for role markers and turn separators.
+MESSAGE_TOKEN_OVERHEAD = 4
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens the LLM will spend on a single message.
+    """
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN) + MESSAGE_TOKEN_OVERHEAD
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app import crud
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models import Message
+from app.services.observability_service import metrics
+
+logger = logging.getLogger(__name__)
+
+_Turn = Tuple[int, Sequence[Tuple[str, str]], Optional[Dict[str, Any]]]
+
+
+class TurnWriter:
+    """
+    Persists chat turns through `crud.chat.apersist_turns`, each in a
+    short-lived session of its own.
+
+    With `batched` set, turns that arrive close together are collected for up
+    to `max_delay` seconds (or until `max_batch` turns) and written in one
+    transaction, so concurrent turns share a single commit and fsync. Callers
+    still wait for that commit, so an acknowledged turn is always durable. If a
+    batch fails, its turns are retried one by one so a single bad turn (e.g. a
+    chat deleted meanwhile) only fails its own caller.
+    """
+
+    def __init__(
+        self, name: str, batched: bool, max_batch: int = 64, max_delay: float = 0.005
+    ):
+        self.name = name
+        self.batched = batched
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending: List[Tuple[_Turn, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flushes: "set[asyncio.Task]" = set()
+
+    @classmethod
+    def from_settings(cls, name: str = "chat.turn_writer") -> "TurnWriter":
+        return cls(
+            name,
+            batched=settings.CHAT_WRITE_BATCHING,
+            max_batch=settings.CHAT_WRITE_BATCH_MAX_TURNS,
+            max_delay=settings.CHAT_WRITE_BATCH_DELAY_MS / 1000,
+        )
+
+    async def persist(
+        self,
+        chat_id: int,
+        messages: Sequence[Tuple[str, str]],
+        chat_updates: Optional[Dict[str, Any]] = None,
+    ) -> List[Message]:
+        """
+        Persists one turn's messages, given as (role, content) pairs, and
+        returns them once committed.
+        """
+        turn: _Turn = (chat_id, messages, chat_updates)
+        if not self.batched:
+            (created,) = await self._write([turn])
+            return created
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((turn, future))
+        if len(self._pending) >= self.max_batch:
+            self._start_flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self.max_delay, self._start_flush
+            )
+        # The batch is written even if this caller goes away
+        return await asyncio.shield(future)
+
+    def _start_flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[Tuple[_Turn, asyncio.Future]]) -> None:
+        turns = [turn for turn, _ in batch]
+        try:
+            results = await self._write(turns)
+        except Exception as e:
+            logger.warning(
+                f"Batched write of {len(turns)} chat turns failed, retrying one by one: {e}"
+            )
+            metrics.incr(f"{self.name}.batch_failures")
+            for turn, future in batch:
+                try:
+                    (created,) = await self._write([turn])
+                except Exception as turn_error:
+                    if not future.done():
+                        future.set_exception(turn_error)
+                else:
+                    if not future.done():
+                        future.set_result(created)
+            return
+        for (_, future), created in zip(batch, results):
+            if not future.done():
+                future.set_result(created)
+
+    async def _write(self, turns: List[_Turn]) -> List[List[Message]]:
+        start = time.monotonic()
+        async with AsyncSessionLocal() as db:
+            results = await crud.chat.apersist_turns(db, turns)
+        metrics.incr(f"{self.name}.commits")
+        metrics.incr(f"{self.name}.turns", len(turns))
+        metrics.observe(f"{self.name}.commit_seconds", time.monotonic() - start)
+        return results
+
+    async def aclose(self) -> None:
+        """
+        Writes any turns still waiting for a batch.
+        """
+        self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
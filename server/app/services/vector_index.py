@@ -0,0 +1,70 @@
+from typing import Collection, List, Sequence, Tuple
+
+import numpy as np
+
+
+class VectorIndex:
+    """
+    Exact nearest-neighbour index over unit-length float32 vectors, held in one
+    contiguous NumPy matrix so a search is a single matrix-vector product.
+
+    Vectors are appended in place with amortized O(1) growth, so an index can
+    be kept in memory and topped up with newly inserted rows instead of being
+    rebuilt. Adding an id that is already present is a no-op.
+    """
+
+    def __init__(self, dim: int, capacity: int = 64):
+        self.dim = dim
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._vectors = np.empty((capacity, dim), dtype=np.float32)
+        self._size = 0
+        self._known: set = set()
+        self.max_id = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, id_: int) -> bool:
+        return id_ in self._known
+
+    def add(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        """
+        Appends `vectors` (one row per id); rows of the wrong size are skipped.
+        """
+        keep = [
+            row
+            for row, id_ in enumerate(ids)
+            if id_ not in self._known and vectors[row].shape == (self.dim,)
+        ]
+        if not keep:
+            return
+        needed = self._size + len(keep)
+        if needed > len(self._ids):
+            capacity = max(needed, 2 * len(self._ids))
+            self._ids = np.resize(self._ids, capacity)
+            self._vectors = np.resize(self._vectors, (capacity, self.dim))
+        new_ids = [ids[row] for row in keep]
+        self._ids[self._size : needed] = new_ids
+        self._vectors[self._size : needed] = np.stack([vectors[row] for row in keep])
+        self._size = needed
+        self._known.update(new_ids)
+        self.max_id = max(self.max_id, max(new_ids))
+
+    def search(
+        self, query: np.ndarray, k: int, exclude: Collection[int] = ()
+    ) -> List[Tuple[int, float]]:
+        """
+        Returns up to `k` (id, cosine similarity) pairs, most similar first,
+        skipping ids in `exclude` and vectors with no similarity at all.
+        """
+        if self._size == 0 or k <= 0:
+            return []
+        scores = self._vectors[: self._size] @ query
+        if exclude:
+            scores[np.isin(self._ids[: self._size], list(exclude))] = -np.inf
+        k = min(k, self._size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (int(self._ids[row]), float(scores[row])) for row in top if scores[row] > 0
+        ]
@@ -0,0 +1,82 @@
+import threading
+import time
+from typing import Optional
+
+from cachetools import TTLCache
+from jose import JWTError, jwt
+
+from app.core import security
+from app.core.config import settings
+
+# Where the client carries its last-write marker: API clients echo the header
+# they got from their last write, browsers send the cookie back on their own
+WRITE_MARKER_HEADER = "X-Last-Write"
+WRITE_MARKER_COOKIE = "last_write"
+# Sets write markers apart from access tokens signed with the same key
+_MARKER_SCOPE = "last_write"
+
+
+class RecentWrites:
+    """
+    The users who wrote within the last `window` seconds, for read-your-writes
+    consistency with an asynchronously replicated read replica: while a user is
+    in here, their reads go to the primary (see `deps.get_read_db`), so a
+    lagging replica never hides their own just-made changes. Keep the window
+    above the replica's usual lag.
+
+    Tracked per worker process, and also carried by the client as a signed
+    marker (`marker`) that expires with the window, so a read served by any
+    worker honors a write made through another.
+    """
+
+    def __init__(self, window: float, max_users: int):
+        self.window = window
+        self._lock = threading.Lock()
+        self._users: TTLCache = TTLCache(maxsize=max_users, ttl=window)
+
+    @classmethod
+    def from_settings(cls) -> "RecentWrites":
+        return cls(
+            window=settings.DB_READ_YOUR_WRITES_SECONDS,
+            max_users=settings.DB_READ_YOUR_WRITES_MAX_USERS,
+        )
+
+    def mark(self, user_id: int) -> None:
+        """
+        Records a write by `user_id`, (re)starting their window.
+        """
+        with self._lock:
+            self._users[user_id] = True
+
+    def marker(self, user_id: int, delay: float = 0.0) -> str:
+        """
+        Returns a marker of a write by `user_id`, signed with SECRET_KEY, for
+        the client to send back with its reads. It is honored for `window`
+        seconds, plus `delay` for writes that commit after it is handed out.
+        """
+        expires_at = time.time() + self.window + delay
+        claims = {"sub": str(user_id), "scope": _MARKER_SCOPE, "exp": expires_at}
+        return jwt.encode(claims, settings.SECRET_KEY, algorithm=security.ALGORITHM)
+
+    def is_recent(self, user_id: int, marker: Optional[str] = None) -> bool:
+        """
+        Tells whether `user_id` wrote within the window, as recorded by this
+        process or shown by a valid, unexpired `marker` of theirs.
+        """
+        with self._lock:
+            if user_id in self._users:
+                return True
+        if not marker:
+            return False
+        try:
+            claims = jwt.decode(
+                marker, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
+            )
+        except JWTError:
+            return False
+        is_theirs = claims.get("sub") == str(user_id)
+        return is_theirs and claims.get("scope") == _MARKER_SCOPE
+
+
+# Process-wide tracker used by `deps` and the chat turn endpoints
+recent_writes = RecentWrites.from_settings()
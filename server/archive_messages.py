@@ -0,0 +1,65 @@
+"""
+Moves the message contents of inactive chats into compressed cold storage.
+
+Archives up to ARCHIVE_MAX_CHATS_PER_RUN chats with no new message for
+ARCHIVE_INACTIVE_DAYS, least recently active first, compressing each chat's
+message contents into one segment with ARCHIVE_CODEC. Archived messages are
+still served by the API: reads decompress them on the fly, and the next chat
+turn moves them back. Prints the bytes saved by this run and by all segments.
+
+Meant to run periodically (e.g. daily from cron); safe to run concurrently
+with the API and with itself.
+
+Usage:
+    python archive_messages.py [inactive_days] [max_chats]
+"""
+
+import sys
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app import crud  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.db.session import SessionLocal  # noqa: E402
+
+
+def report(label: str, messages: int, raw_bytes: int, stored_bytes: int) -> None:
+    ratio = raw_bytes / stored_bytes if stored_bytes else 0.0
+    print(
+        f"{label}: {messages} messages, {raw_bytes} bytes -> {stored_bytes} bytes "
+        f"({ratio:.1f}x), {raw_bytes - stored_bytes} bytes saved"
+    )
+
+
+def main(inactive_days: int, max_chats: int) -> int:
+    inactive_before = datetime.now(timezone.utc) - timedelta(days=inactive_days)
+    with SessionLocal() as db:
+        results = crud.message_archive.archive_inactive(
+            db,
+            inactive_before=inactive_before,
+            codec=settings.ARCHIVE_CODEC,
+            limit=max_chats,
+        )
+        report(
+            f"Archived {len(results)} chat(s)",
+            sum(result["messages"] for result in results),
+            sum(result["raw_bytes"] for result in results),
+            sum(result["stored_bytes"] for result in results),
+        )
+        totals = crud.message_archive.totals(db)
+        report(
+            f"All archives ({totals['chats']} chats)",
+            totals["messages"],
+            totals["raw_bytes"],
+            totals["stored_bytes"],
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    defaults = [settings.ARCHIVE_INACTIVE_DAYS, settings.ARCHIVE_MAX_CHATS_PER_RUN]
+    sys.exit(main(*(args + defaults[len(args) :])))
@@ -0,0 +1,60 @@
+"""
+Measures the per-request overhead of obtaining an LLM client.
+
+"before" constructs a new LLMService per request (the old `get_llm_service`
+behaviour) and creates its async gRPC client, which every fresh instance paid
+for on its first `ainvoke`. "after" fetches the shared service from the
+application-scoped LLMRegistry. No requests are sent to the provider.
+
+Usage:
+    python benchmark_llm_service.py [iterations]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.services.llm_registry import LLMRegistry  # noqa: E402
+from app.services.llm_service import LLMService  # noqa: E402
+
+
+def summarize(label: str, samples_us: list) -> None:
+    samples_us = sorted(samples_us)
+    p99 = samples_us[int(len(samples_us) * 0.99) - 1]
+    print(
+        f"{label:<8} mean={statistics.mean(samples_us):10.1f}us "
+        f"p50={statistics.median(samples_us):10.1f}us p99={p99:10.1f}us"
+    )
+
+
+async def run(iterations: int) -> None:
+    before = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        service = LLMService()
+        service.llm.async_client  # channel created lazily on first async call
+        before.append((time.perf_counter() - start) * 1e6)
+        await service.aclose()
+
+    registry = LLMRegistry()
+    registry.get().llm.async_client
+    after = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        service = registry.get()
+        service.llm.async_client
+        after.append((time.perf_counter() - start) * 1e6)
+    await registry.aclose()
+
+    print(f"Per-request LLM client overhead over {iterations} iterations:")
+    summarize("before", before)
+    summarize("after", after)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
@@ -0,0 +1,276 @@
+"""
+Checks that the CRUD layer's list and lookup queries are served by indexes.
+
+Seeds a realistically sized dataset (users, projects, chats, messages) inside a
+transaction, runs ANALYZE, then calls the real CRUD functions while capturing
+the SQL they emit, and runs EXPLAIN on each statement with the same parameters.
+Any sequential scan on projects, chats or messages is reported as a regression
+and the script exits with status 1. Everything is rolled back at the end, so it
+is safe to point at a development database that has been migrated to head.
+
+Requires PostgreSQL. tests/test_query_plans.py runs the same check when
+TEST_POSTGRES_URL is set, and an EXPLAIN QUERY PLAN check on SQLite always.
+
+Usage:
+    python check_query_plans.py [users] [projects_per_user] [chats_per_project] [messages_per_chat]
+"""
+
+import json
+import sys
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import event, text  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app import crud  # noqa: E402
+from app.db.session import engine  # noqa: E402
+
+CHECKED_TABLES = {"projects", "chats", "messages"}
+
+SEED_STATEMENTS = [
+    """
+    INSERT INTO users (email, hashed_password, is_active)
+    SELECT 'plan-check-' || g || '@example.invalid', 'x', true
+    FROM generate_series(1, :users) AS g
+    """,
+    """
+    INSERT INTO projects (name, base_instructions, owner_id, created_at)
+    SELECT 'Project ' || g, 'Be helpful.', u.id,
+           now() - random() * interval '365 days'
+    FROM users AS u CROSS JOIN generate_series(1, :projects_per_user) AS g
+    WHERE u.email LIKE 'plan-check-%'
+    """,
+    """
+    INSERT INTO chats (title, project_id, created_at)
+    SELECT 'Chat ' || g, p.id, p.created_at + g * interval '1 hour'
+    FROM projects AS p
+    JOIN users AS u ON u.id = p.owner_id AND u.email LIKE 'plan-check-%'
+    CROSS JOIN generate_series(1, :chats_per_project) AS g
+    """,
+    """
+    INSERT INTO messages (chat_id, role, content, token_count, created_at)
+    SELECT c.id,
+           CASE WHEN g % 2 = 1 THEN 'user' ELSE 'assistant' END,
+           repeat('lorem ipsum ', 20), 64,
+           c.created_at + g * interval '1 minute'
+    FROM chats AS c
+    JOIN projects AS p ON p.id = c.project_id
+    JOIN users AS u ON u.id = p.owner_id AND u.email LIKE 'plan-check-%'
+    CROSS JOIN generate_series(1, :messages_per_chat) AS g
+    """,
+    "ANALYZE users, projects, chats, messages",
+]
+
+
+@contextmanager
+def capture_statements(session: Session):
+    """
+    Records every (statement, parameters) the session sends to the database.
+    """
+    captured: List[Tuple[str, object]] = []
+    connection = session.connection()
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", _record)
+    try:
+        yield captured
+    finally:
+        event.remove(connection, "before_cursor_execute", _record)
+
+
+def seq_scans(plan: Dict) -> List[str]:
+    """
+    Returns the checked tables that a plan node (or any child) reads with a
+    sequential scan.
+    """
+    found = []
+    if (
+        plan.get("Node Type") == "Seq Scan"
+        and plan.get("Relation Name") in CHECKED_TABLES
+    ):
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def scan_summary(plan: Dict) -> List[str]:
+    """
+    Returns the scan nodes of a plan, e.g. "Index Scan using ix_... on chats".
+    """
+    nodes = []
+    if "Relation Name" in plan or "Index Name" in plan:
+        index = f" using {plan['Index Name']}" if "Index Name" in plan else ""
+        relation = f" on {plan['Relation Name']}" if "Relation Name" in plan else ""
+        nodes.append(f"{plan['Node Type']}{index}{relation}")
+    for child in plan.get("Plans", []):
+        nodes.extend(scan_summary(child))
+    return nodes
+
+
+def plan_queries(
+    db: Session, owner_id: int, project_id: int, chat_id: int
+) -> Dict[str, Callable[[], object]]:
+    """
+    Returns the CRUD calls to check, by name, for the given user, one of their
+    projects and one of its chats. Also used by tests/test_query_plans.py.
+    """
+    _, project_cursor = crud.project.get_multi_by_owner(db, owner_id=owner_id, limit=1)
+    _, chat_cursor = crud.chat.get_multi_by_project(db, project_id=project_id, limit=1)
+    _, active_chat_cursor = crud.chat.get_multi_by_project(
+        db, project_id=project_id, limit=1, sort="activity"
+    )
+    _, older, _ = crud.chat.get_messages(db, chat_id=chat_id, limit=5)
+
+    return {
+        "project.get": lambda: crud.project.get(db, id=project_id),
+        "project.get_multi_by_owner": lambda: crud.project.get_multi_by_owner(
+            db, owner_id=owner_id, limit=20
+        ),
+        "project.get_multi_by_owner (cursor)": lambda: crud.project.get_multi_by_owner(
+            db, owner_id=owner_id, cursor=project_cursor, limit=20
+        ),
+        "project.get_multi_by_owner (activity)": lambda: crud.project.get_multi_by_owner(
+            db, owner_id=owner_id, limit=20, sort="activity"
+        ),
+        "chat.get": lambda: crud.chat.get(db, id=chat_id),
+        "chat.get_with_owner_id": lambda: crud.chat.get_with_owner_id(db, id=chat_id),
+        "chat.get_multi_by_owner": lambda: crud.chat.get_multi_by_owner(
+            db, owner_id=owner_id, limit=20
+        ),
+        "chat.get_multi_by_project": lambda: crud.chat.get_multi_by_project(
+            db, project_id=project_id, owner_id=owner_id, limit=20
+        ),
+        "chat.get_multi_by_project (cursor)": lambda: crud.chat.get_multi_by_project(
+            db,
+            project_id=project_id,
+            owner_id=owner_id,
+            cursor=chat_cursor,
+            limit=20,
+        ),
+        "chat.get_multi_by_owner (activity)": lambda: crud.chat.get_multi_by_owner(
+            db, owner_id=owner_id, limit=20, sort="activity"
+        ),
+        "chat.get_multi_by_project (activity)": lambda: crud.chat.get_multi_by_project(
+            db,
+            project_id=project_id,
+            owner_id=owner_id,
+            limit=20,
+            sort="activity",
+        ),
+        "chat.get_multi_by_project (activity, cursor)": lambda: crud.chat.get_multi_by_project(
+            db,
+            project_id=project_id,
+            owner_id=owner_id,
+            cursor=active_chat_cursor,
+            limit=20,
+            sort="activity",
+        ),
+        "chat.get_messages (latest)": lambda: crud.chat.get_messages(
+            db, chat_id=chat_id, owner_id=owner_id, limit=20
+        ),
+        "chat.get_messages (before)": lambda: crud.chat.get_messages(
+            db, chat_id=chat_id, owner_id=owner_id, before=older, limit=20
+        ),
+        "chat.get_messages (after)": lambda: crud.chat.get_messages(
+            db, chat_id=chat_id, owner_id=owner_id, after=older, limit=20
+        ),
+        # A selective term; one matching most rows is rightly a seq scan
+        "search.search": lambda: crud.search.search(
+            db, owner_id=owner_id, query="kubernetes deployment", limit=20
+        ),
+    }
+
+
+def check(
+    engine: Engine,
+    users: int,
+    projects_per_user: int,
+    chats_per_project: int,
+    messages_per_chat: int,
+) -> List[Tuple[str, List[str], List[str]]]:
+    """
+    Seeds the dataset, EXPLAINs every statement of `plan_queries` and rolls
+    everything back.
+
+    Returns:
+        For each statement, the query name, the checked tables it reads with a
+        sequential scan, and its scan nodes.
+    """
+    results = []
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            sizes = {
+                "users": users,
+                "projects_per_user": projects_per_user,
+                "chats_per_project": chats_per_project,
+                "messages_per_chat": messages_per_chat,
+            }
+            for statement in SEED_STATEMENTS:
+                connection.execute(text(statement), sizes)
+
+            owner_id = connection.execute(
+                text(
+                    "SELECT id FROM users WHERE email = 'plan-check-1@example.invalid'"
+                )
+            ).scalar_one()
+            project_id = connection.execute(
+                text("SELECT min(id) FROM projects WHERE owner_id = :o"),
+                {"o": owner_id},
+            ).scalar_one()
+            chat_id = connection.execute(
+                text("SELECT min(id) FROM chats WHERE project_id = :p"),
+                {"p": project_id},
+            ).scalar_one()
+
+            db = Session(bind=connection)
+            queries = plan_queries(db, owner_id, project_id, chat_id)
+            for name, run_query in queries.items():
+                with capture_statements(db) as captured:
+                    run_query()
+                for statement, parameters in captured:
+                    plan = connection.exec_driver_sql(
+                        "EXPLAIN (FORMAT JSON) " + statement, parameters
+                    ).scalar_one()
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    root = plan[0]["Plan"]
+                    results.append((name, seq_scans(root), scan_summary(root)))
+            db.close()
+        finally:
+            transaction.rollback()
+    return results
+
+
+def main(
+    users: int, projects_per_user: int, chats_per_project: int, messages_per_chat: int
+) -> int:
+    if engine.dialect.name != "postgresql":
+        print("check_query_plans.py requires PostgreSQL.")
+        return 2
+    results = check(
+        engine, users, projects_per_user, chats_per_project, messages_per_chat
+    )
+    failures = 0
+    for name, bad, summary in results:
+        status = f"FAIL (seq scan on {', '.join(bad)})" if bad else "ok"
+        failures += bool(bad)
+        print(f"{status:<6} {name}: {'; '.join(summary)}")
+
+    print(f"{failures} query plan regression(s).")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:5]]
+    defaults = [500, 4, 10, 25]
+    sys.exit(main(*(args + defaults[len(args) :])))
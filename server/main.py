@@ -1,10 +1,44 @@
 # server/main.py
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.responses import RedirectResponse  # Import RedirectResponse
 
 from app.api.v1.api import api_router  # Import the aggregated API router
 from app.core.config import settings  # Import your settings for configuration
+from app.db.session import async_engine
+from app.services.history_retriever import HistoryRetriever
+from app.services.llm_registry import LLMRegistry
+from app.services.purge_worker import PurgeWorker
+from app.services.request_coalescer import RequestCoalescer
+from app.services.turn_writer import TurnWriter
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Creates process-wide resources at startup and releases them at shutdown.
+    """
+    app.state.llm_registry = LLMRegistry()
+    app.state.chat_turn_coalescer = RequestCoalescer(
+        "chat_turn", replay_window=settings.CHAT_DEDUP_WINDOW_SECONDS
+    )
+    app.state.turn_writer = TurnWriter.from_settings()
+    app.state.history_retriever = (
+        HistoryRetriever.from_settings() if settings.CONTEXT_RETRIEVAL_SCOPE else None
+    )
+    app.state.purge_worker = PurgeWorker.from_settings()
+    if settings.PURGE_INTERVAL_SECONDS is not None:
+        app.state.purge_worker.start()
+    if settings.LLM_WARMUP_ON_STARTUP:
+        await app.state.llm_registry.warmup()
+    yield
+    await app.state.purge_worker.aclose()
+    await app.state.llm_registry.aclose()
+    await app.state.turn_writer.aclose()
+    await async_engine.dispose()
+
 
 # Initialize FastAPI app with settings from config.py
 app = FastAPI(
@@ -12,6 +46,7 @@ app = FastAPI(
     description="API for organizing LLM-based chats by project with common base instructions.",
     version="1.0.0",
     openapi_url=f"{settings.API_VER_STR}/openapi.json",  # Set OpenAPI URL based on API_VER_STR
+    lifespan=lifespan,
 )
 
 
@@ -0,0 +1,69 @@
+import os
+import tempfile
+
+# Settings are read at import time, so configure them before importing the app
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.pop("DATABASE_REPLICA_URL", None)
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["FAKE_LLM_LATENCY_DISTRIBUTION"] = "fixed"
+os.environ["FAKE_LLM_LATENCY_MS"] = "0"
+os.environ["FAKE_LLM_TOKENS_PER_SECOND"] = "1000000"
+os.environ["LLM_WARMUP_ON_STARTUP"] = "false"
+os.environ["PURGE_INTERVAL_SECONDS"] = "3600"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import app.models  # noqa: E402,F401
+from app.db.base import Base  # noqa: E402
+from app.db.session import engine  # noqa: E402
+from main import app  # noqa: E402
+
+
+@pytest.fixture()
+def client():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture()
+def auth_headers(client):
+    """
+    Registers a user and returns the headers that authenticate as them.
+    """
+    email, password = "user@example.com", "password"
+    response = client.post(
+        "/api/v1/users/", json={"email": email, "password": password}
+    )
+    assert response.status_code == 200, response.text
+    response = client.post(
+        "/api/v1/login/access-token", data={"username": email, "password": password}
+    )
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture()
+def project(client, auth_headers):
+    response = client.post(
+        "/api/v1/projects/",
+        json={"name": "project", "base_instructions": "Be brief."},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.fixture()
+def chat(client, auth_headers, project):
+    response = client.post(
+        "/api/v1/chats/",
+        json={"project_id": project["id"], "title": "chat"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from app import crud
+from app.db.session import SessionLocal
+from app.models import Chat, Message, MessageArchive
+
+
+def post_message(client, headers, chat, content):
+    response = client.post(
+        f"/api/v1/chats/{chat['id']}/message",
+        json={"message_content": content},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+
+
+def messages(client, headers, chat):
+    response = client.get(f"/api/v1/chats/{chat['id']}/messages", headers=headers)
+    assert response.status_code == 200, response.text
+    return [m["content"] for m in response.json()["items"]]
+
+
+def archive(inactive_before):
+    with SessionLocal() as db:
+        return crud.message_archive.archive_inactive(
+            db, inactive_before=inactive_before, codec="zlib", limit=10
+        )
+
+
+def stored_contents(chat):
+    with SessionLocal() as db:
+        return db.scalars(
+            select(Message.content)
+            .where(Message.chat_id == chat["id"])
+            .order_by(Message.id)
+        ).all()
+
+
+def test_archived_chats_are_still_served(client, auth_headers, chat):
+    post_message(client, auth_headers, chat, "deploy kubernetes")
+    before = messages(client, auth_headers, chat)
+
+    (result,) = archive(datetime.now(timezone.utc) + timedelta(minutes=1))
+
+    assert result["chat_id"] == chat["id"] and result["messages"] == 2
+    assert stored_contents(chat) == [None, None]
+    assert messages(client, auth_headers, chat) == before
+    # Left out of search until rehydrated
+    search = client.get(
+        "/api/v1/search", params={"q": "kubernetes"}, headers=auth_headers
+    )
+    assert search.json()["items"] == []
+
+
+def test_next_turn_rehydrates_the_chat(client, auth_headers, chat):
+    post_message(client, auth_headers, chat, "first")
+    archive(datetime.now(timezone.utc) + timedelta(minutes=1))
+
+    post_message(client, auth_headers, chat, "second")
+
+    contents = stored_contents(chat)
+    assert len(contents) == 4 and all(contents)
+    assert contents[0] == "first" and contents[2] == "second"
+    with SessionLocal() as db:
+        assert db.get(Chat, chat["id"]).archived_at is None
+        assert db.scalars(select(MessageArchive)).all() == []
+
+
+def test_active_chats_are_not_archived(client, auth_headers, chat):
+    post_message(client, auth_headers, chat, "hello")
+
+    assert archive(datetime.now(timezone.utc) - timedelta(days=1)) == []
+    assert all(stored_contents(chat))
@@ -0,0 +1,105 @@
+def batch(client, headers, method, url, items):
+    return client.request(method, url, json=items, headers=headers)
+
+
+def test_create_many_chats(client, auth_headers, project):
+    response = batch(
+        client,
+        auth_headers,
+        "POST",
+        "/api/v1/chats/batch",
+        [{"project_id": project["id"], "title": f"chat {i}"} for i in range(3)],
+    )
+
+    assert response.status_code == 200, response.text
+    assert [chat["title"] for chat in response.json()] == ["chat 0", "chat 1", "chat 2"]
+
+
+def test_update_many_chats(client, auth_headers, project):
+    chats = batch(
+        client,
+        auth_headers,
+        "POST",
+        "/api/v1/chats/batch",
+        [{"project_id": project["id"], "title": f"chat {i}"} for i in range(2)],
+    ).json()
+
+    response = batch(
+        client,
+        auth_headers,
+        "PATCH",
+        "/api/v1/chats/batch",
+        [{"id": chat["id"], "title": f"renamed {chat['id']}"} for chat in chats],
+    )
+
+    assert response.status_code == 200, response.text
+    assert [(chat["title"], bool(chat["updated_at"])) for chat in response.json()] == [
+        (f"renamed {chat['id']}", True) for chat in chats
+    ]
+
+
+def test_upsert_replaces_and_creates_chats(client, auth_headers, project, chat):
+    assert chat["updated_at"] is None
+
+    response = batch(
+        client,
+        auth_headers,
+        "PUT",
+        "/api/v1/chats/batch",
+        [
+            {"id": chat["id"], "project_id": project["id"], "title": "replaced"},
+            {"project_id": project["id"], "title": "new"},
+        ],
+    )
+
+    assert response.status_code == 200, response.text
+    replaced, created = response.json()
+    assert replaced["id"] == chat["id"] and replaced["title"] == "replaced"
+    assert replaced["updated_at"] is not None
+    assert created["id"] != chat["id"] and created["title"] == "new"
+
+
+def test_upsert_replaces_projects(client, auth_headers, project):
+    response = batch(
+        client,
+        auth_headers,
+        "PUT",
+        "/api/v1/projects/batch",
+        [{"id": project["id"], "name": "renamed", "base_instructions": "x"}],
+    )
+
+    assert response.status_code == 200, response.text
+    (replaced,) = response.json()
+    assert replaced["name"] == "renamed" and replaced["updated_at"] is not None
+
+
+def test_batches_are_all_or_nothing(client, auth_headers, project, chat):
+    response = batch(
+        client,
+        auth_headers,
+        "PATCH",
+        "/api/v1/chats/batch",
+        [{"id": chat["id"], "title": "renamed"}, {"id": chat["id"] + 100}],
+    )
+
+    assert response.status_code == 404
+    stored = client.get(f"/api/v1/chats/{chat['id']}", headers=auth_headers).json()
+    assert stored["title"] == "chat"
+
+
+def test_chats_cannot_move_project(client, auth_headers, project, chat):
+    other = client.post(
+        "/api/v1/projects/",
+        json={"name": "other", "base_instructions": "x"},
+        headers=auth_headers,
+    ).json()
+
+    response = batch(
+        client,
+        auth_headers,
+        "PUT",
+        "/api/v1/chats/batch",
+        [{"id": chat["id"], "project_id": other["id"], "title": "moved"}],
+    )
+
+    assert response.status_code == 400
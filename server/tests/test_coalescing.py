@@ -0,0 +1,90 @@
+import asyncio
+
+from app.services.request_coalescer import RequestCoalescer, make_turn_key
+
+
+class Work:
+    def __init__(self):
+        self.runs = 0
+
+    async def __call__(self):
+        self.runs += 1
+        await asyncio.sleep(0.01)
+        return f"result {self.runs}"
+
+
+def test_concurrent_duplicates_share_one_run():
+    async def main():
+        coalescer, work = RequestCoalescer("test", replay_window=30), Work()
+        runs = (coalescer.run("key", work, replay=False) for _ in range(3))
+        return await asyncio.gather(*runs), work.runs
+
+    results, runs = asyncio.run(main())
+    assert results == ["result 1"] * 3
+    assert runs == 1
+
+
+def test_results_are_replayed_only_when_asked():
+    async def main(replay):
+        coalescer, work = RequestCoalescer("test", replay_window=30), Work()
+        first = await coalescer.run("key", work, replay=replay)
+        second = await coalescer.run("key", work, replay=replay)
+        return first, second
+
+    assert asyncio.run(main(replay=True)) == ("result 1", "result 1")
+    assert asyncio.run(main(replay=False)) == ("result 1", "result 2")
+
+
+def test_failures_are_not_replayed():
+    async def main():
+        coalescer, calls = RequestCoalescer("test", replay_window=30), []
+
+        async def flaky():
+            calls.append(None)
+            if len(calls) == 1:
+                raise ValueError("first call fails")
+            return "ok"
+
+        try:
+            await coalescer.run("key", flaky)
+        except ValueError:
+            pass
+        return await coalescer.run("key", flaky)
+
+    assert asyncio.run(main()) == "ok"
+
+
+def test_turn_keys():
+    assert make_turn_key(1, 2, "yes") == make_turn_key(1, 2, "yes")
+    assert make_turn_key(1, 2, "yes") != make_turn_key(1, 3, "yes")
+    assert make_turn_key(1, 2, "yes", "k") == make_turn_key(1, 2, "no", "k")
+
+
+def messages(client, headers, chat):
+    response = client.get(f"/api/v1/chats/{chat['id']}/messages", headers=headers)
+    assert response.status_code == 200, response.text
+    return [(m["role"], m["content"]) for m in response.json()["items"]]
+
+
+def test_repeated_message_is_a_new_turn(client, auth_headers, chat):
+    url = f"/api/v1/chats/{chat['id']}/message"
+    for _ in range(2):
+        response = client.post(
+            url, json={"message_content": "yes"}, headers=auth_headers
+        )
+        assert response.status_code == 200, response.text
+
+    roles = [role for role, _ in messages(client, auth_headers, chat)]
+    assert roles == ["user", "assistant"] * 2
+
+
+def test_idempotent_retry_replays_the_response(client, auth_headers, chat):
+    url = f"/api/v1/chats/{chat['id']}/message"
+    headers = dict(auth_headers, **{"Idempotency-Key": "turn-1"})
+    replies = [
+        client.post(url, json={"message_content": "yes"}, headers=headers).json()
+        for _ in range(2)
+    ]
+
+    assert replies[0] == replies[1]
+    assert len(messages(client, auth_headers, chat)) == 2
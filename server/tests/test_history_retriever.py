@@ -0,0 +1,74 @@
+import asyncio
+
+from sqlalchemy import insert, select
+
+from app import crud
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine
+from app.models import Message
+from app.services.history_retriever import HistoryRetriever
+
+
+def retriever():
+    return HistoryRetriever(
+        "test", scope="chat", recent_messages=2, top_k=2, max_indexes=10
+    )
+
+
+def select_history(history_retriever, chat_id, content):
+    async def main():
+        try:
+            async with AsyncSessionLocal() as db:
+                chat = await crud.chat.aget_with_history(
+                    db, chat_id=chat_id, with_messages=False
+                )
+                history = await history_retriever.aselect_history(db, chat, content)
+                return [message.content for message in history]
+        finally:
+            await async_engine.dispose()
+
+    return asyncio.run(main())
+
+
+def test_retrieves_similar_older_messages(client, chat):
+    contents = [
+        "the deploy pipeline uses kubernetes",
+        "lunch was good",
+        "the weather is nice",
+        "what about testing?",
+        "ok",
+    ]
+    with SessionLocal() as db:
+        db.execute(
+            insert(Message),
+            [{"chat_id": chat["id"], "role": "user", "content": c} for c in contents],
+        )
+        db.commit()
+
+    history = select_history(retriever(), chat["id"], "how do we deploy kubernetes")
+
+    # Retrieved older messages first, then the recent ones
+    assert history[0] == "the deploy pipeline uses kubernetes"
+    assert history[-2:] == ["what about testing?", "ok"]
+
+
+def test_embeddings_of_legacy_messages_are_stored(client, chat):
+    with SessionLocal() as db:
+        db.execute(
+            insert(Message),
+            [
+                {"chat_id": chat["id"], "role": "user", "content": f"old {i}"}
+                for i in range(3)
+            ],
+        )
+        db.commit()
+
+    select_history(retriever(), chat["id"], "old")
+
+    with SessionLocal() as db:
+        stored = db.execute(
+            select(Message.embedding, Message.updated_at).where(
+                Message.chat_id == chat["id"]
+            )
+        ).all()
+    assert len(stored) == 3
+    assert all(embedding and updated_at is None for embedding, updated_at in stored)
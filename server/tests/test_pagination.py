@@ -0,0 +1,119 @@
+def walk(client, headers, url, params, cursor_param="cursor", cursor_key="next_cursor"):
+    """
+    Follows the cursors of a paged endpoint to the end, and returns the IDs in
+    the order served (pages are prepended when walking back with "before").
+    """
+    ids, page_params = [], dict(params)
+    for _ in range(100):
+        response = client.get(url, params=page_params, headers=headers)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        page_ids = [item["id"] for item in page["items"]]
+        ids = page_ids + ids if cursor_param == "before" else ids + page_ids
+        if not page[cursor_key]:
+            return ids
+        page_params = dict(params, **{cursor_param: page[cursor_key]})
+    raise AssertionError(f"The cursor never reached the end: {ids[:20]}")
+
+
+def create_chats(client, headers, project, count):
+    chats = []
+    for i in range(count):
+        response = client.post(
+            "/api/v1/chats/",
+            json={"project_id": project["id"], "title": f"chat {i}"},
+            headers=headers,
+        )
+        assert response.status_code == 200, response.text
+        chats.append(response.json()["id"])
+    return chats
+
+
+def test_chat_pages_within_the_same_second(client, auth_headers, project):
+    chat_ids = create_chats(client, auth_headers, project, 4)
+
+    ids = walk(
+        client,
+        auth_headers,
+        "/api/v1/chats/",
+        {"project_id": project["id"], "limit": 1},
+    )
+
+    assert ids == chat_ids
+
+
+def test_project_pages_within_the_same_second(client, auth_headers, project):
+    project_ids = [project["id"]]
+    for i in range(3):
+        response = client.post(
+            "/api/v1/projects/",
+            json={"name": f"project {i}", "base_instructions": "x"},
+            headers=auth_headers,
+        )
+        project_ids.append(response.json()["id"])
+
+    assert walk(client, auth_headers, "/api/v1/projects/", {"limit": 1}) == project_ids
+
+
+def test_message_pages_within_one_turn(client, auth_headers, project):
+    # Both messages of a turn are written in one transaction, at one timestamp
+    (chat_id,) = create_chats(client, auth_headers, project, 1)
+    for i in range(3):
+        response = client.post(
+            f"/api/v1/chats/{chat_id}/message",
+            json={"message_content": f"message {i}"},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200, response.text
+    url = f"/api/v1/chats/{chat_id}/messages"
+    page = client.get(url, params={"limit": 6}, headers=auth_headers).json()
+    message_ids = [message["id"] for message in page["items"]]
+    newest = client.get(url, params={"limit": 5}, headers=auth_headers).json()
+    oldest = client.get(
+        url, params={"limit": 1, "before": newest["prev_cursor"]}, headers=auth_headers
+    ).json()
+
+    backwards = walk(client, auth_headers, url, {"limit": 1}, "before", "prev_cursor")
+    forwards = walk(
+        client, auth_headers, url, {"limit": 1, "after": oldest["next_cursor"]}, "after"
+    )
+
+    assert len(message_ids) == 6
+    assert backwards == message_ids
+    assert [oldest["items"][0]["id"]] + forwards == message_ids
+
+
+def test_activity_pages_cover_every_row_once(client, auth_headers, project):
+    chat_ids = create_chats(client, auth_headers, project, 4)
+    response = client.post(
+        f"/api/v1/chats/{chat_ids[1]}/message",
+        json={"message_content": "hello"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+    # Created after that message, so more recently active
+    project_ids = [
+        client.post(
+            "/api/v1/projects/",
+            json={"name": f"project {i}", "base_instructions": "x"},
+            headers=auth_headers,
+        ).json()["id"]
+        for i in range(2)
+    ]
+
+    chats = walk(
+        client,
+        auth_headers,
+        "/api/v1/chats/",
+        {"project_id": project["id"], "sort": "activity", "limit": 1},
+    )
+    all_chats = walk(
+        client, auth_headers, "/api/v1/chats/", {"sort": "activity", "limit": 1}
+    )
+    projects = walk(
+        client, auth_headers, "/api/v1/projects/", {"sort": "activity", "limit": 1}
+    )
+
+    # Most recently active first
+    assert chats == all_chats == [chat_ids[1], chat_ids[3], chat_ids[2], chat_ids[0]]
+    assert projects == [project_ids[1], project_ids[0], project["id"]]
@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.db.session import engine
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_project_list_queries_do_not_grow_with_projects(client, auth_headers, project):
+    with count_queries() as one_project:
+        response = client.get("/api/v1/projects/", headers=auth_headers)
+        assert response.status_code == 200
+    for i in range(5):
+        response = client.post(
+            "/api/v1/projects/",
+            json={"name": f"project {i}", "base_instructions": "x"},
+            headers=auth_headers,
+        )
+        client.post(
+            "/api/v1/chats/",
+            json={"project_id": response.json()["id"], "title": "chat"},
+            headers=auth_headers,
+        )
+
+    with count_queries() as six_projects:
+        response = client.get("/api/v1/projects/", headers=auth_headers)
+
+    assert len(response.json()["items"]) == 6
+    assert "chats" not in response.json()["items"][0]
+    assert len(six_projects) == len(one_project)
+
+
+def test_project_detail_includes_its_chats(client, auth_headers, project):
+    client.post(
+        "/api/v1/chats/",
+        json={"project_id": project["id"], "title": "chat"},
+        headers=auth_headers,
+    )
+
+    response = client.get(f"/api/v1/projects/{project['id']}", headers=auth_headers)
+
+    assert [chat["title"] for chat in response.json()["chats"]] == ["chat"]
@@ -0,0 +1,86 @@
+import os
+import re
+
+import pytest
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.orm import Session
+
+import check_query_plans
+from app.db.session import engine
+from app.models import Chat, Message, Project, User
+
+# A full scan of a checked table, e.g. "SCAN chats" but not "SEARCH chats ..."
+FULL_SCAN = re.compile(rf"^SCAN ({'|'.join(check_query_plans.CHECKED_TABLES)})\b")
+
+
+def seed(db, owner_id):
+    projects = db.scalars(
+        insert(Project).returning(Project.id),
+        [
+            {"name": f"project {i}", "base_instructions": "x", "owner_id": owner_id}
+            for i in range(20)
+        ],
+    ).all()
+    chats = db.scalars(
+        insert(Chat).returning(Chat.id),
+        [
+            {"title": f"chat {i}", "project_id": project_id}
+            for project_id in projects
+            for i in range(10)
+        ],
+    ).all()
+    db.execute(
+        insert(Message),
+        [
+            {"chat_id": chat_id, "role": "user", "content": "deploy kubernetes"}
+            for chat_id in chats
+            for _ in range(10)
+        ],
+    )
+    db.commit()
+    return projects[0], chats[0]
+
+
+def test_sqlite_queries_use_indexes(client, auth_headers):
+    with Session(engine) as db:
+        owner_id = db.scalars(select(User.id)).one()
+        project_id, chat_id = seed(db, owner_id)
+        db.execute(text("ANALYZE"))
+        queries = check_query_plans.plan_queries(db, owner_id, project_id, chat_id)
+        failures = []
+        for name, run_query in queries.items():
+            with check_query_plans.capture_statements(db) as captured:
+                run_query()
+            for statement, parameters in captured:
+                plan = db.connection().exec_driver_sql(
+                    "EXPLAIN QUERY PLAN " + statement, parameters
+                )
+                details = [row[3] for row in plan]
+                if any(FULL_SCAN.match(detail) for detail in details):
+                    failures.append(f"{name}: {'; '.join(details)}")
+
+    assert not failures, "\n".join(failures)
+
+
+@pytest.mark.skipif(
+    not os.environ.get("TEST_POSTGRES_URL"),
+    reason="Set TEST_POSTGRES_URL to a PostgreSQL database migrated to head",
+)
+def test_postgres_queries_use_indexes():
+    postgres = create_engine(os.environ["TEST_POSTGRES_URL"])
+    try:
+        results = check_query_plans.check(
+            postgres,
+            users=200,
+            projects_per_user=4,
+            chats_per_project=10,
+            messages_per_chat=25,
+        )
+    finally:
+        postgres.dispose()
+
+    failures = [
+        f"{name}: {'; '.join(summary)}" for name, bad, summary in results if bad
+    ]
+    assert results
+    assert not failures, "\n".join(failures)
@@ -0,0 +1,102 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api import deps
+from app.core.config import settings
+from app.db.base import Base
+from app.services.write_tracker import RecentWrites
+
+
+@pytest.fixture()
+def replica(monkeypatch, tmp_path):
+    """
+    Points the read-only endpoints at an empty replica, standing in for one
+    that hasn't caught up with the primary.
+    """
+    replica_url = f"sqlite:///{tmp_path / 'replica.db'}"
+    replica_engine = create_engine(replica_url)
+    Base.metadata.create_all(replica_engine)
+    monkeypatch.setattr(settings, "DATABASE_REPLICA_URL", replica_url)
+    monkeypatch.setattr(deps, "ReplicaSessionLocal", sessionmaker(bind=replica_engine))
+    yield
+    replica_engine.dispose()
+
+
+def another_worker(monkeypatch):
+    # A worker that didn't see the write itself
+    monkeypatch.setattr(deps, "recent_writes", RecentWrites(window=10, max_users=10))
+
+
+def create_project(client, headers):
+    response = client.post(
+        "/api/v1/projects/",
+        json={"name": "project", "base_instructions": "x"},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    return response
+
+
+def project_names(client, headers):
+    response = client.get("/api/v1/projects/", headers=headers)
+    assert response.status_code == 200, response.text
+    return [project["name"] for project in response.json()["items"]]
+
+
+def test_reads_go_to_the_replica(client, auth_headers, replica, monkeypatch):
+    create_project(client, auth_headers)
+    another_worker(monkeypatch)
+    client.cookies.clear()
+
+    assert project_names(client, auth_headers) == []
+
+
+def test_same_worker_reads_its_writes(client, auth_headers, replica):
+    create_project(client, auth_headers)
+    client.cookies.clear()
+
+    assert project_names(client, auth_headers) == ["project"]
+
+
+def test_write_marker_cookie_is_honored(client, auth_headers, replica, monkeypatch):
+    create_project(client, auth_headers)
+    another_worker(monkeypatch)
+
+    assert project_names(client, auth_headers) == ["project"]
+
+
+def test_write_marker_header_is_honored(client, auth_headers, replica, monkeypatch):
+    marker = create_project(client, auth_headers).headers["X-Last-Write"]
+    another_worker(monkeypatch)
+    client.cookies.clear()
+
+    headers = dict(auth_headers, **{"X-Last-Write": marker})
+    assert project_names(client, headers) == ["project"]
+
+
+def test_invalid_write_markers_are_ignored(client, auth_headers, replica, monkeypatch):
+    user_id = create_project(client, auth_headers).json()["owner_id"]
+    another_worker(monkeypatch)
+    client.cookies.clear()
+    tracker = RecentWrites(window=10, max_users=10)
+
+    for marker in (
+        tracker.marker(user_id + 1),  # someone else's
+        tracker.marker(user_id, delay=-20),  # expired
+        tracker.marker(user_id)[:-2] + "xx",  # tampered with
+        auth_headers["Authorization"].split()[1],  # an access token
+    ):
+        headers = dict(auth_headers, **{"X-Last-Write": marker})
+        assert project_names(client, headers) == []
+
+
+def test_streamed_turns_carry_a_write_marker(client, auth_headers, chat, replica):
+    response = client.post(
+        f"/api/v1/chats/{chat['id']}/message/stream",
+        json={"message_content": "hello"},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.headers["X-Last-Write"]
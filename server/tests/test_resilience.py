@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from app.exceptions import LLMDeadlineExceededError, LLMUnavailableError
+from app.services.resilience import CircuitBreaker, ResiliencePolicy
+
+
+class Provider:
+    """
+    Stands in for a provider call: fails with the queued errors, then returns
+    "ok", sleeping `delays[n]` seconds on the n-th call.
+    """
+
+    def __init__(self, errors=(), delays=()):
+        self.errors = list(errors)
+        self.delays = list(delays)
+        self.calls = 0
+
+    async def __call__(self):
+        delay = self.delays[self.calls] if self.calls < len(self.delays) else 0
+        self.calls += 1
+        await asyncio.sleep(delay)
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def policy(max_attempts=3, deadline=5.0, hedge_delay=None, failure_threshold=5):
+    return ResiliencePolicy(
+        "test",
+        max_attempts=max_attempts,
+        deadline=deadline,
+        breaker=CircuitBreaker(
+            "test", failure_threshold=failure_threshold, reset_timeout=30.0
+        ),
+        hedge_delay=hedge_delay,
+    )
+
+
+def test_circuit_opens_after_consecutive_failures_and_recovers():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.05)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure(google_exceptions.ServiceUnavailable("down"))
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(LLMUnavailableError):
+        breaker.before_call()
+
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one probe at a time
+    with pytest.raises(LLMUnavailableError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_failed_probe_reopens_the_circuit():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+    breaker.before_call()
+    breaker.record_failure(ConnectionError())
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_failure(ConnectionError())
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(LLMUnavailableError):
+        breaker.before_call()
+
+
+def test_client_errors_do_not_open_the_circuit():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30.0)
+    breaker.before_call()
+    breaker.record_failure(google_exceptions.InvalidArgument("bad request"))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_transient_errors_are_retried():
+    provider = Provider(errors=[google_exceptions.TooManyRequests("slow down")])
+    assert asyncio.run(policy().call(provider)) == "ok"
+    assert provider.calls == 2
+
+
+def test_permanent_errors_fail_fast():
+    provider = Provider(errors=[google_exceptions.PermissionDenied("no")])
+    with pytest.raises(google_exceptions.PermissionDenied):
+        asyncio.run(policy().call(provider))
+    assert provider.calls == 1
+
+
+def test_open_circuit_rejects_without_calling_the_provider():
+    resilience = policy(max_attempts=1, failure_threshold=1)
+    provider = Provider(errors=[google_exceptions.ServiceUnavailable("down")])
+    with pytest.raises(google_exceptions.ServiceUnavailable):
+        asyncio.run(resilience.call(provider))
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(resilience.call(provider))
+    assert provider.calls == 1
+
+
+def test_deadline_bounds_the_whole_call():
+    provider = Provider(delays=[1.0])
+    with pytest.raises(LLMDeadlineExceededError):
+        asyncio.run(policy(deadline=0.05).call(provider))
+
+
+def test_hedge_wins_over_a_slow_primary():
+    provider = Provider(delays=[1.0, 0.0])
+    start = time.monotonic()
+    assert asyncio.run(policy(hedge_delay=0.05).call(provider)) == "ok"
+    assert provider.calls == 2
+    assert time.monotonic() - start < 1.0
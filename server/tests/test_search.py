@@ -0,0 +1,82 @@
+from sqlalchemy import insert
+
+from app.db.session import SessionLocal
+from app.models import Message
+
+
+def add_messages(chat, contents):
+    with SessionLocal() as db:
+        db.execute(
+            insert(Message),
+            [
+                {"chat_id": chat["id"], "role": "user", "content": content}
+                for content in contents
+            ],
+        )
+        db.commit()
+
+
+def search(client, headers, q, **params):
+    response = client.get("/api/v1/search", params=dict(params, q=q), headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_snippets_escape_message_contents(client, auth_headers, chat):
+    add_messages(chat, ["<img src=x onerror=alert(1)> deploy & ship"])
+
+    (hit,) = search(client, auth_headers, "deploy")["items"]
+
+    assert (
+        hit["snippet"] == "&lt;img src=x onerror=alert(1)&gt; <b>deploy</b> &amp; ship"
+    )
+
+
+def test_chat_title_matches_come_first(client, auth_headers, project, chat):
+    # Short messages that repeat a rare term score higher than a title
+    add_messages(chat, ["kubernetes kubernetes kubernetes"] * 3)
+    add_messages(chat, [f"unrelated {i}" for i in range(20)])
+    titled = client.post(
+        "/api/v1/chats/",
+        json={
+            "project_id": project["id"],
+            "title": "notes from the long meeting about moving kubernetes clusters",
+        },
+        headers=auth_headers,
+    ).json()
+
+    hits = search(client, auth_headers, "kubernetes")["items"]
+
+    assert [(hit["kind"], hit["chat_id"]) for hit in hits] == [
+        ("chat", titled["id"])
+    ] + [("message", chat["id"])] * 3
+
+
+def test_pages_cover_every_hit_once(client, auth_headers, chat):
+    add_messages(chat, [f"deploy number {i}" for i in range(7)])
+
+    ids, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        page = search(client, auth_headers, "deploy", **params)
+        ids += [hit["message_id"] for hit in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert len(ids) == len(set(ids)) == 7
+
+
+def test_search_is_limited_to_the_owner(client, auth_headers, chat):
+    add_messages(chat, ["deploy"])
+    client.post(
+        "/api/v1/users/", json={"email": "other@example.com", "password": "password"}
+    )
+    token = client.post(
+        "/api/v1/login/access-token",
+        data={"username": "other@example.com", "password": "password"},
+    ).json()["access_token"]
+
+    other = search(client, {"Authorization": f"Bearer {token}"}, "deploy")
+
+    assert other["items"] == []
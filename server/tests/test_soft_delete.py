@@ -0,0 +1,95 @@
+import asyncio
+
+from sqlalchemy import func, select
+
+from app.db.session import SessionLocal, async_engine
+from app.models import Chat, Message, Project
+from app.services.purge_worker import PurgeWorker
+
+
+def post_message(client, headers, chat, content="deploy kubernetes"):
+    response = client.post(
+        f"/api/v1/chats/{chat['id']}/message",
+        json={"message_content": content},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+
+
+def count_rows(model):
+    with SessionLocal() as db:
+        return db.scalar(
+            select(func.count()).select_from(model),
+            execution_options={"include_deleted": True},
+        )
+
+
+def purge():
+    async def main():
+        try:
+            return await PurgeWorker("test", interval=3600, batch_size=3).purge()
+        finally:
+            await async_engine.dispose()
+
+    return asyncio.run(main())
+
+
+def test_deleted_chat_disappears_at_once(client, auth_headers, project, chat):
+    post_message(client, auth_headers, chat)
+
+    response = client.delete(f"/api/v1/chats/{chat['id']}", headers=auth_headers)
+    assert response.status_code == 200, response.text
+
+    get = client.get(f"/api/v1/chats/{chat['id']}", headers=auth_headers)
+    assert get.status_code == 404
+    chats = client.get(
+        "/api/v1/chats/", params={"project_id": project["id"]}, headers=auth_headers
+    )
+    assert chats.json()["items"] == []
+    search = client.get(
+        "/api/v1/search", params={"q": "kubernetes"}, headers=auth_headers
+    )
+    assert search.json()["items"] == []
+    # Still stored until purged
+    assert count_rows(Chat) == 1 and count_rows(Message) == 2
+
+
+def test_deleted_project_hides_its_chats(client, auth_headers, project, chat):
+    response = client.delete(f"/api/v1/projects/{project['id']}", headers=auth_headers)
+    assert response.status_code == 200, response.text
+
+    projects = client.get("/api/v1/projects/", headers=auth_headers)
+    assert projects.json()["items"] == []
+    get = client.get(f"/api/v1/chats/{chat['id']}", headers=auth_headers)
+    assert get.status_code == 404
+
+
+def test_purge_removes_only_deleted_rows(client, auth_headers, project, chat):
+    kept = client.post(
+        "/api/v1/chats/",
+        json={"project_id": project["id"], "title": "kept"},
+        headers=auth_headers,
+    ).json()
+    for _ in range(4):
+        post_message(client, auth_headers, chat)
+    post_message(client, auth_headers, kept)
+    client.delete(f"/api/v1/chats/{chat['id']}", headers=auth_headers)
+
+    # 8 messages in batches of 3, then the chat
+    assert purge() == 9
+
+    assert count_rows(Chat) == 1 and count_rows(Message) == 2
+    assert count_rows(Project) == 1
+    get = client.get(f"/api/v1/chats/{kept['id']}", headers=auth_headers)
+    assert get.status_code == 200
+
+
+def test_purge_removes_a_deleted_project_with_its_history(
+    client, auth_headers, project, chat
+):
+    post_message(client, auth_headers, chat)
+    client.delete(f"/api/v1/projects/{project['id']}", headers=auth_headers)
+
+    purge()
+
+    assert count_rows(Project) == count_rows(Chat) == count_rows(Message) == 0
@@ -0,0 +1,58 @@
+import asyncio
+
+from sqlalchemy import event
+
+from app.db.session import async_engine
+from app.services.turn_writer import TurnWriter
+
+
+def test_concurrent_turns_share_one_commit(client, auth_headers, project, chat):
+    other = client.post(
+        "/api/v1/chats/",
+        json={"project_id": project["id"], "title": "other"},
+        headers=auth_headers,
+    ).json()
+    commits = []
+
+    async def main():
+        writer = TurnWriter("test", batched=True, max_delay=0.05)
+        try:
+            return await asyncio.gather(
+                writer.persist(chat["id"], [("user", "hi"), ("assistant", "hello")]),
+                writer.persist(other["id"], [("user", "hey")]),
+            )
+        finally:
+            await async_engine.dispose()
+
+    def count_commit(conn):
+        commits.append(conn)
+
+    event.listen(async_engine.sync_engine, "commit", count_commit)
+    try:
+        first, second = asyncio.run(main())
+    finally:
+        event.remove(async_engine.sync_engine, "commit", count_commit)
+
+    assert len(commits) == 1
+    assert [(m.chat_id, m.role, m.content) for m in first + second] == [
+        (chat["id"], "user", "hi"),
+        (chat["id"], "assistant", "hello"),
+        (other["id"], "user", "hey"),
+    ]
+    # Returned fully populated, without a refresh
+    assert all(m.id and m.created_at for m in first + second)
+
+
+def test_turn_updates_chat_stats(client, auth_headers, chat):
+    response = client.post(
+        f"/api/v1/chats/{chat['id']}/message",
+        json={"message_content": "hello"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+
+    stats = client.get(f"/api/v1/chats/{chat['id']}", headers=auth_headers).json()
+    assert stats["message_count"] == 2
+    assert stats["token_count"] > 0
+    assert stats["last_message_preview"]
+    assert stats["last_activity_at"] is not None